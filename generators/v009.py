@@ -0,0 +1,312 @@
+import tkinter as tk
+from tkinter import ttk, Text
+from matplotlib import pyplot as plt
+from matplotlib.animation import FuncAnimation
+import yfinance as yf
+import pandas as pd
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from PIL import Image, ImageDraw, ImageTk
+import moviepy.editor as mpy
+import datetime
+from tqdm import tqdm
+import matplotlib.dates as mdates
+import os
+import time
+import tracemalloc
+
+# Helper function to get ordinal day suffix
+def get_ordinal(n):
+    return "%d%s" % (n, "th" if 4 <= n <= 20 or 24 <= n <= 30 else ["st", "nd", "rd"][n % 10 - 1])
+
+# Helper function to format date
+def format_date(date_str):
+    date_obj = datetime.datetime.strptime(date_str, '%Y-%m-%d')
+    month = date_obj.strftime('%B')
+    day = get_ordinal(date_obj.day)
+    year = date_obj.year
+    return f"{month} {day} {year}"
+
+# Helper function to convert the downloaded series into plain per-frame arrays
+def build_frame_table(data):
+    index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+    timestamps = np.ascontiguousarray(index.values.astype('datetime64[ns]').astype(np.int64))
+    prices = np.ascontiguousarray(data['Close'].to_numpy(dtype=np.float64).reshape(-1))
+    dates = np.ascontiguousarray(mdates.date2num(index.values), dtype=np.float64)
+    labels = np.array([f"${price:.2f}" for price in prices])
+
+    # Axis limits follow the visible part of the line, with matplotlib's default 5% margins
+    low = np.minimum.accumulate(prices)
+    high = np.maximum.accumulate(prices)
+    y_pad = np.where(high > low, (high - low) * 0.05, np.maximum(np.abs(high) * 0.05, 1.0))
+    y_min = low - y_pad
+    y_max = high + y_pad
+    x_span = dates - dates[0]
+    x_pad = np.where(x_span > 0, x_span * 0.05, 1.0)
+    x_min = dates[0] - x_pad
+    x_max = dates + x_pad
+
+    # Price label position in axes coordinates (0-1), so no data transform is needed per frame
+    label_x = (dates - x_min) / (x_max - x_min)
+    label_y = (prices - y_min) / (y_max - y_min)
+
+    return {
+        'timestamps': timestamps,
+        'dates': dates,
+        'prices': prices,
+        'labels': labels,
+        'label_x': label_x,
+        'label_y': label_y,
+        'x_min': x_min,
+        'x_max': x_max,
+        'y_min': y_min,
+        'y_max': y_max,
+    }
+
+# Function to generate the animation
+def generate_animation():
+    ticker_type = ticker_type_var.get()
+    ticker = ticker_entry.get().upper()
+    start_date = start_entry.get()
+    end_date = end_entry.get()
+    skip_days = int(skip_days_entry.get() or 0)
+    include_start_date = include_start_var.get()
+    include_end_date = include_end_var.get()
+    custom_text = custom_text_box.get("1.0", tk.END).strip()
+    x_ticks_interval = int(x_ticks_entry.get() or 1)
+    y_ticks_interval = int(y_ticks_entry.get() or 10)
+    chart_height_pct = int(chart_height_entry.get() or 100) / 100
+    watermark_text = watermark_entry.get()
+    watermark_color = watermark_color_entry.get()
+    cut_initial_frames = cut_initial_frames_var.get()
+    profile_frames = profile_frames_var.get()
+
+    # Fetch stock/crypto data
+    data = yf.download(ticker, start=start_date, end=end_date)
+
+    # Apply skip days
+    data = data[::skip_days+1]
+
+    # Cut out initial frames if selected
+    if cut_initial_frames:
+        data = data.iloc[skip_days+1:]
+
+    # Precompute everything the render loop needs as plain arrays
+    table = build_frame_table(data)
+    dates = table['dates']
+    prices = table['prices']
+    labels = table['labels']
+    label_x = table['label_x']
+    label_y = table['label_y']
+    x_min, x_max = table['x_min'], table['x_max']
+    y_min, y_max = table['y_min'], table['y_max']
+    frame_count = len(prices)
+
+    # Format the start and end dates
+    formatted_start_date = format_date(start_date)
+    formatted_end_date = format_date(end_date)
+
+    # Generate animation using Matplotlib
+    fig, ax = plt.subplots(figsize=(6, 10 * chart_height_pct))  # Adjustable chart height
+    fig.patch.set_facecolor('black')
+    ax.set_facecolor('black')
+    ax.set_title(f'{ticker_type} Ticker: {ticker}', fontsize=16, color='white', pad=30)
+    ax.set_xlabel('Date', color='white')
+    ax.set_ylabel('Price', color='white')
+
+    # Display start and end dates at the top
+    if include_start_date:
+        fig.text(0.5, 0.95, f"Start Date: {formatted_start_date}", ha='center', va='center', color='white', fontsize=12)
+    if include_end_date:
+        fig.text(0.5, 0.92, f"End Date: {formatted_end_date}", ha='center', va='center', color='white', fontsize=12)
+    
+    # Display custom text if provided
+    if custom_text:
+        fig.text(0.5, 0.89, custom_text, ha='center', va='center', color='white', fontsize=12)
+
+    # Display watermark if provided
+    if watermark_text:
+        fig.text(0.5, 0.5, watermark_text, ha='center', va='center', color=watermark_color, fontsize=40, alpha=0.5)
+
+    # Load the logo based on ticker type
+    logo_folder = "Logos/Stocks" if ticker_type == "Stock" else "Logos/Crypto"
+    logo_file = f"{ticker.lower()}.png"
+
+    # Special case for Saudi Aramco and Ripple
+    if ticker == "2222.SR":  # Saudi Aramco ticker
+        logo_file = "saudiaramco.png"
+    elif ticker == "XRP-USD":  # Ripple ticker
+        logo_file = "Ripple.png"
+
+    logo_path = os.path.join(logo_folder, logo_file)
+
+    # Check if the logo file exists
+    if os.path.exists(logo_path):
+        logo_img = Image.open(logo_path)
+        logo_img = logo_img.resize((500, int(logo_img.height * (500 / logo_img.width))), Image.ANTIALIAS)
+
+        # Display the logo below the chart
+        fig.figimage(logo_img, xo=fig.bbox.xmax // 2 - 250, yo=fig.bbox.ymin + 20)  # Position below chart
+    
+    # Persistent artists, only their data changes per frame
+    line, = ax.plot([], [], color='green')
+    price_label = ax.text(0, 0, '', transform=ax.transAxes, fontsize=14, ha='right', va='center',
+                          bbox=dict(facecolor='yellow', edgecolor='white', boxstyle='round,pad=0.5'), color='black', fontweight='bold')
+
+    # Set the x-axis date format and y-axis tick interval once
+    ax.xaxis.set_major_locator(mdates.MonthLocator(interval=x_ticks_interval))  # Configurable date interval
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    ax.yaxis.set_major_locator(plt.MultipleLocator(y_ticks_interval))  # Configurable y-axis interval
+    ax.tick_params(axis='x', colors='white')
+    ax.tick_params(axis='y', colors='white')
+
+    # Per-frame wall time and peak allocated bytes, filled in when profiling
+    frame_times = np.zeros(frame_count)
+    frame_allocs = np.zeros(frame_count)
+    last_tick = [time.perf_counter()]
+    if profile_frames:
+        tracemalloc.start()
+
+    # Create a progress bar
+    progress_bar = tqdm(total=frame_count, desc="Generating Animation", unit="frames")
+
+    def update(frame):
+        line.set_data(dates[:frame + 1], prices[:frame + 1])
+        ax.set_xlim(x_min[frame], x_max[frame])
+        ax.set_ylim(y_min[frame], y_max[frame])
+
+        # Display the current stock price next to the line
+        price_label.set_position((label_x[frame], label_y[frame]))
+        price_label.set_text(labels[frame])
+
+        if profile_frames:
+            now = time.perf_counter()
+            frame_times[frame] = now - last_tick[0]  # Covers the previous frame's draw and encode too
+            last_tick[0] = now
+            frame_allocs[frame] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+
+        progress_bar.update(1)  # Update the progress bar
+
+    ani = FuncAnimation(fig, update, frames=frame_count, repeat=False)
+
+    # Construct the correct filename prefix based on the ticker type
+    filename_prefix = f"mattyjacks-{ticker_type.lower()}-{ticker}_{start_date}_{end_date}.mp4"
+    ani.save(filename_prefix, writer='ffmpeg', fps=30)
+
+    # Close the progress bar
+    progress_bar.close()
+
+    # Update the UI
+    status = f"Animation saved successfully as {filename_prefix}!"
+    if profile_frames:
+        tracemalloc.stop()
+        status += f" {frame_times[1:].mean() * 1000:.1f} ms/frame, peak {frame_allocs[1:].mean() / 1024:.0f} KiB allocated/frame"
+    status_label.config(text=status)
+
+# Set up the tkinter GUI
+root = tk.Tk()
+root.title("Ticker Animation Generator")
+
+# Calculate default dates
+default_end_date = (datetime.datetime.now() - datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+default_start_date = (datetime.datetime.now() - datetime.timedelta(days=365)).strftime('%Y-%m-%d')
+
+# Ticker type radio buttons
+ticker_type_var = tk.StringVar(value="Stock")
+stock_radio = ttk.Radiobutton(root, text="Stock Ticker", variable=ticker_type_var, value="Stock")
+crypto_radio = ttk.Radiobutton(root, text="Crypto Ticker", variable=ticker_type_var, value="Crypto")
+stock_radio.grid(row=0, column=0, padx=10, pady=10)
+crypto_radio.grid(row=0, column=1, padx=10, pady=10)
+
+# Ticker entry
+ticker_label = ttk.Label(root, text="Ticker Symbol:")
+ticker_label.grid(row=1, column=0, padx=10, pady=10)
+ticker_entry = ttk.Entry(root)
+ticker_entry.grid(row=1, column=1, padx=10, pady=10)
+
+# Start date entry with default value
+start_label = ttk.Label(root, text="Start Date (YYYY-MM-DD):")
+start_label.grid(row=2, column=0, padx=10, pady=10)
+start_entry = ttk.Entry(root)
+start_entry.insert(0, default_start_date)  # Set default start date
+start_entry.grid(row=2, column=1, padx=10, pady=10)
+
+# End date entry with default value
+end_label = ttk.Label(root, text="End Date (YYYY-MM-DD):")
+end_label.grid(row=3, column=0, padx=10, pady=10)
+end_entry = ttk.Entry(root)
+end_entry.insert(0, default_end_date)  # Set default end date
+end_entry.grid(row=3, column=1, padx=10, pady=10)
+
+# Skip Days entry
+skip_days_label = ttk.Label(root, text="Skip Days:")
+skip_days_label.grid(row=4, column=0, padx=10, pady=10)
+skip_days_entry = ttk.Entry(root)
+skip_days_entry.grid(row=4, column=1, padx=10, pady=10)
+
+# Checkboxes for including start and end dates
+include_start_var = tk.BooleanVar(value=True)
+include_start_check = ttk.Checkbutton(root, text="Include Start Date", variable=include_start_var)
+include_start_check.grid(row=5, column=0, padx=10, pady=10)
+
+include_end_var = tk.BooleanVar(value=True)
+include_end_check = ttk.Checkbutton(root, text="Include End Date", variable=include_end_var)
+include_end_check.grid(row=5, column=1, padx=10, pady=10)
+
+# Custom text entry
+custom_text_label = ttk.Label(root, text="Custom Text:")
+custom_text_label.grid(row=6, column=0, padx=10, pady=10)
+custom_text_box = Text(root, height=4, width=40)
+custom_text_box.grid(row=6, column=1, padx=10, pady=10)
+
+# X Ticks Interval entry
+x_ticks_label = ttk.Label(root, text="X Ticks Interval:")
+x_ticks_label.grid(row=7, column=0, padx=10, pady=10)
+x_ticks_entry = ttk.Entry(root)
+x_ticks_entry.grid(row=7, column=1, padx=10, pady=10)
+
+# Y Ticks Interval entry
+y_ticks_label = ttk.Label(root, text="Y Ticks Interval:")
+y_ticks_label.grid(row=8, column=0, padx=10, pady=10)
+y_ticks_entry = ttk.Entry(root)
+y_ticks_entry.grid(row=8, column=1, padx=10, pady=10)
+
+# Chart Height entry
+chart_height_label = ttk.Label(root, text="Chart Height (%):")
+chart_height_label.grid(row=9, column=0, padx=10, pady=10)
+chart_height_entry = ttk.Entry(root)
+chart_height_entry.grid(row=9, column=1, padx=10, pady=10)
+
+# Watermark text entry
+watermark_label = ttk.Label(root, text="Watermark Text:")
+watermark_label.grid(row=10, column=0, padx=10, pady=10)
+watermark_entry = ttk.Entry(root)
+watermark_entry.grid(row=10, column=1, padx=10, pady=10)
+
+# Watermark color entry
+watermark_color_label = ttk.Label(root, text="Watermark Color:")
+watermark_color_label.grid(row=11, column=0, padx=10, pady=10)
+watermark_color_entry = ttk.Entry(root)
+watermark_color_entry.grid(row=11, column=1, padx=10, pady=10)
+
+# Checkbox for cutting initial frames
+cut_initial_frames_var = tk.BooleanVar(value=False)
+cut_initial_frames_check = ttk.Checkbutton(root, text="Cut Initial Frames", variable=cut_initial_frames_var)
+cut_initial_frames_check.grid(row=12, column=0, padx=10, pady=10)
+
+# Checkbox for per-frame timing and allocation stats
+profile_frames_var = tk.BooleanVar(value=False)
+profile_frames_check = ttk.Checkbutton(root, text="Profile Frames", variable=profile_frames_var)
+profile_frames_check.grid(row=12, column=1, padx=10, pady=10)
+
+# Generate button
+generate_button = ttk.Button(root, text="Generate Animation", command=generate_animation)
+generate_button.grid(row=13, column=0, columnspan=2, pady=20)
+
+# Status label
+status_label = ttk.Label(root, text="")
+status_label.grid(row=14, column=0, columnspan=2, pady=10)
+
+# Run the Tkinter main loop
+root.mainloop()
@@ -0,0 +1,1442 @@
+import tkinter as tk
+from tkinter import ttk, Text
+from matplotlib import pyplot as plt
+from matplotlib.animation import FFMpegWriter, AbstractMovieWriter
+import yfinance as yf
+import pandas as pd
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from PIL import Image, ImageDraw, ImageFont, ImageTk, GifImagePlugin
+import moviepy.editor as mpy
+import datetime
+from tqdm import tqdm
+import matplotlib.dates as mdates
+from matplotlib.collections import PathCollection
+from matplotlib.path import Path
+from matplotlib import font_manager, colors as mcolors
+import os
+import sys
+import time
+import contextlib
+import io
+import json
+import hashlib
+import argparse
+import platform
+import subprocess
+import random
+import threading
+import concurrent.futures
+import urllib.parse
+import requests
+from requests.adapters import HTTPAdapter
+import matplotlib
+import tracemalloc
+
+# Helper function to get ordinal day suffix
+def get_ordinal(n):
+    return "%d%s" % (n, "th" if 4 <= n <= 20 or 24 <= n <= 30 else ["st", "nd", "rd"][n % 10 - 1])
+
+# Helper function to format date
+def format_date(date_str):
+    date_obj = datetime.datetime.strptime(date_str, '%Y-%m-%d')
+    month = date_obj.strftime('%B')
+    day = get_ordinal(date_obj.day)
+    year = date_obj.year
+    return f"{month} {day} {year}"
+
+# Helper function to convert a downloaded DataFrame into plain column arrays (timestamps as int64 ns)
+def columns_from_dataframe(data):
+    index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+    columns = {
+        'timestamps': index.values.astype('datetime64[ns]').astype(np.int64),
+        'close': data['Close'].to_numpy(dtype=np.float64).reshape(-1),
+    }
+    for name in ('Open', 'High', 'Low', 'Volume'):
+        if name in data:
+            columns[name.lower()] = data[name].to_numpy(dtype=np.float64).reshape(-1)
+    return columns
+
+# Helper function to build the frame table from int64 nanosecond timestamps and float64 closes. The inputs are kept
+# as they are (memory-mapped windows stay views, strided or not) and only the date numbers the line is drawn from
+# are computed per row; axis limits, label anchors and labels are worked out per chunk of frames at draw time.
+def frame_table_from_arrays(timestamps, prices):
+    return {
+        'timestamps': np.asarray(timestamps, dtype=np.int64),
+        'dates': timestamps * (1 / 86400e9),  # Matplotlib date numbers, days since the default 1970-01-01 epoch
+        'prices': np.asarray(prices, dtype=np.float64),
+    }
+
+# Frames whose axis limits and label anchors are computed together at draw time
+FRAME_CHUNK = 4096
+
+# Helper function to compute the axis limits of frames [start, stop), following the visible part of the series with
+# matplotlib's default 5% margins, and the price label anchor in axes coordinates (0-1), so no data transform is
+# needed per frame. low/high are the running low/high before `start`, scanned from the rows when not given.
+# Candle tables widen the y limits with their 'low'/'high' columns.
+def frame_limits(table, start, stop, low=None, high=None):
+    dates, prices = table['dates'], table['prices']
+    lows, highs = table.get('low', prices), table.get('high', prices)
+    if low is None:
+        low, high = (lows[:start].min(), highs[:start].max()) if start else (np.inf, -np.inf)
+    low = np.minimum(np.minimum.accumulate(lows[start:stop]), low)
+    high = np.maximum(np.maximum.accumulate(highs[start:stop]), high)
+    y_pad = np.where(high > low, (high - low) * 0.05, np.maximum(np.abs(high) * 0.05, 1.0))
+    x_span = dates[start:stop] - dates[0]
+    x_pad = np.where(x_span > 0, x_span * 0.05, 1.0)
+    limits = {'start': start, 'low': low, 'high': high, 'x_min': dates[0] - x_pad, 'x_max': dates[start:stop] + x_pad,
+              'y_min': low - y_pad, 'y_max': high + y_pad}
+    limits['label_x'] = (dates[start:stop] - limits['x_min']) / (limits['x_max'] - limits['x_min'])
+    limits['label_y'] = (prices[start:stop] - limits['y_min']) / (limits['y_max'] - limits['y_min'])
+    return limits
+
+# Function to make a per-frame lookup of frame_limits, computed FRAME_CHUNK frames at a time as the render reaches
+# them. chunk_at(frame) returns (limits of the frame's chunk, frame index in the chunk); the running low/high
+# carries over to the next chunk, so rendering in order reads every row once.
+def make_frame_chunks(table):
+    frame_count = len(table['prices'])
+    current = [None]
+
+    def chunk_at(frame):
+        limits = current[0]
+        if limits is None or not limits['start'] <= frame < limits['start'] + len(limits['x_min']):
+            start = frame - frame % FRAME_CHUNK
+            follows = limits is not None and limits['start'] + len(limits['x_min']) == start
+            carried = (limits['low'][-1], limits['high'][-1]) if follows else (None, None)
+            limits = current[0] = frame_limits(table, start, min(start + FRAME_CHUNK, frame_count), *carried)
+        return limits, frame - limits['start']
+
+    return chunk_at
+
+# Columnar series store: a directory with a small header.json plus one raw little-endian file per column
+# (timestamps as int64 nanoseconds, closes and optional open/high/low/volume as float64). Columns are opened with numpy.memmap, so a render
+# only pages in the rows it reads and parallel workers share those pages through the OS cache.
+STORE_FORMAT = 'ticker-series'
+STORE_VERSION = 1
+STORE_COLUMNS = {'timestamps': '<i8', 'close': '<f8'}
+OPTIONAL_STORE_COLUMNS = ('open', 'high', 'low', 'volume')
+
+# Helper function to read a series store header
+def read_store_header(path):
+    with open(os.path.join(path, 'header.json')) as f:
+        header = json.load(f)
+    if header.get('format') != STORE_FORMAT or header.get('version') != STORE_VERSION:
+        raise ValueError(f"{path} is not a version {STORE_VERSION} series store")
+    return header
+
+# Helper function to write a series store header atomically
+def write_store_header(path, header):
+    with open(os.path.join(path, 'header.json.tmp'), 'w') as f:
+        json.dump(header, f, indent=2)
+    os.replace(os.path.join(path, 'header.json.tmp'), os.path.join(path, 'header.json'))
+
+# Function to create an empty series store, optionally with some of the OPTIONAL_STORE_COLUMNS
+def create_series_store(path, ticker='', extra_columns=()):
+    unknown = set(extra_columns) - set(OPTIONAL_STORE_COLUMNS)
+    if unknown:
+        raise ValueError(f"unknown store columns: {', '.join(sorted(unknown))}")
+    columns = dict(STORE_COLUMNS, **{column: '<f8' for column in OPTIONAL_STORE_COLUMNS if column in extra_columns})
+    os.makedirs(path, exist_ok=True)
+    for column in columns:
+        open(os.path.join(path, f"{column}.bin"), 'wb').close()
+    header = {'format': STORE_FORMAT, 'version': STORE_VERSION, 'ticker': ticker, 'rows': 0, 'columns': columns}
+    write_store_header(path, header)
+    return header
+
+# Function to append rows (int64 ns timestamps, float64 closes, plus the store's extra columns by name)
+# to a series store, timestamps must keep increasing
+def append_series_store(path, timestamps, closes, **extra):
+    header = read_store_header(path)
+    timestamps = np.asarray(timestamps, dtype='<i8')
+    values = {'timestamps': timestamps, 'close': np.asarray(closes, dtype='<f8')}
+    values.update((column, np.asarray(column_values, dtype='<f8')) for column, column_values in extra.items())
+    if set(values) != set(header['columns']):
+        raise ValueError(f"store has columns {', '.join(header['columns'])}, got {', '.join(values)}")
+    for column, column_values in values.items():
+        if len(column_values) != len(timestamps):
+            raise ValueError(f"{len(timestamps)} timestamps but {len(column_values)} {column} values")
+    if not len(timestamps):
+        return header
+    if np.any(np.diff(timestamps) < 0):
+        raise ValueError("timestamps must be sorted")
+    if header['rows']:
+        last = np.fromfile(os.path.join(path, 'timestamps.bin'), dtype='<i8', count=1, offset=(header['rows'] - 1) * 8)[0]
+        if timestamps[0] < last:
+            raise ValueError("appended timestamps start before the end of the store")
+
+    # Column files first, then the row count, so a crash never exposes half-written rows
+    for column, column_values in values.items():
+        with open(os.path.join(path, f"{column}.bin"), 'r+b') as f:
+            f.seek(header['rows'] * 8)
+            column_values.tofile(f)
+    header['rows'] += len(timestamps)
+    write_store_header(path, header)
+    return header
+
+# Function to write a downloaded DataFrame (close plus any OHLC/volume columns) into a new series store
+def save_series_store(data, path, ticker=''):
+    columns = columns_from_dataframe(data)
+    timestamps, closes = columns.pop('timestamps'), columns.pop('close')
+    create_series_store(path, ticker, columns)
+    return append_series_store(path, timestamps, closes, **columns)
+
+# Function to open a series store as read-only memory-mapped columns
+def open_series_store(path):
+    header = read_store_header(path)
+    columns = {}
+    for column, dtype in header['columns'].items():
+        if header['rows']:
+            columns[column] = np.memmap(os.path.join(path, f"{column}.bin"), dtype=dtype, mode='r', shape=(header['rows'],))
+        else:
+            columns[column] = np.zeros(0, dtype=dtype)  # numpy cannot map an empty file
+    return columns
+
+# Function to get a job's date window from a series store, as memory-mapped views only
+def load_store_columns(settings):
+    store = open_series_store(settings['series_store'])
+    timestamps = store['timestamps']
+
+    # Date range by binary search on the mapped timestamps (end date is exclusive, like yf.download)
+    start = np.searchsorted(timestamps, np.datetime64(settings['start_date'], 'ns').astype(np.int64))
+    end = np.searchsorted(timestamps, np.datetime64(settings['end_date'], 'ns').astype(np.int64))
+    return {column: values[start:end] for column, values in store.items()}
+
+# Indicator overlays, computed once over the whole unskipped series with cumulative-sum kernels and sampled
+# per frame. Windows count rows of the underlying series (trading days for daily data), not frames.
+OVERLAY_COLORS = ['orange', 'deepskyblue', 'magenta', 'white']
+
+# Helper function to parse the overlay list, e.g. "SMA 50, SMA 200, BB 20, Volume"
+def parse_overlays(text):
+    overlays = []
+    for item in text.replace(';', ',').split(','):
+        parts = item.upper().split()
+        if not parts:
+            continue
+        if parts[0] == 'VOLUME' and len(parts) == 1:
+            overlays.append('Volume')
+        elif parts[0] in ('SMA', 'MA', 'BB', 'BOLLINGER') and len(parts) == 2 and parts[1].isdigit() and int(parts[1]) > 1:
+            overlays.append(f"{'SMA' if parts[0] in ('SMA', 'MA') else 'BB'} {int(parts[1])}")
+        else:
+            raise ValueError(f"Unknown overlay '{item.strip()}', use e.g. SMA 50, BB 20 or Volume")
+    return overlays
+
+# Helper function to get the frame table key of an overlay ("SMA 50" -> "sma_50")
+def overlay_key(overlay):
+    return overlay.lower().replace(' ', '_')
+
+# Helper function for a rolling mean over the previous `window` rows (nan until the window is full)
+def rolling_mean(values, window):
+    sums = np.cumsum(values, dtype=np.float64)
+    means = np.full(len(values), np.nan)
+    if len(values) >= window:
+        means[window - 1:] = (sums[window - 1:] - np.concatenate(([0.0], sums[:-window]))) / window
+    return means
+
+# Function to compute the requested overlays for every frame, returns extra frame table columns
+def compute_overlays(columns, sample, overlays):
+    closes = columns['close']
+    frame_rows = np.arange(len(closes))[sample]
+    extra = {}
+    for overlay in overlays:
+        key = overlay_key(overlay)
+        if overlay == 'Volume':
+            if 'volume' not in columns:
+                raise ValueError("The Volume overlay needs volume data (re-create the series store from a download)")
+            # Each frame shows the total volume of the rows it covers: after the previous frame's row up to its own
+            volume = np.nan_to_num(np.asarray(columns['volume'], dtype=np.float64))  # Missing volume counts as 0
+            if len(frame_rows):
+                volume = np.add.reduceat(volume[:frame_rows[-1] + 1], np.concatenate(([0], frame_rows[:-1] + 1)))
+            else:
+                volume = np.zeros(0)
+            extra[key] = volume
+            extra[f"{key}_top"] = np.maximum.accumulate(volume) * 4 if len(volume) else volume  # Bars fill the lower quarter
+            continue
+
+        window = int(overlay.split()[1])
+        mean = rolling_mean(closes, window)
+        if overlay.startswith('SMA'):
+            extra[key] = mean[sample]
+        else:
+            # Bollinger bands: mean +/- 2 standard deviations, variance from shifted squares to limit cancellation
+            offset = closes[0] if len(closes) else 0.0
+            shifted = np.asarray(closes, dtype=np.float64) - offset
+            std = np.sqrt(np.maximum(rolling_mean(shifted * shifted, window) - (mean - offset) ** 2, 0))
+            extra[f"{key}_upper"] = (mean + 2 * std)[sample]
+            extra[f"{key}_lower"] = (mean - 2 * std)[sample]
+    return extra
+
+# Glyph atlas: characters are rasterized once per font file and pixel size, labels are composed by copying pixels
+glyph_atlas = {}
+label_box_cache = {}
+font_cache = {}
+ATLAS_CHARS = "0123456789$.,"
+
+# Helper function to find the font file matplotlib would use for the given weight
+def find_font_path(weight='normal'):
+    return font_manager.findfont(font_manager.FontProperties(family=plt.rcParams['font.family'], weight=weight))
+
+# Helper function to get (and cache) a PIL font for a font file and pixel size
+def get_font(font_path, size_px):
+    key = (font_path, size_px)
+    if key not in font_cache:
+        font_cache[key] = ImageFont.truetype(font_path, size_px)
+    return font_cache[key]
+
+# Helper function to get a glyph's coverage mask (uint8, line height x advance) from the atlas
+def get_glyph(char, font_path, size_px):
+    key = (font_path, size_px, char)
+    glyph = glyph_atlas.get(key)
+    if glyph is None:
+        font = get_font(font_path, size_px)
+        ascent, descent = font.getmetrics()
+        mask = Image.new('L', (max(1, int(round(font.getlength(char)))), ascent + descent), 0)
+        ImageDraw.Draw(mask).text((0, 0), char, font=font, fill=255)
+        glyph = glyph_atlas[key] = np.asarray(mask)
+    return glyph
+
+# Helper function to prefill the atlas with the characters used by price labels
+def warm_glyph_atlas(font_path, size_px, chars=ATLAS_CHARS):
+    for char in chars:
+        get_glyph(char, font_path, size_px)
+
+# Helper function to get the rounded label background for a given size, drawn once per width
+def get_label_box(width, height, radius, face_color, edge_color):
+    key = (width, height, radius, face_color, edge_color)
+    box = label_box_cache.get(key)
+    if box is None:
+        img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+        ImageDraw.Draw(img).rounded_rectangle([0, 0, width - 1, height - 1], radius=radius,
+                                              fill=face_color, outline=edge_color, width=1)
+        box = label_box_cache[key] = np.asarray(img)
+    return box
+
+# Helper function to convert a matplotlib color into an 8-bit RGBA tuple
+def to_rgba8(color):
+    return tuple(int(round(c * 255)) for c in mcolors.to_rgba(color))
+
+# Helper function to compose a text label (optionally on a rounded box) from atlas glyphs, returns an RGBA array
+def compose_label(text, font_path, size_px, color, face_color=None, edge_color=None, pad_px=0):
+    glyphs = [get_glyph(char, font_path, size_px) for char in text]
+    text_width = sum(glyph.shape[1] for glyph in glyphs)
+    line_height = glyphs[0].shape[0] if glyphs else 1
+    width, height = text_width + 2 * pad_px, line_height + 2 * pad_px
+    if face_color is not None:
+        image = get_label_box(width, height, pad_px, face_color, edge_color or face_color).copy()
+    else:
+        image = np.zeros((height, width, 4), dtype=np.uint8)
+
+    # Blend each glyph's coverage over the background
+    rgb = np.array(color[:3], dtype=np.float32)
+    x = pad_px
+    for glyph in glyphs:
+        region = image[pad_px:pad_px + line_height, x:x + glyph.shape[1]]
+        coverage = glyph[..., None].astype(np.float32) * (color[3] / (255.0 * 255.0))
+        region[..., :3] = (region[..., :3] * (1 - coverage) + rgb * coverage).astype(np.uint8)
+        region[..., 3] = np.maximum(region[..., 3], (coverage[..., 0] * 255).astype(np.uint8))
+        x += glyph.shape[1]
+    return image
+
+# Output profiles: pixel size and frame rate of each deliverable, rendered side by side from shared frame state
+OUTPUT_PROFILES = {
+    'Classic': {'size': (600, 1000), 'fps': 30, 'suffix': ''},  # Original 6x10in chart, height follows Chart Height (%)
+    'Vertical 9:16': {'size': (1080, 1920), 'fps': 30, 'suffix': '_9x16'},
+    'Square 1:1': {'size': (1080, 1080), 'fps': 30, 'suffix': '_1x1'},
+    'Landscape 16:9': {'size': (1920, 1080), 'fps': 30, 'suffix': '_16x9'},
+}
+
+# Default job settings, used to fill in settings files written by hand
+DEFAULT_SETTINGS = {
+    'ticker_type': 'Stock',
+    'ticker': '',
+    'start_date': (datetime.datetime.now() - datetime.timedelta(days=365)).strftime('%Y-%m-%d'),
+    'end_date': (datetime.datetime.now() - datetime.timedelta(days=1)).strftime('%Y-%m-%d'),
+    'skip_days': 0,
+    'include_start_date': True,
+    'include_end_date': True,
+    'custom_text': '',
+    'x_ticks_interval': 1,
+    'y_ticks_interval': 10,
+    'chart_height_pct': 1.0,
+    'watermark_text': '',
+    'watermark_color': 'white',
+    'cut_initial_frames': False,
+    'profile_frames': False,
+    'output_profiles': ['Classic'],
+    'series_store': '',
+    'overlays': [],
+    'chart_style': 'Line',
+    'intro_hold': 0.0,
+    'outro_hold': 0.0,
+    'pauses': [],
+    'output_format': 'MP4',
+}
+
+# Function to read the job settings from the GUI
+def read_settings():
+    return {
+        'ticker_type': ticker_type_var.get(),
+        'ticker': ticker_entry.get().upper(),
+        'start_date': start_entry.get(),
+        'end_date': end_entry.get(),
+        'skip_days': int(skip_days_entry.get() or 0),
+        'include_start_date': include_start_var.get(),
+        'include_end_date': include_end_var.get(),
+        'custom_text': custom_text_box.get("1.0", tk.END).strip(),
+        'x_ticks_interval': int(x_ticks_entry.get() or 1),
+        'y_ticks_interval': int(y_ticks_entry.get() or 10),
+        'chart_height_pct': int(chart_height_entry.get() or 100) / 100,
+        'watermark_text': watermark_entry.get(),
+        'watermark_color': watermark_color_entry.get(),
+        'cut_initial_frames': cut_initial_frames_var.get(),
+        'profile_frames': profile_frames_var.get(),
+        'output_profiles': [name for name, var in output_profile_vars.items() if var.get()] or ['Classic'],
+        'series_store': series_store_entry.get().strip(),
+        'overlays': parse_overlays(overlays_entry.get()),
+        'chart_style': chart_style_var.get(),
+        'intro_hold': parse_seconds(intro_hold_entry.get(), "Intro hold"),
+        'outro_hold': parse_seconds(outro_hold_entry.get(), "Outro hold"),
+        'pauses': parse_pauses(pauses_entry.get()),
+        'output_format': output_format_var.get(),
+    }
+
+# Function to fetch the stock/crypto data for a job
+def download_series(settings):
+    return yf.download(settings['ticker'], start=settings['start_date'], end=settings['end_date'])
+
+# Function to build the frame table for a job, from the series store if one is set, otherwise from yfinance
+def load_frame_table(settings):
+    if settings.get('series_store'):
+        columns = load_store_columns(settings)
+    else:
+        columns = columns_from_dataframe(download_series(settings))
+
+    # Apply skip days (every skip+1th row), and cut out the first skip+1 frames if selected
+    step = settings['skip_days'] + 1
+    sample = slice(step * step if settings['cut_initial_frames'] else 0, None, step)
+    if settings.get('chart_style') == 'Candlestick':
+        table = candle_frame_table(columns, sample)
+    else:
+        table = frame_table_from_arrays(columns['timestamps'][sample], columns['close'][sample])
+    table.update(compute_overlays(columns, sample, settings.get('overlays', [])))
+    return table
+
+# Function to build the frame table for candlestick mode: each frame is one candle covering the rows it
+# stands for (open of the first row, highest high, lowest low, close of the last row)
+def candle_frame_table(columns, sample):
+    missing = [column for column in ('open', 'high', 'low') if column not in columns]
+    if missing:
+        raise ValueError(f"Candlestick charts need {', '.join(missing)} data (re-create the series store from a download)")
+    closes = columns['close']
+    starts = np.arange(len(closes))[sample]
+    if not len(starts):
+        raise ValueError("No data in the selected date range")
+    ends = np.append(starts[1:], len(closes)) - 1
+    opens = np.asarray(columns['open'][starts], dtype=np.float64)
+    highs = np.maximum.reduceat(np.asarray(columns['high'], dtype=np.float64), starts)
+    lows = np.minimum.reduceat(np.asarray(columns['low'], dtype=np.float64), starts)
+    table = frame_table_from_arrays(columns['timestamps'][starts], closes[ends])
+    table.update(open=opens, high=highs, low=lows)
+    return table
+
+# Function to pre-build the candle geometry for the whole series: one compound body path per color
+# (5 vertices per candle) and NaN-separated wick segments (3 points per candle)
+def build_candle_geometry(table):
+    dates = table['dates']
+    opens, closes, highs, lows = table['open'], table['prices'], table['high'], table['low']
+    spacing = np.diff(dates)
+    width = 0.7 * (np.min(spacing[spacing > 0]) if np.any(spacing > 0) else 1.0)
+    left, right = dates - width / 2, dates + width / 2
+    bottom, top = np.minimum(opens, closes), np.maximum(opens, closes)
+
+    body_verts = np.stack([np.column_stack([left, bottom]), np.column_stack([right, bottom]),
+                           np.column_stack([right, top]), np.column_stack([left, top]),
+                           np.column_stack([left, bottom])], axis=1)
+    body_codes = np.tile([Path.MOVETO, Path.LINETO, Path.LINETO, Path.LINETO, Path.CLOSEPOLY], len(dates)).astype(Path.code_type)
+    rising = closes >= opens
+    geometry = {}
+    for name, mask in (('up', rising), ('down', ~rising)):
+        geometry[f"{name}_verts"] = np.ascontiguousarray(body_verts[mask].reshape(-1, 2))
+        geometry[f"{name}_codes"] = body_codes[:mask.sum() * 5]
+        geometry[f"{name}_count"] = np.cumsum(mask)  # Candles of this color shown up to each frame
+
+    wick_x = np.repeat(dates, 3)
+    wick_x[2::3] = np.nan
+    geometry['wick_x'] = wick_x
+    geometry['wick_y'] = np.column_stack([lows, highs, np.full(len(dates), np.nan)]).ravel()
+    return geometry
+
+# Helper function to get this process's peak resident memory in MiB (None where unsupported)
+def peak_rss_mib():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024  # Bytes on macOS, KiB on Linux
+
+# Output file formats and their extensions
+OUTPUT_FORMATS = {'MP4': '.mp4', 'GIF': '.gif', 'WebP': '.webp'}
+
+# Helper function to build the output filename for a profile
+def output_filename(settings, profile_name):
+    suffix = OUTPUT_PROFILES[profile_name]['suffix']
+    extension = OUTPUT_FORMATS[settings.get('output_format', 'MP4')]
+    return f"mattyjacks-{settings['ticker_type'].lower()}-{settings['ticker']}_{settings['start_date']}_{settings['end_date']}{suffix}{extension}"
+
+# Function to build one output's figure and return it with its per-frame draw function
+def setup_chart(settings, table, profile_name):
+    ticker_type = settings['ticker_type']
+    ticker = settings['ticker']
+    profile = OUTPUT_PROFILES[profile_name]
+    width_px, height_px = profile['size']
+    if profile_name == 'Classic':
+        height_px = int(height_px * settings['chart_height_pct'])  # Adjustable chart height
+    dpi = min(profile['size']) / 6  # Shorter side is always 6in, so fonts keep the same relative size
+
+    dates = table['dates']
+    prices = table['prices']
+    chunk_at = make_frame_chunks(table)
+
+    # Format the start and end dates
+    formatted_start_date = format_date(settings['start_date'])
+    formatted_end_date = format_date(settings['end_date'])
+
+    # Generate animation using Matplotlib
+    fig, ax = plt.subplots(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
+    fig.patch.set_facecolor('black')
+    ax.set_facecolor('black')
+    ax.set_title(f'{ticker_type} Ticker: {ticker}', fontsize=16, color='white', pad=30)
+    ax.set_xlabel('Date', color='white')
+    ax.set_ylabel('Price', color='white')
+
+    # Fonts for atlas-rendered text, sized in output pixels
+    regular_font = find_font_path()
+    bold_font = find_font_path('bold')
+    header_size_px = int(round(12 * fig.dpi / 72))
+    label_size_px = int(round(14 * fig.dpi / 72))
+    label_pad_px = int(round(0.5 * label_size_px))  # Same as boxstyle 'round,pad=0.5'
+    warm_glyph_atlas(bold_font, label_size_px)
+
+    # Display start and end dates at the top, composed once from the glyph atlas
+    header_lines = []
+    if settings['include_start_date']:
+        header_lines.append((0.95, f"Start Date: {formatted_start_date}"))
+    if settings['include_end_date']:
+        header_lines.append((0.92, f"End Date: {formatted_end_date}"))
+    for y_frac, header_text in header_lines:
+        header_img = compose_label(header_text, regular_font, header_size_px, to_rgba8('white'))
+        fig.figimage(header_img, xo=int(fig.bbox.width / 2 - header_img.shape[1] / 2),
+                     yo=int(fig.bbox.height * y_frac - header_img.shape[0] / 2), origin='upper')
+    
+    # Display custom text if provided
+    if settings['custom_text']:
+        fig.text(0.5, 0.89, settings['custom_text'], ha='center', va='center', color='white', fontsize=12)
+
+    # Display watermark if provided
+    if settings['watermark_text']:
+        fig.text(0.5, 0.5, settings['watermark_text'], ha='center', va='center', color=settings['watermark_color'], fontsize=40, alpha=0.5)
+
+    # Load the logo based on ticker type
+    logo_folder = "Logos/Stocks" if ticker_type == "Stock" else "Logos/Crypto"
+    logo_file = f"{ticker.lower()}.png"
+
+    # Special case for Saudi Aramco and Ripple
+    if ticker == "2222.SR":  # Saudi Aramco ticker
+        logo_file = "saudiaramco.png"
+    elif ticker == "XRP-USD":  # Ripple ticker
+        logo_file = "Ripple.png"
+
+    logo_path = os.path.join(logo_folder, logo_file)
+
+    # Check if the logo file exists
+    if os.path.exists(logo_path):
+        logo_width = int(500 * fig.dpi / 100)  # 500px at the classic 100 dpi
+        logo_img = Image.open(logo_path)
+        logo_img = logo_img.resize((logo_width, int(logo_img.height * (logo_width / logo_img.width))), Image.ANTIALIAS)
+
+        # Display the logo below the chart
+        fig.figimage(logo_img, xo=fig.bbox.xmax // 2 - logo_width // 2, yo=fig.bbox.ymin + 20)  # Position below chart
+    
+    # Persistent artists, only their data changes per frame
+    candles = settings.get('chart_style') == 'Candlestick'
+    line, = ax.plot([], [], color='green', visible=not candles)
+    if candles:
+        # Candle bodies are one compound path per color, each frame shows a longer prefix of the same arrays
+        geometry = build_candle_geometry(table)
+        wick_line, = ax.plot([], [], color='white', linewidth=0.8, zorder=1)
+        candle_bodies = {}
+        for name, color in (('up', 'green'), ('down', 'red')):
+            candle_bodies[name] = PathCollection([], facecolors=color, edgecolors=color, linewidths=0.5, transform=ax.transData, zorder=2)
+            ax.add_collection(candle_bodies[name], autolim=False)
+    price_label = fig.figimage(np.zeros((1, 1, 4), dtype=np.uint8), origin='upper', zorder=3)
+    label_color = to_rgba8('black')
+    label_face, label_edge = to_rgba8('yellow'), to_rgba8('white')
+
+    # Price label anchor in figure pixels (right edge, vertical center)
+    ax_x0, ax_y0, ax_width, ax_height = ax.bbox.bounds
+
+    # Indicator overlays: persistent lines over precomputed arrays (x, y, points per frame), each frame only grows the slice
+    overlay_lines = []
+    volume_axis = None
+    colors = iter(OVERLAY_COLORS * 4)
+    for overlay in settings.get('overlays', []):
+        key = overlay_key(overlay)
+        if overlay == 'Volume':
+            # Bars as NaN-separated vertical segments of one line, on a hidden twin axis under the price line
+            volume_axis = ax.twinx()
+            volume_axis.set_yticks([])
+            ax.set_zorder(volume_axis.get_zorder() + 1)  # Keep the price line on top of the bars
+            ax.patch.set_visible(False)
+            volume_top = table[f"{key}_top"]
+            volume_x = np.repeat(dates, 3)
+            volume_y = np.column_stack([np.zeros(len(dates)), table[key], np.full(len(dates), np.nan)]).ravel()
+            volume_x[2::3] = np.nan
+            volume_line, = volume_axis.plot([], [], color='gray', alpha=0.6, linewidth=2, solid_capstyle='butt')
+            overlay_lines.append((volume_line, volume_x, volume_y, 3))
+        elif overlay.startswith('SMA'):
+            sma_line, = ax.plot([], [], color=next(colors), linewidth=1.2, label=overlay)
+            overlay_lines.append((sma_line, dates, table[key], 1))
+        else:
+            band_color = next(colors)
+            upper_line, = ax.plot([], [], color=band_color, linewidth=0.8, linestyle='--', label=overlay)
+            lower_line, = ax.plot([], [], color=band_color, linewidth=0.8, linestyle='--')
+            overlay_lines.append((upper_line, dates, table[f"{key}_upper"], 1))
+            overlay_lines.append((lower_line, dates, table[f"{key}_lower"], 1))
+    if any(overlay != 'Volume' for overlay in settings.get('overlays', [])):
+        ax.legend(loc='upper left', fontsize=9, facecolor='black', edgecolor='gray', labelcolor='white')
+
+    # Set the x-axis date format and y-axis tick interval once
+    ax.xaxis.set_major_locator(mdates.MonthLocator(interval=settings['x_ticks_interval']))  # Configurable date interval
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    ax.yaxis.set_major_locator(plt.MultipleLocator(settings['y_ticks_interval']))  # Configurable y-axis interval
+    ax.tick_params(axis='x', colors='white')
+    ax.tick_params(axis='y', colors='white')
+
+    def draw_frame(frame):
+        if candles:
+            wick_line.set_data(geometry['wick_x'][:(frame + 1) * 3], geometry['wick_y'][:(frame + 1) * 3])
+            for name, bodies in candle_bodies.items():
+                points = geometry[f"{name}_count"][frame] * 5
+                bodies.set_paths([Path(geometry[f"{name}_verts"][:points], geometry[f"{name}_codes"][:points])] if points else [])
+        else:
+            line.set_data(dates[:frame + 1], prices[:frame + 1])
+        limits, i = chunk_at(frame)
+        ax.set_xlim(limits['x_min'][i], limits['x_max'][i])
+        ax.set_ylim(limits['y_min'][i], limits['y_max'][i])
+        for overlay_line, overlay_x, overlay_y, points in overlay_lines:
+            overlay_line.set_data(overlay_x[:(frame + 1) * points], overlay_y[:(frame + 1) * points])
+        if volume_axis is not None:
+            volume_axis.set_ylim(0, volume_top[frame] or 1)
+
+        # Display the current stock price next to the line, composed from cached glyphs
+        label_img = compose_label(f"${prices[frame]:.2f}", bold_font, label_size_px, label_color,
+                                  label_face, label_edge, label_pad_px)
+        price_label.set_data(label_img)
+        price_label.ox = int(round(ax_x0 + limits['label_x'][i] * ax_width)) - label_img.shape[1]
+        price_label.oy = int(round(ax_y0 + limits['label_y'][i] * ax_height)) - label_img.shape[0] // 2
+
+    return fig, draw_frame
+
+# Helper function to rasterize a figure to an RGBA array at the given dpi
+def rasterize(fig, dpi):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='rgba', dpi=dpi)
+    width, height = fig.get_size_inches()
+    return np.frombuffer(buffer.getbuffer(), dtype=np.uint8).reshape(int(round(height * dpi)), int(round(width * dpi)), 4)
+
+# Function to build one palette for a whole clip from its first and last frames (the last frame has the
+# full line, every overlay, the label, title and logo; earlier frames only use the same colors)
+def build_clip_palette(fig, draw_frame, frames, dpi, colors=255):
+    samples = []
+    for frame in (frames[-1], frames[0]):
+        draw_frame(frame)
+        samples.append(rasterize(fig, dpi)[..., :3].reshape(-1, 3))
+    pixels = np.concatenate(samples)
+    quantized = Image.fromarray(pixels.reshape(1, -1, 3)).quantize(colors=colors, method=Image.MEDIANCUT)
+    palette = np.zeros((colors, 3), dtype=np.uint8)
+    used = np.array(quantized.getpalette()[:colors * 3], dtype=np.uint8).reshape(-1, 3)
+    palette[:len(used)] = used
+    return palette
+
+# Helper function to map every 5-bit-per-channel RGB cell to its nearest palette index, done once per clip
+def palette_lookup(palette):
+    levels = np.arange(32, dtype=np.float32) * 8 + 4
+    cells = np.stack(np.meshgrid(levels, levels, levels, indexing='ij'), axis=-1).reshape(-1, 3)
+    colors = palette.astype(np.float32)
+    lookup = np.empty(len(cells), dtype=np.uint8)
+    for start in range(0, len(cells), 4096):
+        distances = ((cells[start:start + 4096, None, :] - colors[None, :, :]) ** 2).sum(axis=-1)
+        lookup[start:start + 4096] = distances.argmin(axis=1)
+    return lookup
+
+# Animated GIF writer (a matplotlib movie writer): one global palette for the whole clip, frames quantized with
+# a NumPy lookup table, and only the rectangle that changed since the previous frame stored, with unchanged
+# pixels inside it left transparent. Identical frames and holds just lengthen the previous frame's delay.
+class PaletteGifWriter(AbstractMovieWriter):
+    TRANSPARENT = 255  # Palette index reserved for "keep the previous pixel"
+
+    def __init__(self, fps=30, palette=None):
+        super().__init__(fps=fps)
+        self.palette = palette
+
+    def setup(self, fig, outfile, dpi=None):
+        super().setup(fig, outfile, dpi)
+        self.lookup = palette_lookup(self.palette)
+        self.previous = None
+        self.pending = None
+        self.clock = 0  # Frames of output time written or pending
+        self.pending_start = 0
+
+        # Header, global color table (index 255 stays black) and NETSCAPE2.0 loop-forever extension
+        width, height = self.frame_size
+        color_table = np.zeros((256, 3), dtype=np.uint8)
+        color_table[:len(self.palette)] = self.palette
+        self.file = open(outfile, 'wb')
+        self.file.write(b'GIF89a' + width.to_bytes(2, 'little') + height.to_bytes(2, 'little') + bytes([0xF7, 0, 0]))
+        self.file.write(color_table.tobytes())
+        self.file.write(b'!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00')
+
+    def grab_frame(self, repeats=1, **savefig_kwargs):
+        rgba = rasterize(self.fig, self.dpi)
+        keys = ((rgba[..., 0].astype(np.uint32) >> 3) << 10) | ((rgba[..., 1].astype(np.uint32) >> 3) << 5) | (rgba[..., 2] >> 3)
+        indexed = self.lookup[keys]
+
+        if self.previous is None:
+            top, bottom, left, right = 0, indexed.shape[0], 0, indexed.shape[1]
+            rect = indexed
+        else:
+            changed = indexed != self.previous
+            rows, cols = np.flatnonzero(changed.any(axis=1)), np.flatnonzero(changed.any(axis=0))
+            if not len(rows):
+                self.clock += repeats
+                return
+            top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+            rect = np.where(changed[top:bottom, left:right], indexed[top:bottom, left:right], self.TRANSPARENT).astype(np.uint8)
+
+        self.flush_pending()
+        self.pending = (Image.frombytes('P', (right - left, bottom - top), np.ascontiguousarray(rect).tobytes()), (int(left), int(top)))
+        self.pending_start = self.clock
+        self.clock += repeats
+        self.previous = indexed
+
+    def flush_pending(self):
+        if self.pending is None:
+            return
+        # Delays in hundredths of a second, rounded on the running clock so they never drift
+        start = round(self.pending_start * 100 / self.fps)
+        end = round(self.clock * 100 / self.fps)
+        image, offset = self.pending
+        for chunk in GifImagePlugin.getdata(image, offset, duration=max(end - start, 2) * 10, disposal=1, transparency=self.TRANSPARENT):
+            self.file.write(chunk)
+        self.pending = None
+
+    def finish(self):
+        self.flush_pending()
+        self.file.write(b';')
+        self.file.close()
+
+# Helper function to make the movie writer for an output format
+def make_writer(output_format, fps):
+    if output_format == 'GIF':
+        return PaletteGifWriter(fps=fps)
+    if output_format == 'WebP':
+        return FFMpegWriter(fps=fps, codec='libwebp_anim', extra_args=['-loop', '0', '-quality', '80'])
+    return FFMpegWriter(fps=fps)
+
+# Helper function to parse pause directives, e.g. "2023-06-01 1.5, 2024-01-02 1" -> [['2023-06-01', 1.5], ...]
+def parse_pauses(text):
+    pauses = []
+    for item in text.replace(';', ',').split(','):
+        parts = item.split()
+        if not parts:
+            continue
+        try:
+            datetime.datetime.strptime(parts[0], '%Y-%m-%d')
+            seconds = float(parts[1]) if len(parts) > 1 else 1.0
+        except (ValueError, IndexError):
+            raise ValueError(f"Bad pause '{item.strip()}', use YYYY-MM-DD seconds")
+        pauses.append([parts[0], parse_seconds(seconds, f"Pause on {parts[0]}")])
+    return pauses
+
+# Helper function to check a hold length in seconds (empty = 0), a negative hold would drop frames instead
+def parse_seconds(value, name):
+    seconds = float(value or 0)
+    if not seconds >= 0:
+        raise ValueError(f"{name} must be 0 or more seconds, got {value!r}")
+    return seconds
+
+# Function to work out the timeline directives as extra seconds to hold on each frame
+# (intro hold on the first frame, outro hold on the last, pauses on the first frame at or after their date)
+def timeline_holds(settings, table):
+    timestamps = table['timestamps']
+    holds = np.zeros(len(timestamps))
+    if len(holds):
+        holds[0] += settings.get('intro_hold', 0)
+        holds[-1] += settings.get('outro_hold', 0)
+        for date, seconds in settings.get('pauses', []):
+            frame = np.searchsorted(timestamps, np.datetime64(date, 'ns').astype(np.int64))
+            if frame < len(holds):
+                holds[frame] += seconds
+    return holds
+
+# Helper function to get the stdin pipe of an FFMpegWriter's ffmpeg process. matplotlib keeps the process in the
+# private _proc attribute, so this returns None when it isn't there and callers fall back to writer.grab_frame()
+def ffmpeg_stdin(writer):
+    return getattr(getattr(writer, '_proc', None), 'stdin', None)
+
+# Helper function to grab a frame and write it `repeats` times: the figure is drawn once and the same
+# pixels are piped to ffmpeg again, so holds cost no extra draw calls
+def grab_frame_repeated(writer, repeats):
+    if isinstance(writer, PaletteGifWriter):
+        writer.grab_frame(repeats=repeats)  # GIF holds are just a longer frame delay
+        return
+    stdin = ffmpeg_stdin(writer)
+    if repeats == 1 or stdin is None:
+        for _ in range(repeats):
+            writer.grab_frame()
+        return
+    buffer = io.BytesIO()
+    writer.fig.savefig(buffer, format=writer.frame_format, dpi=writer.dpi)
+    frame_bytes = buffer.getbuffer()
+    for _ in range(repeats):
+        stdin.write(frame_bytes)
+
+# Function to render every requested output profile in one pass over the shared frame state
+# (optionally only a range of frames into given filenames, as used by shard workers)
+def render_job(settings, table=None, frames=None, filenames=None):
+    # Precompute everything the render loop needs as plain arrays, shared by all outputs
+    if table is None:
+        table = load_frame_table(settings)
+    frames = range(len(table['prices'])) if frames is None else frames
+    frame_count = len(frames)
+    profile_frames = settings['profile_frames']
+    holds = timeline_holds(settings, table)
+
+    # One figure and one ffmpeg encoder per output profile, with each frame's repeat count at that profile's fps
+    outputs = []
+    for profile_name in settings['output_profiles']:
+        fig, draw_frame = setup_chart(settings, table, profile_name)
+        fps = OUTPUT_PROFILES[profile_name]['fps']
+        writer = make_writer(settings.get('output_format', 'MP4'), fps)
+        if isinstance(writer, PaletteGifWriter) and frame_count:
+            writer.palette = build_clip_palette(fig, draw_frame, frames, fig.dpi)
+        filename = filenames[profile_name] if filenames else output_filename(settings, profile_name)
+        outputs.append((fig, draw_frame, writer, filename, 1 + np.round(holds * fps).astype(np.int64)))
+
+    # Per-frame wall time (all outputs together) and peak allocated bytes, filled in when profiling
+    frame_times = np.zeros(frame_count)
+    frame_allocs = np.zeros(frame_count)
+    if profile_frames:
+        tracemalloc.start()
+
+    # Create a progress bar
+    progress_bar = tqdm(total=frame_count, desc="Generating Animation", unit="frames")
+
+    with contextlib.ExitStack() as stack:
+        for fig, draw_frame, writer, filename, repeats in outputs:
+            stack.enter_context(writer.saving(fig, filename, fig.dpi))
+
+        for i, frame in enumerate(frames):
+            frame_start = time.perf_counter()
+            for fig, draw_frame, writer, filename, repeats in outputs:
+                draw_frame(frame)
+                grab_frame_repeated(writer, repeats[frame])
+
+            if profile_frames:
+                frame_times[i] = time.perf_counter() - frame_start
+                frame_allocs[i] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.reset_peak()
+
+            progress_bar.update(1)  # Update the progress bar
+
+    # Close the progress bar and the figures
+    progress_bar.close()
+    for fig, draw_frame, writer, filename, repeats in outputs:
+        plt.close(fig)
+
+    stats = None
+    if profile_frames:
+        tracemalloc.stop()
+        stats = {'ms_per_frame': frame_times.mean() * 1000, 'kib_per_frame': frame_allocs.mean() / 1024, 'peak_rss_mib': peak_rss_mib()}
+    return [filename for fig, draw_frame, writer, filename, repeats in outputs], stats
+
+# Function to generate the animation
+def generate_animation():
+    filenames, stats = render_job(read_settings())
+
+    # Update the UI
+    status = f"Animation saved successfully as {', '.join(filenames)}!"
+    if stats:
+        status += f" {stats['ms_per_frame']:.1f} ms/frame, peak {stats['kib_per_frame']:.0f} KiB allocated/frame"
+        if stats['peak_rss_mib'] is not None:
+            status += f", peak RSS {stats['peak_rss_mib']:.0f} MiB"
+    status_label.config(text=status)
+
+# Sharded rendering: a job directory holds manifest.json, the frame table and the rendered segments.
+# Hosts only coordinate through that directory (lock files for claiming shards, JSON markers when done).
+MANIFEST_VERSION = 1
+
+# Helper function to get the paths used inside a job directory
+def shard_paths(job_dir, index):
+    base = os.path.join(job_dir, 'segments', f"shard_{index:05d}")
+    return {'lock': base + '.lock', 'done': base + '.json', 'base': base}
+
+# Helper function to hash the frame table contents, so a manifest changes whenever the data does
+def table_digest(table):
+    digest = hashlib.sha256()
+    for key in sorted(table):
+        digest.update(key.encode())
+        digest.update(np.ascontiguousarray(table[key]).tobytes())
+    return digest.hexdigest()
+
+# Function to fetch the data once and write a manifest of frame-range shards into a job directory
+def write_manifest(settings, job_dir, frames_per_shard=300):
+    if settings.get('output_format', 'MP4') != 'MP4':
+        raise ValueError("Sharded rendering only supports MP4 output (segments are joined by stream copy)")
+    table = load_frame_table(settings)
+    frame_count = len(table['prices'])
+    shards = [{'index': i, 'start': start, 'end': min(start + frames_per_shard, frame_count)}
+              for i, start in enumerate(range(0, frame_count, frames_per_shard))]
+
+    # The content hash covers the settings, the shard layout and the data, never paths or times
+    content = {'version': MANIFEST_VERSION, 'settings': settings, 'frame_count': frame_count,
+               'shards': shards, 'data': table_digest(table)}
+    job_hash = hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+    os.makedirs(os.path.join(job_dir, 'segments'), exist_ok=True)
+    os.makedirs(os.path.join(job_dir, 'frames'), exist_ok=True)
+    for key, values in table.items():
+        np.save(os.path.join(job_dir, 'frames', f"{key}.npy"), values)
+    manifest = dict(content, hash=job_hash, outputs={name: output_filename(settings, name) for name in settings['output_profiles']})
+    with open(os.path.join(job_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+# Helper function to load a job directory's manifest and memory-mapped frame table, checking the data is the one hashed
+def load_job(job_dir):
+    with open(os.path.join(job_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    frames_dir = os.path.join(job_dir, 'frames')
+    table = {name[:-4]: np.load(os.path.join(frames_dir, name), mmap_mode='r', allow_pickle=False)
+             for name in os.listdir(frames_dir) if name.endswith('.npy')}
+    if table_digest(table) != manifest['data']:
+        raise ValueError(f"{job_dir}: frame table does not match the manifest")
+    return manifest, table
+
+# Shard locks hold the owner's host, pid and start time. A worker touches its lock every LOCK_HEARTBEAT seconds
+# while rendering, so a lock whose worker was killed goes stale and another worker may take the shard over.
+LOCK_TIMEOUT = 600
+LOCK_HEARTBEAT = 60
+
+# Helper function to get this machine's host name, as written into shard locks
+def host_name():
+    return os.uname().nodename if hasattr(os, 'uname') else ''
+
+# Helper function to read a shard's lock (host, pid, started, seconds since the last heartbeat), None if unclaimed
+def read_shard_lock(job_dir, index):
+    path = shard_paths(job_dir, index)['lock']
+    try:
+        age = time.time() - os.path.getmtime(path)
+        with open(path) as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None
+    try:
+        lock = json.loads(text)
+    except ValueError:  # Half-written lock
+        lock = {}
+    return dict(lock, age=age, text=text)
+
+# Helper function to tell whether a lock's worker is gone: no heartbeat for `timeout` seconds, or its process
+# no longer exists on this host
+def lock_is_stale(lock, timeout=LOCK_TIMEOUT):
+    if lock['age'] > timeout:
+        return True
+    if hasattr(os, 'uname') and lock.get('host') == host_name() and lock.get('pid'):
+        try:
+            os.kill(lock['pid'], 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass  # Alive, owned by another user
+    return False
+
+# Helper function to claim a shard by creating its lock file, fails if another worker holds a live lock on it.
+# A stale lock is first renamed aside, which only one of several workers racing for it can do.
+def claim_shard(job_dir, index, timeout=LOCK_TIMEOUT):
+    path = shard_paths(job_dir, index)['lock']
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        lock = read_shard_lock(job_dir, index)
+        if lock is not None:
+            if not lock_is_stale(lock, timeout):
+                return False
+            stale_path = f"{path}.stale-{host_name()}-{os.getpid()}"
+            try:
+                os.rename(path, stale_path)
+            except FileNotFoundError:
+                return False  # Another worker moved it first
+            with open(stale_path) as f:
+                moved = f.read()
+            if moved != lock['text']:
+                # A fresh lock was created between reading and renaming, put it back
+                with contextlib.suppress(FileExistsError):
+                    os.link(stale_path, path)
+                os.remove(stale_path)
+                return False
+            os.remove(stale_path)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'host': host_name(), 'pid': os.getpid(), 'started': time.time()}, f)
+    return True
+
+# Context manager that touches a claimed shard's lock every LOCK_HEARTBEAT seconds while its shard renders
+@contextlib.contextmanager
+def shard_heartbeat(job_dir, index):
+    path = shard_paths(job_dir, index)['lock']
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(LOCK_HEARTBEAT):
+            with contextlib.suppress(OSError):
+                os.utime(path)
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+# Function to render one shard into encoded segments (one per output profile)
+def render_shard(job_dir, manifest, table, index):
+    shard = manifest['shards'][index]
+    paths = shard_paths(job_dir, index)
+    settings = dict(manifest['settings'], profile_frames=False)
+    partial = {name: f"{paths['base']}{OUTPUT_PROFILES[name]['suffix']}.partial.mp4" for name in settings['output_profiles']}
+    render_job(settings, table, range(shard['start'], shard['end']), partial)
+
+    # Move the finished segments into place, then write the done marker last
+    segments = {}
+    for name, partial_file in partial.items():
+        segments[name] = os.path.basename(partial_file.replace('.partial.mp4', '.mp4'))
+        os.replace(partial_file, os.path.join(job_dir, 'segments', segments[name]))
+    with open(paths['done'] + '.tmp', 'w') as f:
+        json.dump({'hash': manifest['hash'], 'index': index, 'frames': shard['end'] - shard['start'], 'segments': segments}, f)
+    os.replace(paths['done'] + '.tmp', paths['done'])
+
+# Function to render shards of a job: the given one, or keep claiming free shards (and shards whose lock went
+# stale after `timeout` seconds) until none are left
+def run_worker(job_dir, index=None, timeout=LOCK_TIMEOUT):
+    manifest, table = load_job(job_dir)
+    if index is not None:
+        render_shard(job_dir, manifest, table, index)
+        return [index]
+
+    rendered = []
+    for shard in manifest['shards']:
+        if os.path.exists(shard_paths(job_dir, shard['index'])['done']) or not claim_shard(job_dir, shard['index'], timeout):
+            continue
+        with shard_heartbeat(job_dir, shard['index']):
+            render_shard(job_dir, manifest, table, shard['index'])
+        rendered.append(shard['index'])
+    return rendered
+
+# Function to check every shard is done for this manifest, then losslessly concatenate the segments
+def merge_job(job_dir, output_dir='.'):
+    manifest, table = load_job(job_dir)
+    problems = []
+    markers = []
+    for shard in manifest['shards']:
+        done_path = shard_paths(job_dir, shard['index'])['done']
+        if not os.path.exists(done_path):
+            lock = read_shard_lock(job_dir, shard['index'])
+            if lock is None:
+                state = "not claimed"
+            else:
+                state = (f"claimed by {lock.get('host') or '?'}:{lock.get('pid') or '?'}, last heartbeat {lock['age']:.0f} s ago"
+                         f"{', stale: run a worker to take it over' if lock_is_stale(lock) else ''}")
+            problems.append(f"shard {shard['index']} is not rendered ({state})")
+            continue
+        with open(done_path) as f:
+            marker = json.load(f)
+        if marker['hash'] != manifest['hash']:
+            problems.append(f"shard {shard['index']} was rendered for a different manifest")
+        elif marker['frames'] != shard['end'] - shard['start']:
+            problems.append(f"shard {shard['index']} has {marker['frames']} frames, expected {shard['end'] - shard['start']}")
+        for segment in marker['segments'].values():
+            if not os.path.getsize(os.path.join(job_dir, 'segments', segment)):
+                problems.append(f"segment {segment} is empty")
+        markers.append(marker)
+    if problems:
+        raise ValueError(f"{job_dir}: cannot merge, " + "; ".join(problems))
+
+    # Stream-copy the segments with ffmpeg's concat demuxer, no re-encode
+    outputs = []
+    for name, filename in manifest['outputs'].items():
+        list_path = os.path.join(job_dir, f"concat{OUTPUT_PROFILES[name]['suffix']}.txt")
+        with open(list_path, 'w') as f:
+            for marker in markers:
+                f.write(f"file '{os.path.abspath(os.path.join(job_dir, 'segments', marker['segments'][name]))}'\n")
+        output_path = os.path.join(output_dir, filename)
+        subprocess.run([matplotlib.rcParams['animation.ffmpeg_path'], '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                        '-i', list_path, '-c', 'copy', output_path], check=True)
+        outputs.append(output_path)
+    return outputs
+
+# Bulk prefetch: download many tickers concurrently into series stores before any rendering starts.
+# Talks to Yahoo's chart API over one pooled keep-alive session; base_url can point at any server
+# answering with the same JSON (e.g. a local stub server).
+YAHOO_CHART_URL = 'https://query1.finance.yahoo.com/v8/finance/chart'
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Helper function to make a token-bucket rate limiter, acquire() blocks until a request may start
+def make_rate_limiter(rate, burst=1):
+    if not rate:
+        return lambda: None
+    lock = threading.Lock()
+    bucket = {'tokens': float(burst), 'stamp': time.monotonic()}
+
+    def acquire():
+        while True:
+            with lock:
+                now = time.monotonic()
+                bucket['tokens'] = min(burst, bucket['tokens'] + (now - bucket['stamp']) * rate)
+                bucket['stamp'] = now
+                if bucket['tokens'] >= 1:
+                    bucket['tokens'] -= 1
+                    return
+                wait = (1 - bucket['tokens']) / rate
+            time.sleep(wait)
+
+    return acquire
+
+# Helper function to turn a chart API response into store columns (int64 ns timestamps, float64 close/open/high/low/volume)
+def parse_chart(payload):
+    chart = payload.get('chart') or {}
+    if not chart.get('result'):
+        raise ValueError((chart.get('error') or {}).get('description') or "empty chart result")
+    result = chart['result'][0]
+    timestamps = np.asarray(result.get('timestamp') or [], dtype=np.int64) * 1_000_000_000
+    quotes = result.get('indicators', {}).get('quote') or [{}]
+    columns = {'timestamps': timestamps}
+    for column in ('close',) + OPTIONAL_STORE_COLUMNS:
+        if column in quotes[0] or column == 'close':
+            columns[column] = np.asarray(quotes[0].get(column) or [], dtype=np.float64)  # Missing bars come back as null -> nan
+            if len(columns[column]) != len(timestamps):
+                raise ValueError(f"{len(timestamps)} timestamps but {len(columns[column])} {column} values")
+    keep = ~np.isnan(columns['close'])
+    return {column: values[keep] for column, values in columns.items()}
+
+# Function to download one ticker's chart with rate limiting and exponential-backoff retries
+def fetch_chart(session, ticker, start_date, end_date, interval='1d', base_url=YAHOO_CHART_URL,
+                acquire=lambda: None, retries=4, backoff=0.5, timeout=30):
+    params = {
+        'period1': int(datetime.datetime.strptime(start_date, '%Y-%m-%d').replace(tzinfo=datetime.timezone.utc).timestamp()),
+        'period2': int(datetime.datetime.strptime(end_date, '%Y-%m-%d').replace(tzinfo=datetime.timezone.utc).timestamp()),
+        'interval': interval,
+    }
+    url = f"{base_url.rstrip('/')}/{urllib.parse.quote(ticker)}"
+    error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1) * random.uniform(1, 1.5))  # Jitter spreads out retrying workers
+        acquire()
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except requests.RequestException as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            continue
+        if response.status_code == 200:
+            return parse_chart(response.json())
+        error = f"HTTP {response.status_code}"
+        if response.status_code not in RETRY_STATUSES:
+            break
+    raise RuntimeError(f"{ticker}: {error} after {attempt + 1} attempt(s)")
+
+# Function to prefetch many tickers concurrently into <store_dir>/<TICKER> series stores,
+# returns {'ok': {ticker: store path}, 'failed': {ticker: error}} instead of stopping at the first failure
+def prefetch_tickers(tickers, store_dir, start_date, end_date, interval='1d', concurrency=8, rate=5, burst=5,
+                     retries=4, backoff=0.5, base_url=YAHOO_CHART_URL):
+    session = requests.Session()
+    session.headers['User-Agent'] = 'Mozilla/5.0'  # Yahoo rejects the default requests agent
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    acquire = make_rate_limiter(rate, burst)
+
+    def fetch_one(ticker):
+        columns = fetch_chart(session, ticker, start_date, end_date, interval, base_url, acquire, retries, backoff)
+        timestamps, closes = columns.pop('timestamps'), columns.pop('close')
+        path = os.path.join(store_dir, ticker)
+        create_series_store(path, ticker, columns)
+        append_series_store(path, timestamps, closes, **columns)
+        return path
+
+    report = {'ok': {}, 'failed': {}}
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))  # Dedupe, keep order
+    progress_bar = tqdm(total=len(tickers), desc="Prefetching", unit="tickers")
+    with session, concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(fetch_one, ticker): ticker for ticker in tickers}
+        for future in concurrent.futures.as_completed(futures):
+            ticker = futures[future]
+            try:
+                report['ok'][ticker] = future.result()
+            except Exception as exc:
+                report['failed'][ticker] = str(exc)
+            progress_bar.update(1)
+    progress_bar.close()
+    return report
+
+# Helper function to read a job settings JSON file, filling in the defaults
+def load_settings_file(path):
+    with open(path) as f:
+        settings = dict(DEFAULT_SETTINGS, **json.load(f))
+    settings['ticker'] = settings['ticker'].upper()
+    settings['intro_hold'] = parse_seconds(settings['intro_hold'], "Intro hold")
+    settings['outro_hold'] = parse_seconds(settings['outro_hold'], "Outro hold")
+    settings['pauses'] = [[date, parse_seconds(seconds, f"Pause on {date}")] for date, seconds in settings['pauses']]
+    return settings
+
+# Function to run the command line interface (plan / worker / merge / store / prefetch / batch)
+def run_command(argv):
+    parser = argparse.ArgumentParser(description="Sharded ticker animation rendering")
+    commands = parser.add_subparsers(dest='command', required=True)
+    plan_parser = commands.add_parser('plan', help="fetch data and write a shard manifest into a job directory")
+    plan_parser.add_argument('job_dir')
+    plan_parser.add_argument('settings', help="JSON file with job settings (missing keys use the defaults)")
+    plan_parser.add_argument('--frames-per-shard', type=int, default=300)
+    worker_parser = commands.add_parser('worker', help="render shards of a job directory")
+    worker_parser.add_argument('job_dir')
+    worker_parser.add_argument('--shard', type=int, help="render this shard even if claimed (default: claim free shards)")
+    worker_parser.add_argument('--lock-timeout', type=float, default=LOCK_TIMEOUT,
+                               help="seconds without a heartbeat after which another worker's shard is taken over")
+    store_parser = commands.add_parser('store', help="download a ticker into a memory-mapped series store")
+    store_parser.add_argument('ticker')
+    store_parser.add_argument('path')
+    store_parser.add_argument('--start', default=DEFAULT_SETTINGS['start_date'])
+    store_parser.add_argument('--end', default=DEFAULT_SETTINGS['end_date'])
+    store_parser.add_argument('--interval', default='1d', help="yfinance bar interval, e.g. 1m, 1h, 1d")
+    prefetch_parsers = []
+    prefetch_parser = commands.add_parser('prefetch', help="download many tickers concurrently into series stores")
+    prefetch_parser.add_argument('store_dir')
+    prefetch_parser.add_argument('tickers', nargs='+')
+    prefetch_parser.add_argument('--start', default=DEFAULT_SETTINGS['start_date'])
+    prefetch_parser.add_argument('--end', default=DEFAULT_SETTINGS['end_date'])
+    prefetch_parser.add_argument('--interval', default='1d')
+    prefetch_parsers.append(prefetch_parser)
+    batch_parser = commands.add_parser('batch', help="prefetch every ticker, then render each one with the same settings")
+    batch_parser.add_argument('settings', help="JSON file with job settings (ticker is replaced per render)")
+    batch_parser.add_argument('store_dir')
+    batch_parser.add_argument('tickers', nargs='+')
+    prefetch_parsers.append(batch_parser)
+    for sub_parser in prefetch_parsers:
+        sub_parser.add_argument('--concurrency', type=int, default=8)
+        sub_parser.add_argument('--rate', type=float, default=5, help="requests per second (0 = unlimited)")
+        sub_parser.add_argument('--retries', type=int, default=4)
+        sub_parser.add_argument('--base-url', default=YAHOO_CHART_URL)
+    merge_parser = commands.add_parser('merge', help="validate and concatenate rendered shards")
+    merge_parser.add_argument('job_dir')
+    merge_parser.add_argument('--output-dir', default='.')
+    args = parser.parse_args(argv)
+
+    if args.command == 'plan':
+        settings = load_settings_file(args.settings)
+        manifest = write_manifest(settings, args.job_dir, args.frames_per_shard)
+        print(f"{manifest['hash']}: {manifest['frame_count']} frames in {len(manifest['shards'])} shards")
+    elif args.command == 'worker':
+        rendered = run_worker(args.job_dir, args.shard, args.lock_timeout)
+        print(f"Rendered shards: {', '.join(map(str, rendered)) or 'none'}")
+    elif args.command == 'store':
+        data = yf.download(args.ticker.upper(), start=args.start, end=args.end, interval=args.interval)
+        header = save_series_store(data, args.path, args.ticker.upper())
+        print(f"Saved {header['rows']} rows to {args.path}")
+    elif args.command in ('prefetch', 'batch'):
+        settings = load_settings_file(args.settings) if args.command == 'batch' else None
+        start_date = settings['start_date'] if settings else args.start
+        end_date = settings['end_date'] if settings else args.end
+        interval = '1d' if settings else args.interval
+        report = prefetch_tickers(args.tickers, args.store_dir, start_date, end_date, interval,
+                                  args.concurrency, args.rate, max(1, int(args.rate)), args.retries, base_url=args.base_url)
+        for ticker, error in sorted(report['failed'].items()):
+            print(f"Failed {ticker}: {error}")
+        print(f"Prefetched {len(report['ok'])} of {len(report['ok']) + len(report['failed'])} tickers into {args.store_dir}")
+        if settings:
+            for ticker, path in report['ok'].items():
+                filenames, stats = render_job(dict(settings, ticker=ticker, series_store=path))
+                print(f"Animation saved successfully as {', '.join(filenames)}!")
+        if report['failed']:
+            sys.exit(1)
+    elif args.command == 'merge':
+        for output in merge_job(args.job_dir, args.output_dir):
+            print(f"Animation saved successfully as {output}!")
+
+# Run a command instead of the GUI when arguments are given
+if len(sys.argv) > 1:
+    run_command(sys.argv[1:])
+    sys.exit(0)
+
+# Set up the tkinter GUI
+root = tk.Tk()
+root.title("Ticker Animation Generator")
+
+# Calculate default dates
+default_end_date = (datetime.datetime.now() - datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+default_start_date = (datetime.datetime.now() - datetime.timedelta(days=365)).strftime('%Y-%m-%d')
+
+# Ticker type radio buttons
+ticker_type_var = tk.StringVar(value="Stock")
+stock_radio = ttk.Radiobutton(root, text="Stock Ticker", variable=ticker_type_var, value="Stock")
+crypto_radio = ttk.Radiobutton(root, text="Crypto Ticker", variable=ticker_type_var, value="Crypto")
+stock_radio.grid(row=0, column=0, padx=10, pady=10)
+crypto_radio.grid(row=0, column=1, padx=10, pady=10)
+
+# Ticker entry
+ticker_label = ttk.Label(root, text="Ticker Symbol:")
+ticker_label.grid(row=1, column=0, padx=10, pady=10)
+ticker_entry = ttk.Entry(root)
+ticker_entry.grid(row=1, column=1, padx=10, pady=10)
+
+# Start date entry with default value
+start_label = ttk.Label(root, text="Start Date (YYYY-MM-DD):")
+start_label.grid(row=2, column=0, padx=10, pady=10)
+start_entry = ttk.Entry(root)
+start_entry.insert(0, default_start_date)  # Set default start date
+start_entry.grid(row=2, column=1, padx=10, pady=10)
+
+# End date entry with default value
+end_label = ttk.Label(root, text="End Date (YYYY-MM-DD):")
+end_label.grid(row=3, column=0, padx=10, pady=10)
+end_entry = ttk.Entry(root)
+end_entry.insert(0, default_end_date)  # Set default end date
+end_entry.grid(row=3, column=1, padx=10, pady=10)
+
+# Skip Days entry
+skip_days_label = ttk.Label(root, text="Skip Days:")
+skip_days_label.grid(row=4, column=0, padx=10, pady=10)
+skip_days_entry = ttk.Entry(root)
+skip_days_entry.grid(row=4, column=1, padx=10, pady=10)
+
+# Checkboxes for including start and end dates
+include_start_var = tk.BooleanVar(value=True)
+include_start_check = ttk.Checkbutton(root, text="Include Start Date", variable=include_start_var)
+include_start_check.grid(row=5, column=0, padx=10, pady=10)
+
+include_end_var = tk.BooleanVar(value=True)
+include_end_check = ttk.Checkbutton(root, text="Include End Date", variable=include_end_var)
+include_end_check.grid(row=5, column=1, padx=10, pady=10)
+
+# Custom text entry
+custom_text_label = ttk.Label(root, text="Custom Text:")
+custom_text_label.grid(row=6, column=0, padx=10, pady=10)
+custom_text_box = Text(root, height=4, width=40)
+custom_text_box.grid(row=6, column=1, padx=10, pady=10)
+
+# X Ticks Interval entry
+x_ticks_label = ttk.Label(root, text="X Ticks Interval:")
+x_ticks_label.grid(row=7, column=0, padx=10, pady=10)
+x_ticks_entry = ttk.Entry(root)
+x_ticks_entry.grid(row=7, column=1, padx=10, pady=10)
+
+# Y Ticks Interval entry
+y_ticks_label = ttk.Label(root, text="Y Ticks Interval:")
+y_ticks_label.grid(row=8, column=0, padx=10, pady=10)
+y_ticks_entry = ttk.Entry(root)
+y_ticks_entry.grid(row=8, column=1, padx=10, pady=10)
+
+# Chart Height entry
+chart_height_label = ttk.Label(root, text="Chart Height (%):")
+chart_height_label.grid(row=9, column=0, padx=10, pady=10)
+chart_height_entry = ttk.Entry(root)
+chart_height_entry.grid(row=9, column=1, padx=10, pady=10)
+
+# Watermark text entry
+watermark_label = ttk.Label(root, text="Watermark Text:")
+watermark_label.grid(row=10, column=0, padx=10, pady=10)
+watermark_entry = ttk.Entry(root)
+watermark_entry.grid(row=10, column=1, padx=10, pady=10)
+
+# Watermark color entry
+watermark_color_label = ttk.Label(root, text="Watermark Color:")
+watermark_color_label.grid(row=11, column=0, padx=10, pady=10)
+watermark_color_entry = ttk.Entry(root)
+watermark_color_entry.grid(row=11, column=1, padx=10, pady=10)
+
+# Checkbox for cutting initial frames
+cut_initial_frames_var = tk.BooleanVar(value=False)
+cut_initial_frames_check = ttk.Checkbutton(root, text="Cut Initial Frames", variable=cut_initial_frames_var)
+cut_initial_frames_check.grid(row=12, column=0, padx=10, pady=10)
+
+# Checkbox for per-frame timing and allocation stats
+profile_frames_var = tk.BooleanVar(value=False)
+profile_frames_check = ttk.Checkbutton(root, text="Profile Frames", variable=profile_frames_var)
+profile_frames_check.grid(row=12, column=1, padx=10, pady=10)
+
+# Output profile checkboxes, every checked profile is rendered in the same pass
+output_profiles_label = ttk.Label(root, text="Output Formats:")
+output_profiles_label.grid(row=13, column=0, padx=10, pady=10)
+output_profiles_frame = ttk.Frame(root)
+output_profiles_frame.grid(row=13, column=1, padx=10, pady=10)
+output_profile_vars = {}
+for profile_name in OUTPUT_PROFILES:
+    output_profile_vars[profile_name] = tk.BooleanVar(value=(profile_name == 'Classic'))
+    ttk.Checkbutton(output_profiles_frame, text=profile_name, variable=output_profile_vars[profile_name]).pack(anchor='w')
+
+# Series store entry, renders from a memory-mapped store instead of downloading
+series_store_label = ttk.Label(root, text="Series Store (optional):")
+series_store_label.grid(row=14, column=0, padx=10, pady=10)
+series_store_entry = ttk.Entry(root)
+series_store_entry.grid(row=14, column=1, padx=10, pady=10)
+
+# Overlays entry
+overlays_label = ttk.Label(root, text="Overlays (SMA 50, BB 20, Volume):")
+overlays_label.grid(row=15, column=0, padx=10, pady=10)
+overlays_entry = ttk.Entry(root)
+overlays_entry.grid(row=15, column=1, padx=10, pady=10)
+
+# Chart style selection
+chart_style_label = ttk.Label(root, text="Chart Style:")
+chart_style_label.grid(row=16, column=0, padx=10, pady=10)
+chart_style_var = tk.StringVar(value="Line")
+chart_style_combo = ttk.Combobox(root, textvariable=chart_style_var, values=["Line", "Candlestick"], state="readonly")
+chart_style_combo.grid(row=16, column=1, padx=10, pady=10)
+
+# Hold entries (seconds on the first / last frame)
+intro_hold_label = ttk.Label(root, text="Intro Hold (s):")
+intro_hold_label.grid(row=17, column=0, padx=10, pady=10)
+intro_hold_entry = ttk.Entry(root)
+intro_hold_entry.grid(row=17, column=1, padx=10, pady=10)
+
+outro_hold_label = ttk.Label(root, text="Outro Hold (s):")
+outro_hold_label.grid(row=18, column=0, padx=10, pady=10)
+outro_hold_entry = ttk.Entry(root)
+outro_hold_entry.grid(row=18, column=1, padx=10, pady=10)
+
+# Pauses entry
+pauses_label = ttk.Label(root, text="Pauses (YYYY-MM-DD secs, ...):")
+pauses_label.grid(row=19, column=0, padx=10, pady=10)
+pauses_entry = ttk.Entry(root)
+pauses_entry.grid(row=19, column=1, padx=10, pady=10)
+
+# Output file format selection
+output_format_label = ttk.Label(root, text="File Format:")
+output_format_label.grid(row=20, column=0, padx=10, pady=10)
+output_format_var = tk.StringVar(value="MP4")
+output_format_combo = ttk.Combobox(root, textvariable=output_format_var, values=list(OUTPUT_FORMATS), state="readonly")
+output_format_combo.grid(row=20, column=1, padx=10, pady=10)
+
+# Generate button
+generate_button = ttk.Button(root, text="Generate Animation", command=generate_animation)
+generate_button.grid(row=21, column=0, columnspan=2, pady=20)
+
+# Status label
+status_label = ttk.Label(root, text="")
+status_label.grid(row=22, column=0, columnspan=2, pady=10)
+
+# Run the Tkinter main loop
+root.mainloop()
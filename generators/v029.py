@@ -0,0 +1,3431 @@
+import tkinter as tk
+from tkinter import ttk, Text, messagebox
+from matplotlib import pyplot as plt
+from matplotlib.animation import FFMpegWriter, AbstractMovieWriter
+import yfinance as yf
+import pandas as pd
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from PIL import Image, ImageDraw, ImageFont, ImageTk, GifImagePlugin
+import datetime
+from tqdm import tqdm
+import matplotlib.dates as mdates
+from matplotlib.collections import PathCollection, PolyCollection
+from matplotlib.path import Path
+from matplotlib import font_manager, colors as mcolors
+import os
+import sys
+import time
+import contextlib
+import io
+import json
+import html
+import base64
+import hashlib
+import argparse
+import platform
+import subprocess
+import random
+import threading
+import tempfile
+import queue
+import uuid
+import shutil
+import string
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import concurrent.futures
+import urllib.parse
+import requests
+from requests.adapters import HTTPAdapter
+import matplotlib
+import tracemalloc
+
+# Helper function to get ordinal day suffix
+def get_ordinal(n):
+    return "%d%s" % (n, "th" if 4 <= n <= 20 or 24 <= n <= 30 else ["st", "nd", "rd"][n % 10 - 1])
+
+# Helper function to format date
+def format_date(date_str):
+    date_obj = datetime.datetime.strptime(date_str, '%Y-%m-%d')
+    month = date_obj.strftime('%B')
+    day = get_ordinal(date_obj.day)
+    year = date_obj.year
+    return f"{month} {day} {year}"
+
+# Helper function to convert a downloaded DataFrame into plain column arrays (timestamps as int64 ns)
+def columns_from_dataframe(data):
+    index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+    columns = {
+        'timestamps': index.values.astype('datetime64[ns]').astype(np.int64),
+        'close': data['Close'].to_numpy(dtype=np.float64).reshape(-1),
+    }
+    for name in ('Open', 'High', 'Low', 'Volume'):
+        if name in data:
+            columns[name.lower()] = data[name].to_numpy(dtype=np.float64).reshape(-1)
+    return columns
+
+# Helper function to build the frame table from int64 nanosecond timestamps and float64 closes. The inputs are kept
+# as they are (memory-mapped windows stay views, strided or not) and only the date numbers the line is drawn from
+# are computed per row; axis limits, label anchors and labels are worked out per chunk of frames at draw time.
+def frame_table_from_arrays(timestamps, prices):
+    return {
+        'timestamps': np.asarray(timestamps, dtype=np.int64),
+        'dates': timestamps * (1 / 86400e9),  # Matplotlib date numbers, days since the default 1970-01-01 epoch
+        'prices': np.asarray(prices, dtype=np.float64),
+    }
+
+# Frames whose axis limits and label anchors are computed together at draw time
+FRAME_CHUNK = 4096
+
+# Helper function to compute the axis limits of frames [start, stop), following the visible part of the series with
+# matplotlib's default 5% margins, and the price label anchor in axes coordinates (0-1), so no data transform is
+# needed per frame. low/high are the running low/high before `start`, scanned from the rows when not given.
+# Candle tables widen the y limits with their 'low'/'high' columns.
+def frame_limits(table, start, stop, low=None, high=None):
+    dates, prices = table['dates'], table['prices']
+    lows, highs = table.get('low', prices), table.get('high', prices)
+    if low is None:
+        low, high = (lows[:start].min(), highs[:start].max()) if start else (np.inf, -np.inf)
+    low = np.minimum(np.minimum.accumulate(lows[start:stop]), low)
+    high = np.maximum(np.maximum.accumulate(highs[start:stop]), high)
+    y_pad = np.where(high > low, (high - low) * 0.05, np.maximum(np.abs(high) * 0.05, 1.0))
+    x_span = dates[start:stop] - dates[0]
+    x_pad = np.where(x_span > 0, x_span * 0.05, 1.0)
+    limits = {'start': start, 'low': low, 'high': high, 'x_min': dates[0] - x_pad, 'x_max': dates[start:stop] + x_pad,
+              'y_min': low - y_pad, 'y_max': high + y_pad}
+    limits['label_x'] = (dates[start:stop] - limits['x_min']) / (limits['x_max'] - limits['x_min'])
+    limits['label_y'] = (prices[start:stop] - limits['y_min']) / (limits['y_max'] - limits['y_min'])
+    return limits
+
+# Function to make a per-frame lookup of frame_limits, computed FRAME_CHUNK frames at a time as the render reaches
+# them. chunk_at(frame) returns (limits of the frame's chunk, frame index in the chunk); the running low/high
+# carries over to the next chunk, so rendering in order reads every row once.
+def make_frame_chunks(table):
+    frame_count = len(table['prices'])
+    current = [None]
+
+    def chunk_at(frame):
+        limits = current[0]
+        if limits is None or not limits['start'] <= frame < limits['start'] + len(limits['x_min']):
+            start = frame - frame % FRAME_CHUNK
+            follows = limits is not None and limits['start'] + len(limits['x_min']) == start
+            carried = (limits['low'][-1], limits['high'][-1]) if follows else (None, None)
+            limits = current[0] = frame_limits(table, start, min(start + FRAME_CHUNK, frame_count), *carried)
+        return limits, frame - limits['start']
+
+    return chunk_at
+
+# Columnar series store: a directory with a small header.json plus one raw little-endian file per column
+# (timestamps as int64 nanoseconds, closes and optional open/high/low/volume as float64). Columns are opened with numpy.memmap, so a render
+# only pages in the rows it reads and parallel workers share those pages through the OS cache.
+STORE_FORMAT = 'ticker-series'
+STORE_VERSION = 1
+STORE_COLUMNS = {'timestamps': '<i8', 'close': '<f8'}
+OPTIONAL_STORE_COLUMNS = ('open', 'high', 'low', 'volume')
+
+# Helper function to read a series store header
+def read_store_header(path):
+    with open(os.path.join(path, 'header.json')) as f:
+        header = json.load(f)
+    if header.get('format') != STORE_FORMAT or header.get('version') != STORE_VERSION:
+        raise ValueError(f"{path} is not a version {STORE_VERSION} series store")
+    return header
+
+# Helper function to write a series store header atomically
+def write_store_header(path, header):
+    with open(os.path.join(path, 'header.json.tmp'), 'w') as f:
+        json.dump(header, f, indent=2)
+    os.replace(os.path.join(path, 'header.json.tmp'), os.path.join(path, 'header.json'))
+
+# Function to create an empty series store, optionally with some of the OPTIONAL_STORE_COLUMNS
+def create_series_store(path, ticker='', extra_columns=()):
+    unknown = set(extra_columns) - set(OPTIONAL_STORE_COLUMNS)
+    if unknown:
+        raise ValueError(f"unknown store columns: {', '.join(sorted(unknown))}")
+    columns = dict(STORE_COLUMNS, **{column: '<f8' for column in OPTIONAL_STORE_COLUMNS if column in extra_columns})
+    os.makedirs(path, exist_ok=True)
+    for column in columns:
+        open(os.path.join(path, f"{column}.bin"), 'wb').close()
+    header = {'format': STORE_FORMAT, 'version': STORE_VERSION, 'ticker': ticker, 'rows': 0, 'columns': columns}
+    write_store_header(path, header)
+    return header
+
+# Function to append rows (int64 ns timestamps, float64 closes, plus the store's extra columns by name)
+# to a series store, timestamps must keep increasing. With replace_last the first row overwrites the store's
+# last row, which must have the same timestamp (a bar that was still open when it was written).
+def append_series_store(path, timestamps, closes, replace_last=False, **extra):
+    header = read_store_header(path)
+    timestamps = np.asarray(timestamps, dtype='<i8')
+    values = {'timestamps': timestamps, 'close': np.asarray(closes, dtype='<f8')}
+    values.update((column, np.asarray(column_values, dtype='<f8')) for column, column_values in extra.items())
+    if set(values) != set(header['columns']):
+        raise ValueError(f"store has columns {', '.join(header['columns'])}, got {', '.join(values)}")
+    for column, column_values in values.items():
+        if len(column_values) != len(timestamps):
+            raise ValueError(f"{len(timestamps)} timestamps but {len(column_values)} {column} values")
+    if not len(timestamps):
+        return header
+    if np.any(np.diff(timestamps) < 0):
+        raise ValueError("timestamps must be sorted")
+    if header['rows']:
+        last = np.fromfile(os.path.join(path, 'timestamps.bin'), dtype='<i8', count=1, offset=(header['rows'] - 1) * 8)[0]
+        if timestamps[0] < last:
+            raise ValueError("appended timestamps start before the end of the store")
+        if replace_last and timestamps[0] != last:
+            raise ValueError("the first appended row must have the timestamp of the row it replaces")
+    elif replace_last:
+        raise ValueError("the store has no row to replace")
+    first_row = header['rows'] - 1 if replace_last else header['rows']
+
+    # Column files first, then the row count, so a crash never exposes half-written rows
+    for column, column_values in values.items():
+        with open(os.path.join(path, f"{column}.bin"), 'r+b') as f:
+            f.seek(first_row * 8)
+            column_values.tofile(f)
+    header['rows'] = first_row + len(timestamps)
+    write_store_header(path, header)
+    return header
+
+# Function to write a downloaded DataFrame (close plus any OHLC/volume columns) into a new series store
+def save_series_store(data, path, ticker=''):
+    columns = columns_from_dataframe(data)
+    timestamps, closes = columns.pop('timestamps'), columns.pop('close')
+    create_series_store(path, ticker, columns)
+    return append_series_store(path, timestamps, closes, **columns)
+
+# Function to open a series store as read-only memory-mapped columns
+def open_series_store(path):
+    header = read_store_header(path)
+    columns = {}
+    for column, dtype in header['columns'].items():
+        if header['rows']:
+            columns[column] = np.memmap(os.path.join(path, f"{column}.bin"), dtype=dtype, mode='r', shape=(header['rows'],))
+        else:
+            columns[column] = np.zeros(0, dtype=dtype)  # numpy cannot map an empty file
+    return columns
+
+# Function to get a job's date window from a series store, as memory-mapped views only
+def load_store_columns(settings):
+    store = open_series_store(settings['series_store'])
+    timestamps = store['timestamps']
+
+    # Date range by binary search on the mapped timestamps (end date is exclusive, like yf.download)
+    start = np.searchsorted(timestamps, np.datetime64(settings['start_date'], 'ns').astype(np.int64))
+    end = np.searchsorted(timestamps, np.datetime64(settings['end_date'], 'ns').astype(np.int64))
+    return {column: values[start:end] for column, values in store.items()}
+
+# Trade ingest: raw exchange trade files (CSV, optionally gzip/zip compressed, or packed binary records) are read
+# in fixed-size chunks and aggregated into OHLCV bars with reduceat kernels, then appended to a series store.
+# Only one chunk and the bar still open at its end are held in memory, whatever the size of the files.
+TRADE_RECORD_DTYPE = np.dtype([('timestamp', '<i8'), ('price', '<f8'), ('size', '<f8')])  # Binary files, ns timestamps
+INTERVAL_UNITS = {'s': 10**9, 'm': 60 * 10**9, 'h': 3600 * 10**9, 'd': 86400 * 10**9, 'w': 7 * 86400 * 10**9}
+TIME_UNITS = {'s': 10**9, 'ms': 10**6, 'us': 10**3, 'ns': 1}
+TRADE_COLUMNS = ('timestamp', 'price', 'size')
+MISSING_TIME = np.iinfo(np.int64).min  # NaT as int64: what missing or non-finite trade times become, dropped by the aggregator
+
+# Helper function to parse a bar interval like "1m", "15min", "4h" or "1d" into nanoseconds
+def parse_interval(text):
+    count = text.strip().lower().rstrip('in')  # "15min" -> "15m"
+    if len(count) < 2 or count[-1] not in INTERVAL_UNITS or not count[:-1].isdigit() or not int(count[:-1]):
+        raise ValueError(f"Bad interval '{text}', use e.g. 1s, 5m, 1h or 1d")
+    return int(count[:-1]) * INTERVAL_UNITS[count[-1]]
+
+# Helper function to convert a CSV time column to int64 nanoseconds (numbers in time_unit, or ISO 8601 text)
+def trade_timestamps(values, time_unit):
+    if time_unit == 'iso':
+        return pd.to_datetime(values, utc=True).dt.tz_convert(None).to_numpy().astype('datetime64[ns]').astype(np.int64)
+    values = values.to_numpy()
+    if values.dtype.kind == 'f':  # Fractional seconds and the like, or a column with missing times (nan)
+        timestamps = np.full(len(values), MISSING_TIME)
+        finite = np.isfinite(values)
+        timestamps[finite] = np.round(values[finite] * TIME_UNITS[time_unit]).astype(np.int64)
+        return timestamps
+    return values.astype(np.int64) * TIME_UNITS[time_unit]
+
+# Function to read a trade file as (timestamps ns, prices, sizes) chunks of at most chunk_rows rows. CSV columns
+# are given by name (the file has a header) or by 0-based position (it has none), time, price and size in that order.
+def read_trade_chunks(path, file_format='auto', chunk_rows=1_000_000, columns=TRADE_COLUMNS, time_unit='ms'):
+    if file_format == 'auto':
+        file_format = 'binary' if path.endswith('.bin') else 'csv'
+    if file_format == 'binary':
+        if not os.path.getsize(path):
+            return
+        records = np.memmap(path, dtype=TRADE_RECORD_DTYPE, mode='r')
+        for start in range(0, len(records), chunk_rows):
+            chunk = records[start:start + chunk_rows]
+            yield chunk['timestamp'], chunk['price'], chunk['size']
+        return
+
+    columns = [int(column) if str(column).isdigit() else column for column in columns]
+    time_column, price_column, size_column = columns
+    positional = all(isinstance(column, int) for column in columns)
+    with pd.read_csv(path, header=None if positional else 0, usecols=columns, chunksize=chunk_rows,
+                     dtype={price_column: np.float64, size_column: np.float64}) as reader:
+        for chunk in reader:
+            yield trade_timestamps(chunk[time_column], time_unit), chunk[price_column].to_numpy(), chunk[size_column].to_numpy()
+
+# Function to make a streaming OHLCV aggregator for one bar interval. add(timestamps, prices, sizes) returns the
+# bars completed by a chunk (bar start timestamps, open, high, low, close, volume), keeping the last bar open
+# since the next chunk may continue it; finish() returns that last bar. open_bar seeds the open bar, e.g. with
+# the last bar of an earlier ingest, as (bar number, open, high, low, close, volume).
+def make_bar_aggregator(interval_ns, open_bar=None):
+    state = {'bar': open_bar}  # Bar number, open, high, low, close and volume of the bar still open
+
+    def add(timestamps, prices, sizes):
+        valid = (timestamps != MISSING_TIME) & np.isfinite(prices) & np.isfinite(sizes)
+        if not valid.all():
+            timestamps, prices, sizes = timestamps[valid], prices[valid], sizes[valid]
+        if not len(timestamps):
+            return None
+        if np.any(timestamps[1:] < timestamps[:-1]):  # Some dumps interleave trades within a few ms
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, prices, sizes = timestamps[order], prices[order], sizes[order]
+
+        # One bar per run of equal bar numbers: first/last price, max/min price and summed size of the run
+        bars = timestamps // interval_ns
+        starts = np.flatnonzero(np.concatenate([[True], bars[1:] != bars[:-1]]))
+        ends = np.append(starts[1:], len(bars)) - 1
+        numbers = bars[starts]
+        opens, highs, lows, closes = prices[starts], np.maximum.reduceat(prices, starts), np.minimum.reduceat(prices, starts), prices[ends]
+        volumes = np.add.reduceat(sizes, starts)
+
+        # Merge with the bar left open by the previous chunk, or emit that bar first
+        if state['bar'] is not None:
+            number, bar_open, bar_high, bar_low, bar_close, bar_volume = state['bar']
+            if numbers[0] < number:
+                raise ValueError("Trades go back in time between chunks, trade files must be given in time order")
+            if numbers[0] == number:
+                opens[0], highs[0], lows[0], volumes[0] = bar_open, max(highs[0], bar_high), min(lows[0], bar_low), volumes[0] + bar_volume
+            else:
+                numbers, opens, highs, lows, closes, volumes = (np.concatenate([[value], values]) for value, values in
+                                                                zip(state['bar'], (numbers, opens, highs, lows, closes, volumes)))
+        state['bar'] = (numbers[-1], opens[-1], highs[-1], lows[-1], closes[-1], volumes[-1])
+        return {'timestamps': numbers[:-1] * interval_ns, 'open': opens[:-1], 'high': highs[:-1], 'low': lows[:-1],
+                'close': closes[:-1], 'volume': volumes[:-1]}
+
+    def finish():
+        if state['bar'] is None:
+            return None
+        number, bar_open, bar_high, bar_low, bar_close, bar_volume = state['bar']
+        state['bar'] = None
+        return {'timestamps': np.array([number * interval_ns]), 'open': np.array([bar_open]), 'high': np.array([bar_high]),
+                'low': np.array([bar_low]), 'close': np.array([bar_close]), 'volume': np.array([bar_volume])}
+
+    return add, finish
+
+# Function to ingest trade files (in time order) into OHLCV bars in a series store, creating it if needed
+def ingest_trades(paths, store_path, interval='1m', ticker='', file_format='auto', columns=TRADE_COLUMNS,
+                  time_unit='ms', chunk_rows=1_000_000):
+    interval_ns = parse_interval(interval)
+    if not os.path.exists(os.path.join(store_path, 'header.json')):
+        create_series_store(store_path, ticker, OPTIONAL_STORE_COLUMNS)
+
+    # The last bar of an earlier ingest may continue in these files: reopen it, and rewrite its row when it is stored
+    stored = open_series_store(store_path)
+    if set(stored) != {'timestamps', 'close', *OPTIONAL_STORE_COLUMNS}:
+        raise ValueError(f"{store_path} is not an OHLCV series store")
+    open_bar = None
+    if len(stored['timestamps']):
+        last = {column: values[-1] for column, values in stored.items()}
+        if last['timestamps'] % interval_ns:
+            raise ValueError(f"{store_path} holds bars of a different interval than {interval}")
+        open_bar = (last['timestamps'] // interval_ns, last['open'], last['high'], last['low'], last['close'], last['volume'])
+    del stored
+    add, finish = make_bar_aggregator(interval_ns, open_bar)
+    counts = {'rows': 0, 'bars': 0}
+    replace_last = [open_bar is not None]  # The first bars stored start with the reopened bar
+
+    def store(bars):
+        if bars is not None and len(bars['timestamps']):
+            append_series_store(store_path, bars['timestamps'], bars['close'], replace_last[0], open=bars['open'],
+                                high=bars['high'], low=bars['low'], volume=bars['volume'])
+            counts['bars'] += len(bars['timestamps']) - replace_last[0]
+            replace_last[0] = False
+
+    start = time.perf_counter()
+    progress_bar = tqdm(desc="Ingesting trades", unit="rows", unit_scale=True)
+    for path in paths:
+        for timestamps, prices, sizes in read_trade_chunks(path, file_format, chunk_rows, columns, time_unit):
+            store(add(timestamps, prices, sizes))
+            counts['rows'] += len(timestamps)
+            progress_bar.update(len(timestamps))
+    store(finish())
+    progress_bar.close()
+    seconds = time.perf_counter() - start
+    return dict(counts, seconds=seconds, rows_per_second=counts['rows'] / seconds if seconds else 0.0)
+
+# Function to write a synthetic trade file for trying out ingest: a random walk from 30000 with about 20 trades
+# per second, as CSV (timestamp in ms, price, size with a header) or binary records, written in chunks
+def write_sample_trades(path, rows=1_000_000, start_date='2024-01-01', file_format='auto', seed=0, chunk_rows=1_000_000):
+    if file_format == 'auto':
+        file_format = 'binary' if path.endswith('.bin') else 'csv'
+    rng = np.random.default_rng(seed)
+    timestamp = np.datetime64(start_date, 'ns').astype(np.int64)
+    price = 30000.0
+    with (open(path, 'wb') if file_format == 'binary' else open(path, 'w', newline='')) as f:
+        for start in range(0, rows, chunk_rows):
+            count = min(chunk_rows, rows - start)
+            records = np.empty(count, dtype=TRADE_RECORD_DTYPE)
+            records['timestamp'] = timestamp + np.cumsum(rng.exponential(50e6, count)).astype(np.int64)
+            records['price'] = np.round(price * np.exp(np.cumsum(rng.normal(0, 2e-5, count))), 2)
+            records['size'] = np.round(rng.lognormal(-4, 1.5, count), 6)
+            timestamp, price = int(records['timestamp'][-1]), float(records['price'][-1])
+            if file_format == 'binary':
+                records.tofile(f)
+            else:
+                pd.DataFrame({'timestamp': records['timestamp'] // TIME_UNITS['ms'], 'price': records['price'],
+                              'size': records['size']}).to_csv(f, header=not start, index=False)
+
+# Indicator overlays, computed once over the whole unskipped series with cumulative-sum kernels and sampled
+# per frame. Windows count rows of the underlying series (trading days for daily data), not frames.
+OVERLAY_COLORS = ['orange', 'deepskyblue', 'magenta', 'white']
+
+# Helper function to parse the overlay list, e.g. "SMA 50, SMA 200, BB 20, Volume"
+def parse_overlays(text):
+    overlays = []
+    for item in text.replace(';', ',').split(','):
+        parts = item.upper().split()
+        if not parts:
+            continue
+        if parts[0] == 'VOLUME' and len(parts) == 1:
+            overlays.append('Volume')
+        elif parts[0] in ('SMA', 'MA', 'BB', 'BOLLINGER') and len(parts) == 2 and parts[1].isdigit() and int(parts[1]) > 1:
+            overlays.append(f"{'SMA' if parts[0] in ('SMA', 'MA') else 'BB'} {int(parts[1])}")
+        else:
+            raise ValueError(f"Unknown overlay '{item.strip()}', use e.g. SMA 50, BB 20 or Volume")
+    return overlays
+
+# Helper function to get the frame table key of an overlay ("SMA 50" -> "sma_50")
+def overlay_key(overlay):
+    return overlay.lower().replace(' ', '_')
+
+# Helper function for a rolling mean over the previous `window` rows (nan until the window is full)
+def rolling_mean(values, window):
+    sums = np.cumsum(values, dtype=np.float64)
+    means = np.full(len(values), np.nan)
+    if len(values) >= window:
+        means[window - 1:] = (sums[window - 1:] - np.concatenate(([0.0], sums[:-window]))) / window
+    return means
+
+# Function to compute the requested overlays for every frame, returns extra frame table columns
+def compute_overlays(columns, sample, overlays):
+    closes = columns['close']
+    frame_rows = np.arange(len(closes))[sample]
+    extra = {}
+    for overlay in overlays:
+        key = overlay_key(overlay)
+        if overlay == 'Volume':
+            if 'volume' not in columns:
+                raise ValueError("The Volume overlay needs volume data (re-create the series store from a download)")
+            # Each frame shows the total volume of the rows it covers: after the previous frame's row up to its own
+            volume = np.nan_to_num(np.asarray(columns['volume'], dtype=np.float64))  # Missing volume counts as 0
+            if len(frame_rows):
+                volume = np.add.reduceat(volume[:frame_rows[-1] + 1], np.concatenate(([0], frame_rows[:-1] + 1)))
+            else:
+                volume = np.zeros(0)
+            extra[key] = volume
+            extra[f"{key}_top"] = np.maximum.accumulate(volume) * 4 if len(volume) else volume  # Bars fill the lower quarter
+            continue
+
+        window = int(overlay.split()[1])
+        mean = rolling_mean(closes, window)
+        if overlay.startswith('SMA'):
+            extra[key] = mean[sample]
+        else:
+            # Bollinger bands: mean +/- 2 standard deviations, variance from shifted squares to limit cancellation
+            offset = closes[0] if len(closes) else 0.0
+            shifted = np.asarray(closes, dtype=np.float64) - offset
+            std = np.sqrt(np.maximum(rolling_mean(shifted * shifted, window) - (mean - offset) ** 2, 0))
+            extra[f"{key}_upper"] = (mean + 2 * std)[sample]
+            extra[f"{key}_lower"] = (mean - 2 * std)[sample]
+    return extra
+
+# Glyph atlas: characters are rasterized once per font file and pixel size, labels are composed by copying pixels
+glyph_atlas = {}
+label_box_cache = {}
+font_cache = {}
+ATLAS_CHARS = "0123456789$.,"
+
+# Helper function to find the font file matplotlib would use for the given weight
+def find_font_path(weight='normal'):
+    return font_manager.findfont(font_manager.FontProperties(family=plt.rcParams['font.family'], weight=weight))
+
+# Helper function to get (and cache) a PIL font for a font file and pixel size
+def get_font(font_path, size_px):
+    key = (font_path, size_px)
+    if key not in font_cache:
+        font_cache[key] = ImageFont.truetype(font_path, size_px)
+    return font_cache[key]
+
+# Helper function to get a glyph's coverage mask (uint8, line height x advance) from the atlas
+def get_glyph(char, font_path, size_px):
+    key = (font_path, size_px, char)
+    glyph = glyph_atlas.get(key)
+    if glyph is None:
+        font = get_font(font_path, size_px)
+        ascent, descent = font.getmetrics()
+        mask = Image.new('L', (max(1, int(round(font.getlength(char)))), ascent + descent), 0)
+        ImageDraw.Draw(mask).text((0, 0), char, font=font, fill=255)
+        glyph = glyph_atlas[key] = np.asarray(mask)
+    return glyph
+
+# Helper function to prefill the atlas with the characters used by price labels
+def warm_glyph_atlas(font_path, size_px, chars=ATLAS_CHARS):
+    for char in chars:
+        get_glyph(char, font_path, size_px)
+
+# Helper function to get the rounded label background for a given size, drawn once per width
+def get_label_box(width, height, radius, face_color, edge_color):
+    key = (width, height, radius, face_color, edge_color)
+    box = label_box_cache.get(key)
+    if box is None:
+        img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+        ImageDraw.Draw(img).rounded_rectangle([0, 0, width - 1, height - 1], radius=radius,
+                                              fill=face_color, outline=edge_color, width=1)
+        box = label_box_cache[key] = np.asarray(img)
+    return box
+
+# Helper function to convert a matplotlib color into an 8-bit RGBA tuple
+def to_rgba8(color):
+    return tuple(int(round(c * 255)) for c in mcolors.to_rgba(color))
+
+# Helper function to compose a text label (optionally on a rounded box) from atlas glyphs, returns an RGBA array
+def compose_label(text, font_path, size_px, color, face_color=None, edge_color=None, pad_px=0):
+    glyphs = [get_glyph(char, font_path, size_px) for char in text]
+    text_width = sum(glyph.shape[1] for glyph in glyphs)
+    line_height = glyphs[0].shape[0] if glyphs else 1
+    width, height = text_width + 2 * pad_px, line_height + 2 * pad_px
+    if face_color is not None:
+        image = get_label_box(width, height, pad_px, face_color, edge_color or face_color).copy()
+    else:
+        image = np.zeros((height, width, 4), dtype=np.uint8)
+
+    # Blend each glyph's coverage over the background
+    rgb = np.array(color[:3], dtype=np.float32)
+    x = pad_px
+    for glyph in glyphs:
+        region = image[pad_px:pad_px + line_height, x:x + glyph.shape[1]]
+        coverage = glyph[..., None].astype(np.float32) * (color[3] / (255.0 * 255.0))
+        region[..., :3] = (region[..., :3] * (1 - coverage) + rgb * coverage).astype(np.uint8)
+        region[..., 3] = np.maximum(region[..., 3], (coverage[..., 0] * 255).astype(np.uint8))
+        x += glyph.shape[1]
+    return image
+
+# Logo cache: each logo file is decoded once, and each resized copy is kept per output width
+logo_cache = {}
+LOGO_FOLDERS = {'Stock': "Logos/Stocks", 'Crypto': "Logos/Crypto"}
+
+# Helper function to get a logo resized to the given width, decoding and resizing it only once
+def get_logo(logo_path, logo_width):
+    key = (logo_path, logo_width)
+    if key not in logo_cache:
+        if logo_path not in logo_cache:
+            logo_img = Image.open(logo_path)
+            logo_img.load()
+            logo_cache[logo_path] = logo_img
+        logo_img = logo_cache[logo_path]
+        logo_cache[key] = logo_img.resize((logo_width, int(logo_img.height * (logo_width / logo_img.width))), Image.ANTIALIAS)
+    return logo_cache[key]
+
+# Helper function to find the logo file for a ticker (None when there is no logo)
+def find_logo_path(ticker_type, ticker):
+    logo_folder = LOGO_FOLDERS['Stock'] if ticker_type == "Stock" else LOGO_FOLDERS['Crypto']
+    logo_file = f"{ticker.lower()}.png"
+
+    # Special case for Saudi Aramco and Ripple
+    if ticker == "2222.SR":  # Saudi Aramco ticker
+        logo_file = "saudiaramco.png"
+    elif ticker == "XRP-USD":  # Ripple ticker
+        logo_file = "Ripple.png"
+
+    logo_path = os.path.join(logo_folder, logo_file)
+    return logo_path if os.path.exists(logo_path) else None
+
+# Output profiles: pixel size and frame rate of each deliverable, rendered side by side from shared frame state
+OUTPUT_PROFILES = {
+    'Classic': {'size': (600, 1000), 'fps': 30, 'suffix': ''},  # Original 6x10in chart, height follows Chart Height (%)
+    'Vertical 9:16': {'size': (1080, 1920), 'fps': 30, 'suffix': '_9x16'},
+    'Square 1:1': {'size': (1080, 1080), 'fps': 30, 'suffix': '_1x1'},
+    'Landscape 16:9': {'size': (1920, 1080), 'fps': 30, 'suffix': '_16x9'},
+}
+
+# Default job settings, used to fill in settings files written by hand
+DEFAULT_SETTINGS = {
+    'ticker_type': 'Stock',
+    'ticker': '',
+    'start_date': (datetime.datetime.now() - datetime.timedelta(days=365)).strftime('%Y-%m-%d'),
+    'end_date': (datetime.datetime.now() - datetime.timedelta(days=1)).strftime('%Y-%m-%d'),
+    'skip_days': 0,
+    'include_start_date': True,
+    'include_end_date': True,
+    'custom_text': '',
+    'x_ticks_interval': 1,
+    'y_ticks_interval': 10,
+    'chart_height_pct': 1.0,
+    'watermark_text': '',
+    'watermark_color': 'white',
+    'cut_initial_frames': False,
+    'profile_frames': False,
+    'output_profiles': ['Classic'],
+    'series_store': '',
+    'overlays': [],
+    'chart_style': 'Line',
+    'intro_hold': 0.0,
+    'outro_hold': 0.0,
+    'pauses': [],
+    'output_format': 'MP4',
+    'race_tickers': [],
+    'race_bars': 10,
+    'race_metric': 'Change %',
+    'race_steps': 8,
+    'encode_queue': 4,
+    'tape_seconds': 60.0,
+    'tape_speed': 2.0,
+    'background_video': '',
+    'overlay_position': 'Center',
+    'overlay_scale': 0.6,
+    'overlay_backdrop': 0.35,
+    'time_budget': 0.0,
+    'sequence_level': 6,
+    'sequence_workers': 0,
+    'sequence_start': 0,
+    'progressive': 'Off',
+    'fragment_seconds': 2.0,
+}
+
+# Function to read the job settings from the GUI
+def read_settings():
+    return {
+        'ticker_type': ticker_type_var.get(),
+        'ticker': ticker_entry.get().upper(),
+        'start_date': start_entry.get(),
+        'end_date': end_entry.get(),
+        'skip_days': int(skip_days_entry.get() or 0),
+        'include_start_date': include_start_var.get(),
+        'include_end_date': include_end_var.get(),
+        'custom_text': custom_text_box.get("1.0", tk.END).strip(),
+        'x_ticks_interval': int(x_ticks_entry.get() or 1),
+        'y_ticks_interval': int(y_ticks_entry.get() or 10),
+        'chart_height_pct': int(chart_height_entry.get() or 100) / 100,
+        'watermark_text': watermark_entry.get(),
+        'watermark_color': watermark_color_entry.get(),
+        'cut_initial_frames': cut_initial_frames_var.get(),
+        'profile_frames': profile_frames_var.get(),
+        'output_profiles': [name for name, var in output_profile_vars.items() if var.get()] or ['Classic'],
+        'series_store': series_store_entry.get().strip(),
+        'overlays': parse_overlays(overlays_entry.get()),
+        'chart_style': chart_style_var.get(),
+        'intro_hold': parse_seconds(intro_hold_entry.get(), "Intro hold"),
+        'outro_hold': parse_seconds(outro_hold_entry.get(), "Outro hold"),
+        'pauses': parse_pauses(pauses_entry.get()),
+        'output_format': output_format_var.get(),
+        'race_tickers': parse_tickers(race_tickers_entry.get()),
+        'race_bars': int(race_bars_entry.get() or 10),
+        'race_metric': race_metric_var.get(),
+        'race_steps': int(race_steps_entry.get() or 8),
+        'encode_queue': int(encode_queue_entry.get() or 0),
+        'tape_seconds': float(tape_seconds_entry.get() or 60),
+        'tape_speed': float(tape_speed_entry.get() or 2),
+        'background_video': background_video_entry.get().strip(),
+        'overlay_position': overlay_position_var.get(),
+        'overlay_scale': int(overlay_scale_entry.get() or 60) / 100,
+        'overlay_backdrop': int(overlay_backdrop_entry.get() or 35) / 100,
+        'time_budget': float(time_budget_entry.get() or 0),
+        'sequence_level': int(sequence_level_entry.get() or 6),
+        'sequence_workers': int(sequence_workers_entry.get() or 0),
+        'sequence_start': int(sequence_start_entry.get() or 0),
+        'progressive': progressive_var.get(),
+        'fragment_seconds': float(fragment_seconds_entry.get() or 2),
+    }
+
+# Function to fetch the stock/crypto data for a job
+def download_series(settings):
+    return yf.download(settings['ticker'], start=settings['start_date'], end=settings['end_date'])
+
+# Function to build the frame table for a job, from the series store if one is set, otherwise from yfinance
+def load_frame_table(settings):
+    if settings.get('chart_style') == 'Bar Race':
+        return race_frame_table(settings)
+    if settings.get('series_store'):
+        columns = load_store_columns(settings)
+    else:
+        columns = columns_from_dataframe(download_series(settings))
+    return frame_table_from_columns(settings, columns)
+
+# Function to build the frame table of a single-ticker job from its column arrays
+def frame_table_from_columns(settings, columns):
+    # Apply skip days (every skip+1th row), and cut out the first skip+1 frames if selected
+    step = settings['skip_days'] + 1
+    sample = slice(step * step if settings['cut_initial_frames'] else 0, None, step)
+    if settings.get('chart_style') == 'Candlestick':
+        table = candle_frame_table(columns, sample)
+    else:
+        table = frame_table_from_arrays(columns['timestamps'][sample], columns['close'][sample])
+    table.update(compute_overlays(columns, sample, settings.get('overlays', [])))
+    return table
+
+# Function to build the frame table for candlestick mode: each frame is one candle covering the rows it
+# stands for (open of the first row, highest high, lowest low, close of the last row)
+def candle_frame_table(columns, sample):
+    missing = [column for column in ('open', 'high', 'low') if column not in columns]
+    if missing:
+        raise ValueError(f"Candlestick charts need {', '.join(missing)} data (re-create the series store from a download)")
+    closes = columns['close']
+    starts = np.arange(len(closes))[sample]
+    if not len(starts):
+        raise ValueError("No data in the selected date range")
+    ends = np.append(starts[1:], len(closes)) - 1
+    opens = np.asarray(columns['open'][starts], dtype=np.float64)
+    highs = np.maximum.reduceat(np.asarray(columns['high'], dtype=np.float64), starts)
+    lows = np.minimum.reduceat(np.asarray(columns['low'], dtype=np.float64), starts)
+    table = frame_table_from_arrays(columns['timestamps'][starts], closes[ends])
+    table.update(open=opens, high=highs, low=lows)
+    return table
+
+# Function to pre-build the candle geometry for the whole series: one compound body path per color
+# (5 vertices per candle) and NaN-separated wick segments (3 points per candle)
+def build_candle_geometry(table):
+    dates = table['dates']
+    opens, closes, highs, lows = table['open'], table['prices'], table['high'], table['low']
+    spacing = np.diff(dates)
+    width = 0.7 * (np.min(spacing[spacing > 0]) if np.any(spacing > 0) else 1.0)
+    left, right = dates - width / 2, dates + width / 2
+    bottom, top = np.minimum(opens, closes), np.maximum(opens, closes)
+
+    body_verts = np.stack([np.column_stack([left, bottom]), np.column_stack([right, bottom]),
+                           np.column_stack([right, top]), np.column_stack([left, top]),
+                           np.column_stack([left, bottom])], axis=1)
+    body_codes = np.tile([Path.MOVETO, Path.LINETO, Path.LINETO, Path.LINETO, Path.CLOSEPOLY], len(dates)).astype(Path.code_type)
+    rising = closes >= opens
+    geometry = {}
+    for name, mask in (('up', rising), ('down', ~rising)):
+        geometry[f"{name}_verts"] = np.ascontiguousarray(body_verts[mask].reshape(-1, 2))
+        geometry[f"{name}_codes"] = body_codes[:mask.sum() * 5]
+        geometry[f"{name}_count"] = np.cumsum(mask)  # Candles of this color shown up to each frame
+
+    wick_x = np.repeat(dates, 3)
+    wick_x[2::3] = np.nan
+    geometry['wick_x'] = wick_x
+    geometry['wick_y'] = np.column_stack([lows, highs, np.full(len(dates), np.nan)]).ravel()
+    return geometry
+
+# Helper function to parse a comma or space separated ticker list (upper case, duplicates dropped)
+def parse_tickers(text):
+    return list(dict.fromkeys(ticker.upper() for ticker in text.replace(',', ' ').split()))
+
+# Function to load the closes of every race ticker as one matrix (rows = union of all timestamps, columns = tickers),
+# from <series_store>/<TICKER> stores (as written by prefetch) when a store directory is set, otherwise from yfinance
+def load_race_closes(settings):
+    tickers = settings['race_tickers']
+    if settings.get('series_store'):
+        series = [load_store_columns(dict(settings, series_store=os.path.join(settings['series_store'], ticker)))
+                  for ticker in tickers]
+        timestamps = np.unique(np.concatenate([columns['timestamps'] for columns in series]))
+        closes = np.full((len(timestamps), len(tickers)), np.nan)
+        for column, columns in enumerate(series):
+            closes[np.searchsorted(timestamps, columns['timestamps']), column] = columns['close']
+    else:
+        data = yf.download(tickers, start=settings['start_date'], end=settings['end_date'])
+        close = data['Close']
+        if isinstance(close, pd.Series):
+            close = close.to_frame(tickers[0])
+        close = close.reindex(columns=tickers)
+        index = close.index.tz_localize(None) if close.index.tz is not None else close.index
+        timestamps = index.values.astype('datetime64[ns]').astype(np.int64)
+        closes = close.to_numpy(dtype=np.float64)
+
+    # Carry each ticker's last close forward over rows where it did not trade (NaN before its first close)
+    rows = np.where(np.isnan(closes), 0, np.arange(len(closes))[:, None])
+    closes = closes[np.maximum.accumulate(rows, axis=0), np.arange(closes.shape[1])]
+    return timestamps, closes
+
+# Function to build the frame table for a bar chart race in one vectorized pass: per-row values and ranks,
+# then race_steps interpolated frames between rows (linear values, eased rank positions) and the x range of
+# the bars in view. Position 0 is the top bar; bars at position >= race_bars are out of view.
+def race_frame_table(settings):
+    if not settings['race_tickers']:
+        raise ValueError("A bar chart race needs a list of tickers")
+    timestamps, closes = load_race_closes(settings)
+    step = settings['skip_days'] + 1
+    sample = slice(step * step if settings['cut_initial_frames'] else 0, None, step)
+    timestamps, closes = timestamps[sample], closes[sample]
+    if not len(timestamps):
+        raise ValueError("No data in the selected date range")
+
+    # Values per row: price, or % change since each ticker's first close in the range
+    if settings['race_metric'] == 'Change %':
+        first_rows = np.argmax(~np.isnan(closes), axis=0)
+        values = (closes / closes[first_rows, np.arange(closes.shape[1])] - 1) * 100
+    else:
+        values = closes
+
+    # Rank per row, tickers without data yet go last
+    order = np.argsort(-np.where(np.isnan(values), -np.inf, values), axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(order.shape[1])[None, :].repeat(len(order), axis=0), axis=1)
+
+    # Interpolated frames between consecutive rows
+    steps = max(1, settings['race_steps'])
+    frame = np.arange((len(timestamps) - 1) * steps + 1)
+    row = frame // steps
+    next_row = np.minimum(row + 1, len(timestamps) - 1)
+    fraction = (frame % steps) / steps
+    eased = fraction * fraction * (3 - 2 * fraction)  # Smoothstep, so overtakes start and end gently
+    frame_values = values[row] * (1 - fraction)[:, None] + values[next_row] * fraction[:, None]
+    frame_values = np.where(np.isnan(frame_values), values[row], frame_values)  # Hold a value until the next row has one
+    positions = ranks[row] * (1 - eased)[:, None] + ranks[next_row] * eased[:, None]
+    frame_timestamps = timestamps[row] + ((timestamps[next_row] - timestamps[row]) * fraction).astype(np.int64)
+
+    # X range of the bars in view, with room for the value labels
+    in_view = np.where(positions < settings['race_bars'], np.nan_to_num(frame_values), 0)
+    low, high = np.minimum(in_view.min(axis=1), 0), np.maximum(in_view.max(axis=1), 0)
+    pad = np.maximum(high - low, 1e-9) * 0.15
+    return {
+        'timestamps': frame_timestamps,
+        'dates': frame_timestamps * (1 / 86400e9),
+        'race_values': frame_values,
+        'race_positions': positions,
+        'race_names': np.array(settings['race_tickers']),
+        'x_min': np.where(low < 0, low - pad, 0),
+        'x_max': high + pad,
+    }
+
+# Helper function to get this process's peak resident memory in MiB (None where unsupported)
+def peak_rss_mib():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024  # Bytes on macOS, KiB on Linux
+
+# Output file formats and their extensions (image sequences are written to a folder with this suffix)
+OUTPUT_FORMATS = {'MP4': '.mp4', 'GIF': '.gif', 'WebP': '.webp', 'Lottie': '.json', 'HTML': '.html',
+                  'PNG Sequence': '_png', 'TIFF Sequence': '_tiff'}
+
+# Helper function to build the output filename for a profile
+def output_filename(settings, profile_name):
+    suffix = OUTPUT_PROFILES[profile_name]['suffix']
+    extension = OUTPUT_FORMATS[settings.get('output_format', 'MP4')]
+    if settings.get('progressive') == 'HLS' and settings.get('output_format', 'MP4') == 'MP4':
+        extension = '.m3u8'  # Playlist, the segments are written next to it
+    ticker = settings['ticker']
+    if settings.get('chart_style') == 'Bar Race':
+        ticker = f"race-top{settings['race_bars']}"
+    elif settings.get('chart_style') == 'Ticker Tape':
+        ticker = f"tape-{len(settings['race_tickers'])}"
+    return f"mattyjacks-{settings['ticker_type'].lower()}-{ticker}_{settings['start_date']}_{settings['end_date']}{suffix}{extension}"
+
+# Helper function to get an output profile's figure size in pixels and its dpi
+def profile_figure(settings, profile_name):
+    profile = OUTPUT_PROFILES[profile_name]
+    width_px, height_px = profile['size']
+    if profile_name == 'Classic':
+        height_px = int(height_px * settings['chart_height_pct'])  # Adjustable chart height
+    dpi = min(profile['size']) / 6  # Shorter side is always 6in, so fonts keep the same relative size
+    return width_px, height_px, dpi
+
+# Helper function to get the chart figure size and dpi for an output: the whole frame, or when composited over
+# background footage the overlay's size, with the dpi scaled too so the chart keeps its proportions
+def chart_figure(settings, profile_name):
+    width_px, height_px, dpi = profile_figure(settings, profile_name)
+    if not settings.get('background_video'):
+        return width_px, height_px, dpi
+    scale = settings['overlay_scale']
+    return int(round(width_px * scale)), int(round(height_px * scale)), dpi * scale
+
+# Helper function to style a chart's background: black, or a translucent backdrop when composited over footage
+def apply_chart_background(settings, fig, ax):
+    fig.patch.set_facecolor('black')
+    ax.set_facecolor('black')
+    if settings.get('background_video'):
+        fig.patch.set_alpha(settings['overlay_backdrop'])
+        ax.patch.set_alpha(0)
+
+# Tick engine: tick positions and labels for every frame are worked out up front from the frame's axis range.
+# Steps are "nice" (1, 2, 2.5, 5 x 10^n for values, day/month/year steps for dates), never finer than the
+# user's interval when that still leaves two ticks, and never more than the axis has room for (hard cap
+# MAX_TICKS). Consecutive frames with the same ticks form a run, and positions and labels are built once per run.
+MAX_TICKS = 10
+NICE_MULTIPLIERS = np.array([1, 2, 2.5, 5, 10])
+DATE_STEPS = [('D', 1), ('D', 2), ('D', 7), ('D', 14)] + [('M', months) for months in (1, 2, 3, 6, 12, 24, 60, 120, 240, 600)]
+
+# Helper function to get how many ticks fit along an axis of the given pixel length
+def tick_budget(axis_px, label_px):
+    return int(np.clip(axis_px // max(label_px, 1), 2, MAX_TICKS))
+
+# Helper function to group frames into runs with the same tick key, build each run's ticks once with
+# make_ticks(*key), and return (run index per frame, [(positions, labels) per run])
+def tick_runs(keys, make_ticks):
+    keys = np.column_stack(keys)
+    changed = np.ones(len(keys), dtype=bool)
+    changed[1:] = np.any(keys[1:] != keys[:-1], axis=1)
+    return np.cumsum(changed) - 1, [make_ticks(*key) for key in keys[changed]]
+
+# Helper function to get the decimals needed to print multiples of a step exactly
+def step_decimals(step):
+    return next((decimals for decimals in range(9) if abs(round(step, decimals) - step) <= step * 1e-6), 9)
+
+# Function to precompute value-axis ticks per frame from the frame limits
+def value_tick_runs(lows, highs, max_ticks, format_value, minimum=0):
+    spans = np.maximum(highs - lows, 1e-12)
+    raw = spans / max(max_ticks - 1, 1)
+    magnitude = 10.0 ** np.floor(np.log10(raw))
+    steps = NICE_MULTIPLIERS[np.argmax(NICE_MULTIPLIERS[None, :] >= (raw / magnitude)[:, None] - 1e-9, axis=1)] * magnitude
+
+    # The user's interval wins when it is coarser and still leaves two ticks in view
+    if minimum:
+        coarse = np.maximum(steps, minimum)
+        steps = np.where(np.floor(highs / coarse) - np.ceil(lows / coarse) >= 1, coarse, steps)
+    first, last = np.ceil(lows / steps - 1e-9), np.floor(highs / steps + 1e-9)
+
+    def make_ticks(step, first, last):
+        positions = np.arange(first, last + 1) * step
+        decimals = step_decimals(step)
+        return positions, [format_value(position, decimals) for position in positions]
+    return tick_runs((steps, first, last), make_ticks)
+
+# Function to precompute date-axis ticks per frame (dates as matplotlib day numbers): day steps for short
+# ranges, then month steps starting at the user's month interval; day labels '%b %d', months '%Y-%m', years '%Y'
+def date_tick_runs(lows, highs, max_ticks, min_months=1):
+    steps = [(unit, count) for unit, count in DATE_STEPS if unit == 'D' or count >= min_months]
+    spans = highs - lows
+    choice = np.full(len(lows), len(steps) - 1)
+    for index in reversed(range(len(steps))):
+        unit, count = steps[index]
+        step_days = count if unit == 'D' else count * 28  # Shortest month, so the tick count is never above budget
+        choice = np.where(spans / step_days <= max_ticks - 1, index, choice)
+    units = np.array([unit == 'M' for unit, count in steps])[choice]
+    counts = np.array([count for unit, count in steps])[choice]
+
+    # Tick index range per frame: days since the epoch, or months since 1970-01 at month starts
+    day_lo, day_hi = np.floor(lows).astype(np.int64), np.floor(highs).astype(np.int64)
+    month_lo = day_lo.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    month_lo += month_lo.astype('datetime64[M]').astype('datetime64[D]').astype(np.float64) < lows
+    month_hi = day_hi.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    first = np.where(units, -(-month_lo // counts), np.ceil(lows / counts))
+    last = np.where(units, month_hi // counts, np.floor(highs / counts))
+
+    def make_ticks(months, count, first, last):
+        index = np.arange(first, last + 1, dtype=np.int64) * int(count)
+        if months:
+            days = index.astype('datetime64[M]').astype('datetime64[D]')
+            label_format = '%Y' if count % 12 == 0 else '%Y-%m'
+        else:
+            days = index.astype('datetime64[D]')
+            label_format = '%b %d'
+        labels = [day.astype(datetime.date).strftime(label_format) for day in days]
+        return days.astype(np.float64), labels
+    return tick_runs((units, counts, first, last), make_ticks)
+
+# Helper function to format a price-axis tick
+def format_price_tick(value, decimals):
+    return f"{value:,.{decimals}f}"
+
+# Function to build one output's figure and return it with its per-frame draw function
+def setup_chart(settings, table, profile_name):
+    ticker_type = settings['ticker_type']
+    ticker = settings['ticker']
+    width_px, height_px, dpi = chart_figure(settings, profile_name)
+
+    dates = table['dates']
+    prices = table['prices']
+    chunk_at = make_frame_chunks(table)
+
+    # Format the start and end dates
+    formatted_start_date = format_date(settings['start_date'])
+    formatted_end_date = format_date(settings['end_date'])
+
+    # Generate animation using Matplotlib
+    fig, ax = plt.subplots(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
+    apply_chart_background(settings, fig, ax)
+    ax.set_title(f'{ticker_type} Ticker: {ticker}', fontsize=16, color='white', pad=30)
+    ax.set_xlabel('Date', color='white')
+    ax.set_ylabel('Price', color='white')
+
+    # Fonts for atlas-rendered text, sized in output pixels
+    regular_font = find_font_path()
+    bold_font = find_font_path('bold')
+    header_size_px = int(round(12 * fig.dpi / 72))
+    label_size_px = int(round(14 * fig.dpi / 72))
+    label_pad_px = int(round(0.5 * label_size_px))  # Same as boxstyle 'round,pad=0.5'
+    warm_glyph_atlas(bold_font, label_size_px)
+
+    # Display start and end dates at the top, composed once from the glyph atlas
+    header_lines = []
+    if settings['include_start_date']:
+        header_lines.append((0.95, f"Start Date: {formatted_start_date}"))
+    if settings['include_end_date']:
+        header_lines.append((0.92, f"End Date: {formatted_end_date}"))
+    for y_frac, header_text in header_lines:
+        header_img = compose_label(header_text, regular_font, header_size_px, to_rgba8('white'))
+        fig.figimage(header_img, xo=int(fig.bbox.width / 2 - header_img.shape[1] / 2),
+                     yo=int(fig.bbox.height * y_frac - header_img.shape[0] / 2), origin='upper')
+    
+    # Display custom text if provided
+    if settings['custom_text']:
+        fig.text(0.5, 0.89, settings['custom_text'], ha='center', va='center', color='white', fontsize=12)
+
+    # Display watermark if provided
+    if settings['watermark_text']:
+        fig.text(0.5, 0.5, settings['watermark_text'], ha='center', va='center', color=settings['watermark_color'], fontsize=40, alpha=0.5)
+
+    # Load the logo based on ticker type, if there is one
+    logo_path = find_logo_path(ticker_type, ticker)
+    if logo_path:
+        logo_width = int(500 * fig.dpi / 100)  # 500px at the classic 100 dpi
+        logo_img = get_logo(logo_path, logo_width)
+
+        # Display the logo below the chart
+        fig.figimage(logo_img, xo=fig.bbox.xmax // 2 - logo_width // 2, yo=fig.bbox.ymin + 20)  # Position below chart
+    
+    # Persistent artists, only their data changes per frame
+    candles = settings.get('chart_style') == 'Candlestick'
+    line, = ax.plot([], [], color='green', visible=not candles)
+    if candles:
+        # Candle bodies are one compound path per color, each frame shows a longer prefix of the same arrays
+        geometry = build_candle_geometry(table)
+        wick_line, = ax.plot([], [], color='white', linewidth=0.8, zorder=1)
+        candle_bodies = {}
+        for name, color in (('up', 'green'), ('down', 'red')):
+            candle_bodies[name] = PathCollection([], facecolors=color, edgecolors=color, linewidths=0.5, transform=ax.transData, zorder=2)
+            ax.add_collection(candle_bodies[name], autolim=False)
+    price_label = fig.figimage(np.zeros((1, 1, 4), dtype=np.uint8), origin='upper', zorder=3)
+    label_color = to_rgba8('black')
+    label_face, label_edge = to_rgba8('yellow'), to_rgba8('white')
+
+    # Price label anchor in figure pixels (right edge, vertical center)
+    ax_x0, ax_y0, ax_width, ax_height = ax.bbox.bounds
+
+    # Indicator overlays: persistent lines over precomputed arrays (x, y, points per frame), each frame only grows the slice
+    overlay_lines = []
+    volume_axis = None
+    colors = iter(OVERLAY_COLORS * 4)
+    for overlay in settings.get('overlays', []):
+        key = overlay_key(overlay)
+        if overlay == 'Volume':
+            # Bars as NaN-separated vertical segments of one line, on a hidden twin axis under the price line
+            volume_axis = ax.twinx()
+            volume_axis.set_yticks([])
+            ax.set_zorder(volume_axis.get_zorder() + 1)  # Keep the price line on top of the bars
+            ax.patch.set_visible(False)
+            volume_top = table[f"{key}_top"]
+            volume_x = np.repeat(dates, 3)
+            volume_y = np.column_stack([np.zeros(len(dates)), table[key], np.full(len(dates), np.nan)]).ravel()
+            volume_x[2::3] = np.nan
+            volume_line, = volume_axis.plot([], [], color='gray', alpha=0.6, linewidth=2, solid_capstyle='butt')
+            overlay_lines.append((volume_line, volume_x, volume_y, 3))
+        elif overlay.startswith('SMA'):
+            sma_line, = ax.plot([], [], color=next(colors), linewidth=1.2, label=overlay)
+            overlay_lines.append((sma_line, dates, table[key], 1))
+        else:
+            band_color = next(colors)
+            upper_line, = ax.plot([], [], color=band_color, linewidth=0.8, linestyle='--', label=overlay)
+            lower_line, = ax.plot([], [], color=band_color, linewidth=0.8, linestyle='--')
+            overlay_lines.append((upper_line, dates, table[f"{key}_upper"], 1))
+            overlay_lines.append((lower_line, dates, table[f"{key}_lower"], 1))
+    if any(overlay != 'Volume' for overlay in settings.get('overlays', [])):
+        ax.legend(loc='upper left', fontsize=9, facecolor='black', edgecolor='gray', labelcolor='white')
+
+    # Ticks are precomputed for each chunk of frames, sized to this output's axes (x labels are about 6em wide,
+    # y labels need 2.5em)
+    tick_font_px = plt.rcParams['font.size'] * fig.dpi / 72
+    x_budget, y_budget = tick_budget(ax.bbox.width, 6 * tick_font_px), tick_budget(ax.bbox.height, 2.5 * tick_font_px)
+    ticks = {'chunk': None}
+    ax.tick_params(axis='x', colors='white')
+    ax.tick_params(axis='y', colors='white')
+
+    def draw_frame(frame):
+        if candles:
+            wick_line.set_data(geometry['wick_x'][:(frame + 1) * 3], geometry['wick_y'][:(frame + 1) * 3])
+            for name, bodies in candle_bodies.items():
+                points = geometry[f"{name}_count"][frame] * 5
+                bodies.set_paths([Path(geometry[f"{name}_verts"][:points], geometry[f"{name}_codes"][:points])] if points else [])
+        else:
+            line.set_data(dates[:frame + 1], prices[:frame + 1])
+        limits, i = chunk_at(frame)
+        ax.set_xlim(limits['x_min'][i], limits['x_max'][i])
+        ax.set_ylim(limits['y_min'][i], limits['y_max'][i])
+        if ticks['chunk'] is not limits:
+            ticks.update(chunk=limits, shown_x=-1, shown_y=-1)
+            ticks['x_runs'], ticks['x_sets'] = date_tick_runs(limits['x_min'], limits['x_max'], x_budget, settings['x_ticks_interval'])
+            ticks['y_runs'], ticks['y_sets'] = value_tick_runs(limits['y_min'], limits['y_max'], y_budget, format_price_tick,
+                                                               settings['y_ticks_interval'])
+        if ticks['x_runs'][i] != ticks['shown_x']:
+            ticks['shown_x'] = ticks['x_runs'][i]
+            ax.set_xticks(*ticks['x_sets'][ticks['shown_x']])
+        if ticks['y_runs'][i] != ticks['shown_y']:
+            ticks['shown_y'] = ticks['y_runs'][i]
+            ax.set_yticks(*ticks['y_sets'][ticks['shown_y']])
+        for overlay_line, overlay_x, overlay_y, points in overlay_lines:
+            overlay_line.set_data(overlay_x[:(frame + 1) * points], overlay_y[:(frame + 1) * points])
+        if volume_axis is not None:
+            volume_axis.set_ylim(0, volume_top[frame] or 1)
+
+        # Display the current stock price next to the line, composed from cached glyphs
+        label_img = compose_label(f"${prices[frame]:.2f}", bold_font, label_size_px, label_color,
+                                  label_face, label_edge, label_pad_px)
+        price_label.set_data(label_img)
+        price_label.ox = int(round(ax_x0 + limits['label_x'][i] * ax_width)) - label_img.shape[1]
+        price_label.oy = int(round(ax_y0 + limits['label_y'][i] * ax_height)) - label_img.shape[0] // 2
+
+    return fig, draw_frame
+
+# Function to build one output's figure for a bar chart race: one collection holds the bars in view, and a small
+# pool of text artists is handed to whichever tickers are in view each frame
+def setup_race_chart(settings, table, profile_name):
+    width_px, height_px, dpi = chart_figure(settings, profile_name)
+    values, positions, names = table['race_values'], table['race_positions'], table['race_names']
+    x_min, x_max = table['x_min'], table['x_max']
+    bar_count = settings['race_bars']
+    percent = settings['race_metric'] == 'Change %'
+    days = np.datetime_as_string(table['timestamps'].astype('datetime64[ns]'), unit='D')
+
+    fig, ax = plt.subplots(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
+    apply_chart_background(settings, fig, ax)
+    ax.set_title(f"Top {bar_count} {settings['ticker_type']} Tickers by {'Price Change' if percent else 'Price'}",
+                 fontsize=16, color='white', pad=30)
+    ax.set_ylim(bar_count - 0.5, -0.5)  # Position 0 at the top
+    ax.set_yticks([])
+    ax.tick_params(axis='x', colors='white')
+    for side in ('top', 'right', 'left'):
+        ax.spines[side].set_visible(False)
+
+    # Display custom text and watermark if provided
+    if settings['custom_text']:
+        fig.text(0.5, 0.89, settings['custom_text'], ha='center', va='center', color='white', fontsize=12)
+    if settings['watermark_text']:
+        fig.text(0.5, 0.5, settings['watermark_text'], ha='center', va='center', color=settings['watermark_color'], fontsize=40, alpha=0.5)
+
+    # Persistent artists: the bars, a name and value label per bar slot, and the date
+    colors = plt.get_cmap('tab20')(np.arange(len(names)) % 20)
+    bars = PolyCollection([], edgecolors='none')
+    ax.add_collection(bars, autolim=False)
+    slots = [(ax.text(0, 0, '', ha='right', va='center', color='black', fontsize=10, fontweight='bold', visible=False, clip_on=True),
+              ax.text(0, 0, '', ha='left', va='center', color='white', fontsize=10, visible=False, clip_on=True))
+             for _ in range(bar_count + 2)]  # Bars sliding in and out can briefly make bar_count + 2 visible
+    date_text = ax.text(0.97, 0.04, '', transform=ax.transAxes, ha='right', va='bottom', fontsize=28, color='gray')
+    bar_verts = np.zeros((len(names), 4, 2))
+
+    # Precompute the value ticks of every frame
+    format_value = (lambda value, decimals: f"{value:+,.{decimals}f}%") if percent else (lambda value, decimals: f"${value:,.{decimals}f}")
+    tick_font_px = plt.rcParams['font.size'] * fig.dpi / 72
+    x_tick_runs, x_tick_sets = value_tick_runs(x_min, x_max, tick_budget(ax.bbox.width, 6 * tick_font_px), format_value)
+    shown_run = [-1]
+
+    def draw_frame(frame):
+        frame_values = np.nan_to_num(values[frame])
+        frame_positions = positions[frame]
+        in_view = np.flatnonzero(frame_positions < bar_count + 0.5)
+        in_view = in_view[np.argsort(frame_positions[in_view])]
+
+        # Bar rectangles for the bars in view, in one vectorized update
+        bar_verts[:, 1:3, 0] = frame_values[:, None]
+        bar_verts[:, :2, 1] = frame_positions[:, None] + 0.4
+        bar_verts[:, 2:, 1] = frame_positions[:, None] - 0.4
+        bars.set_verts(bar_verts[in_view])
+        bars.set_facecolor(colors[in_view])
+
+        # Name inside the bar end and value just past it (mirrored for negative values)
+        for slot, (name_text, value_text) in enumerate(slots):
+            if slot >= len(in_view) or np.isnan(values[frame, in_view[slot]]):
+                name_text.set_visible(False)
+                value_text.set_visible(False)
+                continue
+            column = in_view[slot]
+            value, position = frame_values[column], frame_positions[column]
+            name_text.set(x=value, y=position, text=names[column], ha='right' if value >= 0 else 'left', visible=True)
+            value_text.set(x=value, y=position, text=f" {value:+.1f}% " if percent else f" ${value:,.2f} ",
+                           ha='left' if value >= 0 else 'right', visible=True)
+
+        ax.set_xlim(x_min[frame], x_max[frame])
+        if x_tick_runs[frame] != shown_run[0]:
+            shown_run[0] = x_tick_runs[frame]
+            ax.set_xticks(*x_tick_sets[shown_run[0]])
+        date_text.set_text(days[frame])
+
+    return fig, draw_frame
+
+# Helper function to rasterize a figure to an RGBA array at the given dpi
+def rasterize(fig, dpi):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='rgba', dpi=dpi)
+    width, height = fig.get_size_inches()
+    return np.frombuffer(buffer.getbuffer(), dtype=np.uint8).reshape(int(height * dpi), int(width * dpi), 4)
+
+# Function to build one palette for a whole clip from its first and last frames (the last frame has the
+# full line, every overlay, the label, title and logo; earlier frames only use the same colors)
+def build_clip_palette(fig, draw_frame, frames, dpi, colors=255):
+    samples = []
+    for frame in (frames[-1], frames[0]):
+        draw_frame(frame)
+        samples.append(rasterize(fig, dpi)[..., :3].reshape(-1, 3))
+    pixels = np.concatenate(samples)
+    quantized = Image.fromarray(pixels.reshape(1, -1, 3)).quantize(colors=colors, method=Image.MEDIANCUT)
+    palette = np.zeros((colors, 3), dtype=np.uint8)
+    used = np.array(quantized.getpalette()[:colors * 3], dtype=np.uint8).reshape(-1, 3)
+    palette[:len(used)] = used
+    return palette
+
+# Helper function to map every 5-bit-per-channel RGB cell to its nearest palette index, done once per clip
+def palette_lookup(palette):
+    levels = np.arange(32, dtype=np.float32) * 8 + 4
+    cells = np.stack(np.meshgrid(levels, levels, levels, indexing='ij'), axis=-1).reshape(-1, 3)
+    colors = palette.astype(np.float32)
+    lookup = np.empty(len(cells), dtype=np.uint8)
+    for start in range(0, len(cells), 4096):
+        distances = ((cells[start:start + 4096, None, :] - colors[None, :, :]) ** 2).sum(axis=-1)
+        lookup[start:start + 4096] = distances.argmin(axis=1)
+    return lookup
+
+# Animated GIF writer (a matplotlib movie writer): one global palette for the whole clip, frames quantized with
+# a NumPy lookup table, and only the rectangle that changed since the previous frame stored, with unchanged
+# pixels inside it left transparent. Identical frames and holds just lengthen the previous frame's delay.
+class PaletteGifWriter(AbstractMovieWriter):
+    TRANSPARENT = 255  # Palette index reserved for "keep the previous pixel"
+
+    def __init__(self, fps=30, palette=None):
+        super().__init__(fps=fps)
+        self.palette = palette
+
+    def setup(self, fig, outfile, dpi=None):
+        super().setup(fig, outfile, dpi)
+        self.lookup = palette_lookup(self.palette)
+        self.previous = None
+        self.pending = None
+        self.clock = 0  # Frames of output time written or pending
+        self.pending_start = 0
+
+        # Header, global color table (index 255 stays black) and NETSCAPE2.0 loop-forever extension
+        width, height = self.frame_size
+        color_table = np.zeros((256, 3), dtype=np.uint8)
+        color_table[:len(self.palette)] = self.palette
+        self.file = open(outfile, 'wb')
+        self.file.write(b'GIF89a' + width.to_bytes(2, 'little') + height.to_bytes(2, 'little') + bytes([0xF7, 0, 0]))
+        self.file.write(color_table.tobytes())
+        self.file.write(b'!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00')
+
+    def grab_frame(self, repeats=1, **savefig_kwargs):
+        self.write_frame(rasterize(self.fig, self.dpi), repeats)
+
+    def write_frame(self, rgba, repeats=1):
+        keys = ((rgba[..., 0].astype(np.uint32) >> 3) << 10) | ((rgba[..., 1].astype(np.uint32) >> 3) << 5) | (rgba[..., 2] >> 3)
+        indexed = self.lookup[keys]
+
+        if self.previous is None:
+            top, bottom, left, right = 0, indexed.shape[0], 0, indexed.shape[1]
+            rect = indexed
+        else:
+            changed = indexed != self.previous
+            rows, cols = np.flatnonzero(changed.any(axis=1)), np.flatnonzero(changed.any(axis=0))
+            if not len(rows):
+                self.clock += repeats
+                return
+            top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+            rect = np.where(changed[top:bottom, left:right], indexed[top:bottom, left:right], self.TRANSPARENT).astype(np.uint8)
+
+        self.flush_pending()
+        self.pending = (Image.frombytes('P', (right - left, bottom - top), np.ascontiguousarray(rect).tobytes()), (int(left), int(top)))
+        self.pending_start = self.clock
+        self.clock += repeats
+        self.previous = indexed
+
+    def flush_pending(self):
+        if self.pending is None:
+            return
+        # Delays in hundredths of a second, rounded on the running clock so they never drift
+        start = round(self.pending_start * 100 / self.fps)
+        end = round(self.clock * 100 / self.fps)
+        image, offset = self.pending
+        for chunk in GifImagePlugin.getdata(image, offset, duration=max(end - start, 2) * 10, disposal=1, transparency=self.TRANSPARENT):
+            self.file.write(chunk)
+        self.pending = None
+
+    def finish(self):
+        self.flush_pending()
+        self.file.write(b';')
+        self.file.close()
+
+# Image sequence formats (Pillow format, file extension and save options for a compression level 0-9;
+# Pillow's TIFF deflate has no level setting)
+SEQUENCE_FORMATS = {
+    'PNG Sequence': ('PNG', '.png', lambda level: {'compress_level': level}),
+    'TIFF Sequence': ('TIFF', '.tif', lambda level: {'compression': 'tiff_adobe_deflate'}),
+}
+SEQUENCE_MANIFEST_VERSION = 1
+
+# Movie writer for lossless image sequences: each frame is compressed on a thread pool (zlib releases the GIL,
+# so the workers use every core while the main thread draws the next frame) and written as a numbered file in
+# the output folder, with manifest.json describing the sequence. Holds write the same compressed bytes again.
+# At most two frames per worker are in flight, so the renderer waits instead of piling up frames in memory.
+class ImageSequenceWriter(AbstractMovieWriter):
+    def __init__(self, fps=30, sequence_format='PNG Sequence', level=6, workers=0, start_number=0, metadata=None):
+        super().__init__(fps=fps, metadata=metadata)
+        self.image_format, self.extension, save_options = SEQUENCE_FORMATS[sequence_format]
+        self.save_options = save_options(level)
+        self.level = level
+        self.workers = workers or os.cpu_count() or 1
+        self.start_number = start_number
+
+    def setup(self, fig, outfile, dpi=None):
+        super().setup(fig, outfile, dpi)
+        os.makedirs(outfile, exist_ok=True)
+        for name in os.listdir(outfile):  # Frames left over from an earlier, longer render of the same output
+            if name.startswith('frame_') and name.endswith(self.extension):
+                os.remove(os.path.join(outfile, name))
+        self.pool = concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix='sequence')
+        self.slots = threading.Semaphore(2 * self.workers)
+        self.futures = []
+        self.frame_number = self.start_number
+
+    def frame_name(self, number):
+        return f"frame_{number:06d}{self.extension}"
+
+    def grab_frame(self, repeats=1, **savefig_kwargs):
+        self.write_frame(rasterize(self.fig, self.dpi), repeats)
+
+    def write_frame(self, rgba, repeats=1):
+        self.slots.acquire()
+        names = [self.frame_name(number) for number in range(self.frame_number, self.frame_number + int(repeats))]
+        self.frame_number += int(repeats)
+        # Copy the opaque color channels, the caller may reuse its buffer as soon as this returns
+        self.futures.append(self.pool.submit(self.compress, np.ascontiguousarray(rgba[..., :3]), names))
+
+        # Forget finished frames, raising the first error as soon as it shows up
+        pending = []
+        for future in self.futures:
+            if future.done():
+                future.result()
+            else:
+                pending.append(future)
+        self.futures = pending
+
+    def compress(self, rgb, names):
+        try:
+            buffer = io.BytesIO()
+            Image.fromarray(rgb).save(buffer, format=self.image_format, **self.save_options)
+            for name in names:
+                with open(os.path.join(self.outfile, name), 'wb') as f:
+                    f.write(buffer.getbuffer())
+        finally:
+            self.slots.release()
+
+    def finish(self):
+        self.pool.shutdown(wait=True)
+        for future in self.futures:
+            future.result()  # Raise the first compression or write error
+        width, height = self.frame_size
+        manifest = {
+            'version': SEQUENCE_MANIFEST_VERSION,
+            'format': self.image_format,
+            'fps': self.fps,
+            'width': width,
+            'height': height,
+            'compression_level': self.level,
+            'first_frame': self.start_number,
+            'frame_count': self.frame_number - self.start_number,
+            'pattern': f"frame_%06d{self.extension}",
+            'metadata': self.metadata,
+        }
+        with open(os.path.join(self.outfile, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+# ffmpeg output arguments for frames piped in by our own writers
+FFMPEG_CODEC_ARGS = {
+    'MP4': ['-c:v', 'libx264', '-pix_fmt', 'yuv420p'],
+    'WebP': ['-c:v', 'libwebp_anim', '-loop', '0', '-quality', '80'],
+}
+OVERLAY_POSITIONS = ['Center', 'Top Left', 'Top Right', 'Bottom Left', 'Bottom Right']
+
+# Progressive MP4 output, viewable while the render is still running: a fixed keyframe interval, with either a
+# fragmented MP4 (a fragment is flushed at every keyframe, after an empty moov at the start) or an HLS event
+# playlist whose segments are listed as soon as they are complete
+PROGRESSIVE_MODES = ['Off', 'Fragmented MP4', 'HLS']
+
+# Helper function to get the extra ffmpeg output arguments of a progressive mode
+def progressive_args(settings, fps, filename):
+    mode = settings.get('progressive', 'Off')
+    if mode == 'Off':
+        return []
+    seconds = max(settings['fragment_seconds'], 1 / fps)
+    keyframe_interval = str(max(1, int(round(seconds * fps))))
+    args = ['-g', keyframe_interval, '-keyint_min', keyframe_interval, '-sc_threshold', '0', '-flush_packets', '1']
+    if mode == 'Fragmented MP4':
+        return args + ['-movflags', '+frag_keyframe+empty_moov+default_base_moof']
+    return args + ['-f', 'hls', '-hls_time', f"{seconds:g}", '-hls_playlist_type', 'event', '-hls_flags', 'independent_segments',
+                   '-hls_segment_filename', hls_segment_pattern(filename)]
+
+# Helper function to get the segment file pattern of an HLS playlist (segments sit next to it)
+def hls_segment_pattern(filename):
+    return f"{os.path.splitext(filename)[0]}_%05d.ts"
+
+# Movie writer that composites chart frames over background footage in one streaming pass: one ffmpeg process
+# decodes the (looped, scaled and cropped) background into raw frames, each chart frame is alpha-blended onto
+# the next background frame, and a second ffmpeg process encodes the result together with the background audio
+# (MP4 only, WebP has no audio stream).
+# Only the current background frame is held in memory, and nothing is written besides the output file.
+class BackgroundOverlayWriter(AbstractMovieWriter):
+    def __init__(self, fps, background, output_size, position='Center', codec_args=FFMPEG_CODEC_ARGS['MP4'], audio=True):
+        super().__init__(fps=fps)
+        self.background = background
+        self.output_size = output_size
+        self.position = position
+        self.codec_args = codec_args
+        self.audio = audio
+
+    def setup(self, fig, outfile, dpi=None):
+        super().setup(fig, outfile, dpi)
+        width, height = self.output_size
+        ffmpeg_path = matplotlib.rcParams['animation.ffmpeg_path']
+        self.decoder = subprocess.Popen([ffmpeg_path, '-loglevel', 'error', '-stream_loop', '-1', '-i', self.background,
+                                         '-vf', f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height},fps={self.fps}",
+                                         '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-'], stdout=subprocess.PIPE)
+        audio_args = ['-stream_loop', '-1', '-i', self.background, '-map', '0:v', '-map', '1:a?', '-shortest'] if self.audio else ['-an']
+        self.encoder = subprocess.Popen([ffmpeg_path, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                                         '-s', f"{width}x{height}", '-r', str(self.fps), '-i', '-',
+                                         *audio_args, *self.codec_args, outfile], stdin=subprocess.PIPE)
+        self.frame = np.empty((height, width, 3), dtype=np.uint8)
+
+        # Chart placement with a margin of 3% of the output width
+        chart_width, chart_height = self.frame_size
+        margin = int(width * 0.03)
+        self.left = {'Left': margin, 'Right': width - chart_width - margin}.get(self.position.split()[-1], (width - chart_width) // 2)
+        self.top = {'Top': margin, 'Bottom': height - chart_height - margin}.get(self.position.split()[0], (height - chart_height) // 2)
+        self.left, self.top = max(0, self.left), max(0, self.top)
+
+    def read_background(self):
+        view = memoryview(self.frame).cast('B')
+        filled = 0
+        while filled < len(view):
+            count = self.decoder.stdout.readinto(view[filled:])
+            if not count:
+                raise RuntimeError(f"Could not decode a frame from background video {self.background}")
+            filled += count
+
+    def grab_frame(self, repeats=1, **savefig_kwargs):
+        self.write_frame(rasterize(self.fig, self.dpi), repeats)
+
+    def write_frame(self, rgba, repeats=1):
+        # Straight alpha blend in integer arithmetic, the chart terms are shared by every repeat
+        height, width = self.frame.shape[:2]
+        rgba = rgba[:height - self.top, :width - self.left]
+        alpha = rgba[..., 3:].astype(np.uint16)
+        chart = rgba[..., :3] * alpha + 127
+        inverse = 255 - alpha
+        for _ in range(repeats):
+            self.read_background()  # The footage keeps playing through holds
+            region = self.frame[self.top:self.top + rgba.shape[0], self.left:self.left + rgba.shape[1]]
+            region[...] = (chart + region * inverse) // 255
+            self.encoder.stdin.write(self.frame.data)
+
+    def finish(self):
+        self.encoder.stdin.close()
+        self.decoder.kill()
+        self.decoder.wait()
+        if self.encoder.wait():
+            raise RuntimeError(f"ffmpeg failed with exit code {self.encoder.returncode} while encoding {self.outfile}")
+
+# Helper function to make the movie writer of one output (filename is needed for HLS segment names)
+def make_writer(settings, profile_name, filename=''):
+    output_format = settings.get('output_format', 'MP4')
+    fps = OUTPUT_PROFILES[profile_name]['fps']
+    extra_args = progressive_args(settings, fps, filename)
+    if extra_args and output_format != 'MP4':
+        raise ValueError("Progressive output is only available for MP4")
+    if settings.get('background_video'):
+        if output_format not in FFMPEG_CODEC_ARGS:
+            raise ValueError("Charts over background footage are rendered as MP4 or WebP")
+        width_px, height_px, dpi = profile_figure(settings, profile_name)
+        return BackgroundOverlayWriter(fps, settings['background_video'], (width_px // 2 * 2, height_px // 2 * 2),
+                                       settings.get('overlay_position', 'Center'), FFMPEG_CODEC_ARGS[output_format] + extra_args,
+                                       audio=output_format == 'MP4')
+    if output_format == 'GIF':
+        return PaletteGifWriter(fps=fps)
+    if output_format in SEQUENCE_FORMATS:
+        metadata = {'ticker': settings['ticker'], 'start_date': settings['start_date'], 'end_date': settings['end_date'],
+                    'profile': profile_name}
+        return ImageSequenceWriter(fps, output_format, settings['sequence_level'], settings['sequence_workers'],
+                                   settings['sequence_start'], metadata)
+    if output_format == 'WebP':
+        return FFMpegWriter(fps=fps, codec='libwebp_anim', extra_args=['-loop', '0', '-quality', '80'])
+    if extra_args:
+        return FFMpegWriter(fps=fps, extra_args=['-pix_fmt', 'yuv420p'] + extra_args)
+    return FFMpegWriter(fps=fps)
+
+# Helper function to parse pause directives, e.g. "2023-06-01 1.5, 2024-01-02 1" -> [['2023-06-01', 1.5], ...]
+def parse_pauses(text):
+    pauses = []
+    for item in text.replace(';', ',').split(','):
+        parts = item.split()
+        if not parts:
+            continue
+        try:
+            datetime.datetime.strptime(parts[0], '%Y-%m-%d')
+            seconds = float(parts[1]) if len(parts) > 1 else 1.0
+        except (ValueError, IndexError):
+            raise ValueError(f"Bad pause '{item.strip()}', use YYYY-MM-DD seconds")
+        pauses.append([parts[0], parse_seconds(seconds, f"Pause on {parts[0]}")])
+    return pauses
+
+# Helper function to check a hold length in seconds (empty = 0), a negative hold would drop frames instead
+def parse_seconds(value, name):
+    seconds = float(value or 0)
+    if not seconds >= 0:
+        raise ValueError(f"{name} must be 0 or more seconds, got {value!r}")
+    return seconds
+
+# Function to work out the timeline directives as extra seconds to hold on each frame
+# (intro hold on the first frame, outro hold on the last, pauses on the first frame at or after their date)
+def timeline_holds(settings, table):
+    timestamps = table['timestamps']
+    holds = np.zeros(len(timestamps))
+    if len(holds):
+        holds[0] += settings.get('intro_hold', 0)
+        holds[-1] += settings.get('outro_hold', 0)
+        for date, seconds in settings.get('pauses', []):
+            frame = np.searchsorted(timestamps, np.datetime64(date, 'ns').astype(np.int64))
+            if frame < len(holds):
+                holds[frame] += seconds
+    return holds
+
+# Helper function to get the stdin pipe of an FFMpegWriter's ffmpeg process. matplotlib keeps the process in the
+# private _proc attribute, so this returns None when it isn't there and callers fall back to writer.grab_frame()
+def ffmpeg_stdin(writer):
+    return getattr(getattr(writer, '_proc', None), 'stdin', None)
+
+# Helper function to grab a frame and write it `repeats` times: the figure is drawn once and the same
+# pixels are piped to ffmpeg again, so holds cost no extra draw calls
+def grab_frame_repeated(writer, repeats):
+    if isinstance(writer, (PaletteGifWriter, BackgroundOverlayWriter, ImageSequenceWriter)):
+        writer.grab_frame(repeats=repeats)  # These writers handle holds themselves
+        return
+    stdin = ffmpeg_stdin(writer)
+    if repeats == 1 or stdin is None:
+        for _ in range(repeats):
+            writer.grab_frame()
+        return
+    buffer = io.BytesIO()
+    writer.fig.savefig(buffer, format=writer.frame_format, dpi=writer.dpi)
+    frame_bytes = buffer.getbuffer()
+    for _ in range(repeats):
+        stdin.write(frame_bytes)
+
+# Helper function to draw a figure into a preallocated RGBA buffer (the same pixels savefig writes for 'rgba')
+def rasterize_into(fig, out):
+    fig.canvas.draw()
+    out[...] = np.asarray(fig.canvas.buffer_rgba())
+
+# Function to start the encoder thread of one writer, fed through a ring of `depth` preallocated frame buffers.
+# submit(fig, repeats) rasterizes into a free buffer and returns the seconds it waited for one (backpressure
+# when the encoder falls behind); the thread pipes frames to ffmpeg, or quantizes them for GIF, meanwhile.
+def start_encoder(writer, depth):
+    stdin = ffmpeg_stdin(writer)
+    if stdin is None and not hasattr(writer, 'write_frame'):
+        # No ffmpeg pipe to hand raw frames to, so grab them on the render thread while the figure still shows them
+        return (lambda fig, repeats: grab_frame_repeated(writer, repeats) or 0.0), (lambda: None)
+    width, height = writer.frame_size
+    free = queue.Queue()
+    for _ in range(depth):
+        free.put(np.empty((height, width, 4), dtype=np.uint8))
+    filled = queue.Queue()
+    errors = []
+
+    def encode():
+        while True:
+            item = filled.get()
+            if item is None:
+                return
+            rgba, repeats = item
+            try:
+                if errors:
+                    pass  # Keep recycling buffers so the render loop sees the error instead of blocking
+                elif isinstance(writer, (PaletteGifWriter, BackgroundOverlayWriter, ImageSequenceWriter)):
+                    writer.write_frame(rgba, repeats)
+                else:
+                    for _ in range(repeats):
+                        stdin.write(rgba.data)
+            except Exception as exc:
+                errors.append(exc)
+            free.put(rgba)
+
+    def submit(fig, repeats):
+        if errors:
+            raise errors[0]
+        wait_start = time.perf_counter()
+        rgba = free.get()
+        waited = time.perf_counter() - wait_start
+        rasterize_into(fig, rgba)
+        filled.put((rgba, repeats))
+        return waited
+
+    def close():
+        filled.put(None)
+        thread.join()
+        if errors:
+            raise errors[0]
+
+    thread = threading.Thread(target=encode, daemon=True)
+    thread.start()
+    return submit, close
+
+# Ticker tape: the whole tape (logo, symbol, last price, colored change per ticker) is drawn once as a wide
+# strip, and every video frame is a horizontal slice of it, blended between two pixel offsets for subpixel motion.
+# Tape videos are tape-shaped: the output profile's width by a strip 1/16 of it tall (see tape_size).
+TAPE_LOGO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logos')
+TAPE_LOGO_NAMES = {'XRP-USD': 'ripple', '2222.SR': 'saudiaramco'}
+
+# Helper function to find a ticker's logo in generators/logos (crypto logos are named without the -USD suffix)
+def find_tape_logo(ticker, ticker_type):
+    folder = os.path.join(TAPE_LOGO_DIR, 'crypto' if ticker_type == 'Crypto' else 'stocks')
+    name = TAPE_LOGO_NAMES.get(ticker, ticker.lower().replace('-usd', '').replace('-', '.'))
+    for logo_file in (f"{name}.jfif", name):
+        if os.path.isfile(os.path.join(folder, logo_file)):
+            return os.path.join(folder, logo_file)
+    return None
+
+# Helper function to get a tape's output size for a profile: the profile's width by 1/16 of it (even, for yuv420p),
+# e.g. 600x36 for Classic or 1920x120 for Landscape 16:9, not the profile's chart size
+def tape_size(profile_name):
+    width = OUTPUT_PROFILES[profile_name]['size'][0]
+    return width, max(16, width // 16) // 2 * 2
+
+# Function to get each tape ticker's last close and its change from the previous close
+def tape_quotes(settings):
+    if not settings['race_tickers']:
+        raise ValueError("A ticker tape needs a list of tickers")
+    timestamps, closes = load_race_closes(settings)
+    if not len(timestamps):
+        raise ValueError("No data in the selected date range")
+    last = closes[-1]
+    previous = closes[-2] if len(closes) > 1 else last
+    return [(ticker, last[column], (last[column] / previous[column] - 1) * 100)
+            for column, ticker in enumerate(settings['race_tickers']) if not np.isnan(last[column])]
+
+# Function to draw one cycle of the tape as an RGB strip of the given height
+def build_tape_strip(quotes, ticker_type, height):
+    regular_font, bold_font = find_font_path(), find_font_path('bold')
+    size_px = max(8, int(height * 0.42))
+    logo_px = int(height * 0.7)
+    gap = height // 2
+    pieces = []  # (RGBA array, x offset after the previous piece)
+    for ticker, price, change in quotes:
+        logo_path = find_tape_logo(ticker, ticker_type)
+        if logo_path:
+            logo = Image.open(logo_path).convert('RGBA').resize((logo_px, logo_px), Image.LANCZOS)
+            mask = Image.new('L', (logo_px, logo_px), 0)
+            ImageDraw.Draw(mask).ellipse([0, 0, logo_px - 1, logo_px - 1], fill=255)
+            logo.putalpha(mask)
+            pieces.append((np.asarray(logo), gap))
+        symbol = ticker[:-4] if ticker.endswith('-USD') else ticker
+        price_text = f"${price:,.2f}" if price >= 1 else f"${price:.4f}"
+        change_color = to_rgba8('limegreen' if change >= 0 else 'red')
+        pieces.append((compose_label(symbol, bold_font, size_px, to_rgba8('white')), gap // 2 if logo_path else gap))
+        pieces.append((compose_label(price_text, regular_font, size_px, to_rgba8('white')), gap // 2))
+        pieces.append((compose_label(f"{'▲' if change >= 0 else '▼'} {abs(change):.2f}%", regular_font, size_px, change_color), gap // 2))
+
+    width = sum(piece.shape[1] + offset for piece, offset in pieces) + gap
+    strip = Image.new('RGBA', (width, height), to_rgba8('black'))
+    x = 0
+    for piece, offset in pieces:
+        x += offset
+        strip.alpha_composite(Image.fromarray(piece), (x, (height - piece.shape[0]) // 2))
+        x += piece.shape[1]
+    return np.asarray(strip.convert('RGB'))
+
+# Function to render the ticker tape for every requested output profile. The tape scrolls a whole number of
+# frames per cycle, so for MP4 one cycle is encoded and then repeated by ffmpeg with stream copy, and
+# animated WebP simply loops the cycle.
+def render_tape(settings):
+    if settings['output_format'] not in FFMPEG_CODEC_ARGS:
+        raise ValueError("Ticker tapes are rendered as MP4 or WebP")
+    if settings.get('progressive', 'Off') != 'Off':
+        raise ValueError("Ticker tapes render in seconds and are not written progressively")
+    if settings.get('background_video'):
+        raise ValueError("Ticker tapes are not composited over background footage")
+    quotes = tape_quotes(settings)
+    if not quotes:
+        raise ValueError("None of the tape tickers has a close in the selected date range")
+    ffmpeg_path = matplotlib.rcParams['animation.ffmpeg_path']
+    profile_frames = settings['profile_frames']
+    filenames = []
+    frame_times = []
+
+    for profile_name in settings['output_profiles']:
+        fps = OUTPUT_PROFILES[profile_name]['fps']
+        width, height = tape_size(profile_name)
+        strip = build_tape_strip(quotes, settings['ticker_type'], height)
+
+        # Whole number of frames per cycle, the speed is adjusted slightly to fit
+        cycle_frames = max(1, int(round(strip.shape[1] * fps / (settings['tape_speed'] * height))))
+        step = strip.shape[1] / cycle_frames
+        total_frames = max(1, int(round(settings['tape_seconds'] * fps)))
+        encode_frames = cycle_frames if settings['output_format'] == 'WebP' else min(cycle_frames, total_frames)
+        tape = np.concatenate([strip] * (width // strip.shape[1] + 2), axis=1)  # Wide enough for any offset
+
+        filename = output_filename(settings, profile_name)
+        cycle_file = filename if encode_frames >= total_frames or settings['output_format'] == 'WebP' else f"{filename}.cycle.mp4"
+        codec_args = FFMPEG_CODEC_ARGS[settings['output_format']]
+        encoder = subprocess.Popen([ffmpeg_path, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                                    '-s', f"{width}x{height}", '-r', str(fps), '-i', '-', *codec_args, cycle_file],
+                                   stdin=subprocess.PIPE)
+        progress_bar = tqdm(total=encode_frames, desc="Generating Tape", unit="frames")
+        frame_pixels = np.empty((height, width, 3), dtype=np.uint8)
+        blended = np.empty((height, width, 3), dtype=np.uint16)
+        shifted = np.empty_like(blended)
+        for frame in range(encode_frames):
+            frame_start = time.perf_counter()
+            x = frame * step
+            left = int(x)
+            weight = int(round((x - left) * 256))
+            if weight in (0, 256):
+                frame_pixels[...] = tape[:, left + weight // 256:left + weight // 256 + width]
+            else:
+                # Both products in uint16, (256 - weight) * a + weight * b is at most 256 * 255
+                np.multiply(tape[:, left:left + width], 256 - weight, out=blended, dtype=np.uint16)
+                np.multiply(tape[:, left + 1:left + 1 + width], weight, out=shifted, dtype=np.uint16)
+                blended += shifted
+                frame_pixels[...] = np.right_shift(blended, 8, out=blended)
+            encoder.stdin.write(frame_pixels.data)
+            if profile_frames:
+                frame_times.append(time.perf_counter() - frame_start)
+            progress_bar.update(1)
+        progress_bar.close()
+        encoder.stdin.close()
+        if encoder.wait():
+            raise RuntimeError(f"ffmpeg failed with exit code {encoder.returncode} while encoding {cycle_file}")
+
+        # Repeat the encoded cycle up to the requested length without re-encoding
+        if cycle_file != filename:
+            subprocess.run([ffmpeg_path, '-y', '-loglevel', 'error', '-stream_loop', str(-(-total_frames // cycle_frames) - 1),
+                            '-i', cycle_file, '-c', 'copy', '-frames:v', str(total_frames), filename], check=True)
+            os.remove(cycle_file)
+        filenames.append(filename)
+
+    stats = None
+    if profile_frames:
+        stats = {'ms_per_frame': np.mean(frame_times) * 1000, 'kib_per_frame': 0.0, 'peak_rss_mib': peak_rss_mib(),
+                 'encoder_wait_ms': None}
+    return filenames, stats
+
+# Vector export: a line chart written as a compact animation description instead of pixels, for the web.
+# HTML is one self-contained page holding the rounded, delta-encoded series, the precomputed tick runs and a
+# small canvas player that redraws the chart each frame, with the axes following the line like the video.
+# Lottie is a Lottie JSON with the line as one static path revealed by a trim, so its axes are fixed at the final
+# frame's range. Both take their layout (axes box, title and axis label positions) from the profile's matplotlib figure.
+VECTOR_FORMATS = ('Lottie', 'HTML')
+VECTOR_FONT_FAMILY = "'DejaVu Sans', 'Bitstream Vera Sans', Verdana, sans-serif"
+TEXT_BASELINE_SHIFT = 0.35  # Baseline below a text's vertical center, in ems
+
+# Canvas player for HTML export, __TITLE__ and __DATA__ are filled in per output
+VECTOR_PLAYER_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+body { margin: 0; background: black; display: flex; justify-content: center; }
+canvas { max-width: 100vw; max-height: 100vh; object-fit: contain; cursor: pointer; }
+</style>
+</head>
+<body>
+<canvas id="chart"></canvas>
+<script>
+const D = __DATA__;
+const canvas = document.getElementById('chart');
+const ctx = canvas.getContext('2d');
+const scale = window.devicePixelRatio || 1;
+canvas.width = D.width * scale;
+canvas.height = D.height * scale;
+canvas.style.width = D.width + 'px';
+
+// Decode the delta-encoded series and work out each frame's axis limits, as the video does
+function decode(deltas, step) { let value = 0; return deltas.map(delta => (value += delta) / step); }
+const dates = decode(D.dates, 1440), prices = decode(D.prices, D.priceScale), n = prices.length;
+const low = [], high = [], starts = [0], repeats = new Array(n).fill(1);
+for (let i = 0; i < n; i++) {
+  low.push(Math.min(prices[i], i ? low[i - 1] : Infinity));
+  high.push(Math.max(prices[i], i ? high[i - 1] : -Infinity));
+}
+for (const [frame, count] of D.holds) repeats[frame] = count;
+for (let i = 0; i < n; i++) starts.push(starts[i] + repeats[i]);
+let logo = null;
+if (D.logo) { logo = new Image(); logo.src = D.logo.src; logo.onload = () => draw(shown); }
+
+function text(item) {
+  const [str, x, y, size, color, alpha, weight, rotation, align] = item;
+  ctx.save();
+  ctx.globalAlpha = alpha;
+  ctx.fillStyle = color;
+  ctx.font = `${weight} ${size}px ${D.font}`;
+  ctx.textAlign = align || 'center';
+  ctx.textBaseline = 'middle';
+  ctx.translate(x, y);
+  ctx.rotate(-rotation * Math.PI / 180);
+  ctx.fillText(str, 0, 0);
+  ctx.restore();
+}
+
+function ticksAt(runs, frame) {
+  let run = 0;
+  while (run + 1 < runs.length && runs[run + 1][0] <= frame) run++;
+  return runs[run];
+}
+
+function draw(frame) {
+  const [ax, ay, aw, ah] = D.axes;
+  const span = high[frame] - low[frame];
+  const yPad = span > 0 ? span * 0.05 : Math.max(Math.abs(high[frame]) * 0.05, 1);
+  const y0 = low[frame] - yPad, y1 = high[frame] + yPad;
+  const xSpan = dates[frame] - dates[0], xPad = xSpan > 0 ? xSpan * 0.05 : 1;
+  const x0 = dates[0] - xPad, x1 = dates[frame] + xPad;
+  const px = date => ax + (date - x0) / (x1 - x0) * aw, py = price => ay + ah - (price - y0) / (y1 - y0) * ah;
+
+  ctx.setTransform(scale, 0, 0, scale, 0, 0);
+  ctx.fillStyle = 'black';
+  ctx.fillRect(0, 0, D.width, D.height);
+  if (logo && logo.complete) ctx.drawImage(logo, D.logo.x, D.logo.y, D.logo.w, D.logo.h);
+  D.under.forEach(text);
+
+  // Ticks, from the tick run this frame belongs to
+  ctx.strokeStyle = 'white';
+  ctx.lineWidth = D.tickWidth;
+  ctx.beginPath();
+  const [xStart, xPositions, xLabels] = ticksAt(D.xTicks, frame);
+  xPositions.forEach((date, k) => {
+    const x = px(date);
+    ctx.moveTo(x, ay + ah);
+    ctx.lineTo(x, ay + ah + D.tickLength);
+    text([xLabels[k], x, ay + ah + D.tickLength + D.tickPad + D.tickSize / 2, D.tickSize, 'white', 1, 'normal', 0]);
+  });
+  const [yStart, yPositions, yLabels] = ticksAt(D.yTicks, frame);
+  yPositions.forEach((price, k) => {
+    const y = py(price);
+    ctx.moveTo(ax, y);
+    ctx.lineTo(ax - D.tickLength, y);
+    text([yLabels[k], ax - D.tickLength - D.tickPad, y, D.tickSize, 'white', 1, 'normal', 0, 'right']);
+  });
+  ctx.stroke();
+
+  // The price line, clipped to the axes
+  ctx.save();
+  ctx.beginPath();
+  ctx.rect(ax, ay, aw, ah);
+  ctx.clip();
+  ctx.beginPath();
+  for (let i = 0; i <= frame; i++) ctx.lineTo(px(dates[i]), py(prices[i]));
+  ctx.strokeStyle = 'green';
+  ctx.lineWidth = D.lineWidth;
+  ctx.lineJoin = 'round';
+  ctx.stroke();
+  ctx.restore();
+  D.over.forEach(text);
+
+  // Current price in a yellow box, right edge at the head of the line
+  const label = '$' + prices[frame].toFixed(2);
+  ctx.font = `bold ${D.priceSize}px ${D.font}`;
+  const width = ctx.measureText(label).width + 2 * D.pricePad, height = D.priceSize * 1.17 + 2 * D.pricePad;
+  const right = px(dates[frame]), middle = py(prices[frame]);
+  ctx.beginPath();
+  if (ctx.roundRect) ctx.roundRect(right - width, middle - height / 2, width, height, D.pricePad);
+  else ctx.rect(right - width, middle - height / 2, width, height);
+  ctx.fillStyle = 'yellow';
+  ctx.fill();
+  ctx.strokeStyle = 'white';
+  ctx.lineWidth = 1;
+  ctx.stroke();
+  text([label, right - D.pricePad, middle, D.priceSize, 'black', 1, 'bold', 0, 'right']);
+}
+
+// Play once at the video's frame rate (holds included), click to replay
+let shown = 0, startTime = null;
+function play(now) {
+  if (startTime === null) startTime = now;
+  const t = (now - startTime) / 1000 * D.fps;
+  let lo = 0, hi = n - 1;
+  while (lo < hi) { const mid = (lo + hi + 1) >> 1; if (starts[mid] <= t) lo = mid; else hi = mid - 1; }
+  if (lo !== shown || startTime === now) { shown = lo; draw(shown); }
+  if (t < starts[n]) requestAnimationFrame(play); else startTime = null;
+}
+canvas.addEventListener('click', () => { if (startTime === null) requestAnimationFrame(play); });
+requestAnimationFrame(play);
+</script>
+</body>
+</html>
+"""
+
+# Helper function to round values to a fixed step and delta-encode them as integers (compact in JSON)
+def encode_deltas(values, per_unit):
+    steps = np.round(np.asarray(values, dtype=np.float64) * per_unit).astype(np.int64)
+    return np.diff(steps, prepend=0).tolist()
+
+# Helper function to turn per-frame tick runs into [first frame, positions, labels] lists
+def tick_run_list(runs, tick_sets, digits):
+    first_frames = np.searchsorted(runs, np.arange(len(tick_sets)))
+    return [[int(first), [round(float(position), digits) for position in positions], list(labels)]
+            for first, (positions, labels) in zip(first_frames, tick_sets)]
+
+# Helper function to thin a pixel-space polyline to the first, last, lowest and highest point of each pixel
+# column, returns the indices kept (a line can't show more than that at this size)
+def decimate_polyline(xs, ys):
+    columns = np.floor(xs).astype(np.int64)
+    starts = np.flatnonzero(np.diff(columns, prepend=columns[0] - 1))
+    ends = np.append(starts[1:], len(xs)) - 1
+    by_height = np.lexsort((ys, columns))  # Columns never go backwards, so each column's block is in place
+    keep = np.zeros(len(xs), dtype=bool)
+    keep[starts] = keep[ends] = True
+    keep[by_height[starts]] = keep[by_height[ends]] = True
+    return np.flatnonzero(keep)
+
+# Function to work out an output's vector layout from its matplotlib figure: sizes in pixels, top-left origin
+def vector_layout(settings, table, profile_name):
+    fig, draw_frame = setup_chart(settings, table, profile_name)
+    draw_frame(len(table['timestamps']) - 1)  # Tick labels of the last frame set where the y label ends up
+    fig.canvas.draw()
+    ax = fig.axes[0]
+    width, height, dpi = fig.bbox.width, fig.bbox.height, fig.dpi
+
+    def center(artist):
+        extent = artist.get_window_extent()
+        return round((extent.x0 + extent.x1) / 2, 1), round(height - (extent.y0 + extent.y1) / 2, 1)
+
+    ax_x0, ax_y0, ax_width, ax_height = ax.bbox.bounds
+    points = dpi / 72
+    font_px = plt.rcParams['font.size'] * points
+    layout = {
+        'width': int(round(width)), 'height': int(round(height)), 'dpi': dpi,
+        'axes': [round(ax_x0, 1), round(height - ax_y0 - ax_height, 1), round(ax_width, 1), round(ax_height, 1)],
+        'title': center(ax.title), 'xlabel': center(ax.xaxis.label), 'ylabel': center(ax.yaxis.label),
+        'font_px': font_px, 'line_width': plt.rcParams['lines.linewidth'] * points,
+        'tick_length': plt.rcParams['xtick.major.size'] * points, 'tick_pad': plt.rcParams['xtick.major.pad'] * points,
+        'tick_width': plt.rcParams['xtick.major.width'] * points,
+        'x_budget': tick_budget(ax_width, 6 * font_px), 'y_budget': tick_budget(ax_height, 2.5 * font_px),
+    }
+    plt.close(fig)
+    return layout
+
+# Helper function to list the static texts of a chart as (text, x, y, size px, css color, alpha, weight, rotation),
+# split into those under the line (title, dates, axis labels) and over it (custom text, watermark) as in the video
+def vector_texts(settings, layout):
+    width, height, points = layout['width'], layout['height'], layout['dpi'] / 72
+    under = [[f"{settings['ticker_type']} Ticker: {settings['ticker']}", *layout['title'], 16 * points, 'white', 1, 'normal', 0],
+             ['Date', *layout['xlabel'], layout['font_px'], 'white', 1, 'normal', 0],
+             ['Price', *layout['ylabel'], layout['font_px'], 'white', 1, 'normal', 90]]
+    if settings['include_start_date']:
+        under.append([f"Start Date: {format_date(settings['start_date'])}", width / 2, height * 0.05, 12 * points, 'white', 1, 'normal', 0])
+    if settings['include_end_date']:
+        under.append([f"End Date: {format_date(settings['end_date'])}", width / 2, height * 0.08, 12 * points, 'white', 1, 'normal', 0])
+    over = []
+    if settings['custom_text']:
+        over.append([settings['custom_text'], width / 2, height * 0.11, 12 * points, 'white', 1, 'normal', 0])
+    if settings['watermark_text']:
+        over.append([settings['watermark_text'], width / 2, height / 2, 40 * points, mcolors.to_hex(settings['watermark_color']),
+                     0.5, 'normal', 0])
+    return under, over
+
+# Helper function to get the logo as a PNG data URI with its top-left position, or None
+def vector_logo(settings, layout):
+    logo_path = find_logo_path(settings['ticker_type'], settings['ticker'])
+    if not logo_path:
+        return None
+    logo_width = int(500 * layout['dpi'] / 100)
+    logo_img = get_logo(logo_path, logo_width)
+    buffer = io.BytesIO()
+    logo_img.save(buffer, format='PNG', optimize=True)
+    return {'src': 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii'),
+            'x': layout['width'] // 2 - logo_width // 2, 'y': layout['height'] - 20 - logo_img.height,
+            'w': logo_width, 'h': logo_img.height}
+
+# Function to write an HTML page with the chart data and the canvas player
+def write_vector_html(filename, settings, table, layout, repeats, fps):
+    prices = table['prices']
+    span = float(np.ptp(prices)) or abs(float(prices[-1])) or 1.0
+    price_scale = 10 ** int(np.clip(np.ceil(-np.log10(span * 1e-4)), 2, 8))  # At least cents, 1/10000 of the range
+    limits = frame_limits(table, 0, len(prices))  # The page holds every frame's ticks
+    x_runs, x_tick_sets = date_tick_runs(limits['x_min'], limits['x_max'], layout['x_budget'], settings['x_ticks_interval'])
+    y_runs, y_tick_sets = value_tick_runs(limits['y_min'], limits['y_max'], layout['y_budget'], format_price_tick,
+                                          settings['y_ticks_interval'])
+    under, over = vector_texts(settings, layout)
+    points = layout['dpi'] / 72
+    data = {
+        'width': layout['width'], 'height': layout['height'], 'fps': fps, 'axes': layout['axes'], 'font': VECTOR_FONT_FAMILY,
+        'dates': encode_deltas(table['dates'], 1440), 'prices': encode_deltas(prices, price_scale), 'priceScale': price_scale,
+        'holds': [[int(frame), int(repeats[frame])] for frame in np.flatnonzero(repeats > 1)],
+        'xTicks': tick_run_list(x_runs, x_tick_sets, 4), 'yTicks': tick_run_list(y_runs, y_tick_sets, 10),
+        'under': under, 'over': over, 'logo': vector_logo(settings, layout),
+        'lineWidth': layout['line_width'], 'tickLength': layout['tick_length'], 'tickPad': layout['tick_pad'],
+        'tickWidth': layout['tick_width'], 'tickSize': layout['font_px'],
+        'priceSize': 14 * points, 'pricePad': 0.5 * 14 * points,
+    }
+    page = VECTOR_PLAYER_HTML.replace('__TITLE__', html.escape(under[0][0]))
+    page = page.replace('__DATA__', json.dumps(data, separators=(',', ':')).replace('</', '<\\/'))
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(page)
+
+# Helper function to build a Lottie layer with a static transform (ty: 1 solid, 2 image, 4 shapes, 5 text)
+def lottie_layer(index, name, layer_type, end_time, position=(0, 0), opacity=100, rotation=0, **fields):
+    layer = {'ddd': 0, 'ind': index, 'ty': layer_type, 'nm': name, 'sr': 1,
+             'ks': {'o': {'a': 0, 'k': opacity}, 'r': {'a': 0, 'k': rotation}, 'p': {'a': 0, 'k': [*position, 0]},
+                    'a': {'a': 0, 'k': [0, 0, 0]}, 's': {'a': 0, 'k': [100, 100, 100]}},
+             'ao': 0, 'ip': 0, 'op': end_time, 'st': 0, 'bm': 0}
+    layer.update(fields)
+    return layer
+
+# Helper function to build a Lottie text layer from (time, text) keyframes, positioned by its vertical center
+def lottie_text(index, name, end_time, keyframes, position, size, color, font='sans', justify=2, opacity=100, rotation=0):
+    rgb = [round(c, 3) for c in mcolors.to_rgb(color)]
+    x, y = position
+    if rotation:
+        x += TEXT_BASELINE_SHIFT * size
+    else:
+        y += TEXT_BASELINE_SHIFT * size
+    document = {'k': [{'s': {'s': round(size, 1), 'f': font, 't': text, 'j': justify, 'tr': 0, 'lh': round(size * 1.2, 1),
+                             'ls': 0, 'fc': rgb}, 't': time} for time, text in keyframes]}
+    return lottie_layer(index, name, 5, end_time, (round(x, 1), round(y, 1)), opacity, rotation,
+                        t={'d': document, 'p': {}, 'm': {'g': 1, 'a': {'a': 0, 'k': [0, 0]}}, 'a': []})
+
+# Helper function to build a Lottie shape group: shape items, then its transform
+def lottie_group(name, items):
+    transform = {'ty': 'tr', 'p': {'a': 0, 'k': [0, 0]}, 'a': {'a': 0, 'k': [0, 0]}, 's': {'a': 0, 'k': [100, 100]},
+                 'r': {'a': 0, 'k': 0}, 'o': {'a': 0, 'k': 100}}
+    return {'ty': 'gr', 'nm': name, 'it': items + [transform]}
+
+# Helper function to build a Lottie path item from pixel points
+def lottie_path(points, closed=False):
+    vertices = [[round(float(x), 1), round(float(y), 1)] for x, y in points]
+    zeros = [[0, 0]] * len(vertices)
+    return {'ty': 'sh', 'ks': {'a': 0, 'k': {'c': closed, 'v': vertices, 'i': zeros, 'o': zeros}}}
+
+# Helper function to build Lottie stroke and fill items
+def lottie_stroke(color, width):
+    return {'ty': 'st', 'c': {'a': 0, 'k': [*mcolors.to_rgb(color), 1]}, 'o': {'a': 0, 'k': 100}, 'w': {'a': 0, 'k': round(width, 2)},
+            'lc': 2, 'lj': 2}
+
+def lottie_fill(color):
+    return {'ty': 'fl', 'c': {'a': 0, 'k': [*mcolors.to_rgb(color), 1]}, 'o': {'a': 0, 'k': 100}, 'r': 1}
+
+# Helper function to build hold keyframes from (time, value) pairs, leaving out repeats of the previous value
+def lottie_hold_keyframes(times, values):
+    keyframes = []
+    for time_index, value in zip(times, values):
+        if not keyframes or keyframes[-1]['s'] != value:
+            keyframes.append({'t': int(time_index), 's': value, 'h': 1})
+    return {'a': 1, 'k': keyframes} if len(keyframes) > 1 else {'a': 0, 'k': keyframes[0]['s']}
+
+# Function to write a Lottie JSON animation of the chart, with the axes fixed at the final frame's range
+def write_lottie(filename, settings, table, layout, repeats, fps):
+    width, height = layout['width'], layout['height']
+    ax_x, ax_y, ax_width, ax_height = layout['axes']
+    points = layout['dpi'] / 72
+    times = np.concatenate([[0], np.cumsum(repeats)])
+    end_time = int(times[-1])
+    final = frame_limits(table, len(table['prices']) - 1, len(table['prices']))
+    x_min, x_max, y_min, y_max = final['x_min'][0], final['x_max'][0], final['y_min'][0], final['y_max'][0]
+    labels = [f"${price:.2f}" for price in table['prices']]
+    xs = ax_x + (table['dates'] - x_min) / (x_max - x_min) * ax_width
+    ys = ax_y + ax_height - (table['prices'] - y_min) / (y_max - y_min) * ax_height
+
+    under, over = vector_texts(settings, layout)
+
+    # Line: one decimated path, revealed up to each frame's point by animating the trim end (percent of path length)
+    kept = decimate_polyline(xs, ys)
+    lengths = np.concatenate([[0], np.cumsum(np.hypot(np.diff(xs[kept]), np.diff(ys[kept])))])
+    reached = np.searchsorted(kept, np.arange(len(xs)), side='right') - 1
+    trim_end = [[round(float(value), 3)] for value in lengths[reached] / max(lengths[-1], 1e-9) * 100]
+    line_layer = lottie_layer(0, 'Price line', 4, end_time, shapes=[lottie_group('Line', [
+        lottie_path(np.column_stack([xs[kept], ys[kept]])), lottie_stroke('green', layout['line_width']),
+        {'ty': 'tm', 's': {'a': 0, 'k': 0}, 'e': lottie_hold_keyframes(times[:-1], trim_end), 'o': {'a': 0, 'k': 0}, 'm': 1}])])
+
+    # Price label: a box layer moving with the head of the line, and the text parented to it
+    bold_font = get_font(find_font_path('bold'), int(round(14 * points)))
+    pad = 0.5 * 14 * points
+    box_height = 14 * points * 1.17 + 2 * pad
+    box_widths = [[round(bold_font.getlength(label) + 2 * pad, 1), round(box_height, 1)] for label in labels]
+    box_layer = lottie_layer(0, 'Price box', 4, end_time, shapes=[lottie_group('Box', [
+        {'ty': 'rc', 'p': lottie_hold_keyframes(times[:-1], [[-size[0] / 2, 0] for size in box_widths]),
+         's': lottie_hold_keyframes(times[:-1], box_widths), 'r': {'a': 0, 'k': round(pad, 1)}},
+        lottie_fill('yellow'), lottie_stroke('white', 1)])])
+    box_layer['ks']['p'] = lottie_hold_keyframes(times[:-1], [[round(float(x), 1), round(float(y), 1), 0] for x, y in zip(xs, ys)])
+    price_layer = lottie_text(0, 'Price', end_time, list(zip(times[:-1].tolist(), labels)),
+                              (-pad, 0), 14 * points, 'black', font='sans-bold', justify=1)
+
+    # Fixed ticks of the final frame
+    x_positions, x_labels = date_tick_runs(final['x_min'], final['x_max'], layout['x_budget'], settings['x_ticks_interval'])[1][0]
+    y_positions, y_labels = value_tick_runs(final['y_min'], final['y_max'], layout['y_budget'], format_price_tick,
+                                            settings['y_ticks_interval'])[1][0]
+    tick_paths = []
+    tick_layers = []
+    label_y = ax_y + ax_height + layout['tick_length'] + layout['tick_pad'] + layout['font_px'] / 2
+    for position, label in zip(x_positions, x_labels):
+        x = ax_x + (position - x_min) / (x_max - x_min) * ax_width
+        tick_paths.append(lottie_path([(x, ax_y + ax_height), (x, ax_y + ax_height + layout['tick_length'])]))
+        tick_layers.append(lottie_text(0, f'X tick {label}', end_time, [(0, label)], (x, label_y), layout['font_px'], 'white'))
+    for position, label in zip(y_positions, y_labels):
+        y = ax_y + ax_height - (position - y_min) / (y_max - y_min) * ax_height
+        tick_paths.append(lottie_path([(ax_x, y), (ax_x - layout['tick_length'], y)]))
+        tick_layers.append(lottie_text(0, f'Y tick {label}', end_time, [(0, label)],
+                                       (ax_x - layout['tick_length'] - layout['tick_pad'], y), layout['font_px'], 'white', justify=1))
+    tick_layers.append(lottie_layer(0, 'Tick marks', 4, end_time, shapes=[lottie_group('Ticks', tick_paths + [
+        lottie_stroke('white', layout['tick_width'])])]))
+
+    # Static texts, logo and background
+    def text_layers(items):
+        return [lottie_text(0, text, end_time, [(0, text)], (x, y), size, color, opacity=alpha * 100, rotation=-rotation)
+                for text, x, y, size, color, alpha, weight, rotation in items]
+    assets = []
+    logo_layers = []
+    logo = vector_logo(settings, layout)
+    if logo:
+        assets.append({'id': 'logo', 'w': logo['w'], 'h': logo['h'], 'u': '', 'p': logo['src'], 'e': 1})
+        logo_layers.append(lottie_layer(0, 'Logo', 2, end_time, (logo['x'], logo['y']), refId='logo'))
+    background = lottie_layer(0, 'Background', 1, end_time, sc='#000000', sw=width, sh=height)
+
+    # Layers are listed top to bottom, the price text follows its box through parenting
+    layers = [price_layer, box_layer] + text_layers(over) + [line_layer] + tick_layers + text_layers(under) + logo_layers + [background]
+    for index, layer in enumerate(layers, start=1):
+        layer['ind'] = index
+    price_layer['parent'] = box_layer['ind']
+    animation = {
+        'v': '5.7.4', 'fr': fps, 'ip': 0, 'op': end_time, 'w': width, 'h': height, 'nm': under[0][0],
+        'ddd': 0, 'assets': assets, 'layers': layers,
+        'fonts': {'list': [{'fName': 'sans', 'fFamily': 'DejaVu Sans', 'fStyle': 'Book', 'ascent': 75, 'origin': 0, 'fPath': ''},
+                           {'fName': 'sans-bold', 'fFamily': 'DejaVu Sans', 'fStyle': 'Bold', 'ascent': 75, 'origin': 0, 'fPath': ''}]},
+    }
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(animation, f, separators=(',', ':'))
+
+# Function to export a line chart as vector animations, one file per output profile. No frames are drawn or
+# encoded, so this takes milliseconds and the files are kilobytes.
+def export_vector(settings, table=None, frames=None, filenames=None):
+    if settings.get('chart_style', 'Line') != 'Line' or settings.get('overlays') or settings.get('background_video'):
+        raise ValueError("Vector export covers plain line charts only (no candles, races, tapes, overlays or background video)")
+    if table is None:
+        table = load_frame_table(settings)
+    if frames is not None:
+        table = frame_table_from_arrays(table['timestamps'][frames], table['prices'][frames])
+    if not len(table['timestamps']):
+        raise ValueError("No data in the selected date range")
+    holds = timeline_holds(settings, table)
+    write = write_lottie if settings['output_format'] == 'Lottie' else write_vector_html
+
+    written = []
+    for profile_name in settings['output_profiles']:
+        fps = OUTPUT_PROFILES[profile_name]['fps']
+        filename = filenames[profile_name] if filenames else output_filename(settings, profile_name)
+        write(filename, settings, table, vector_layout(settings, table, profile_name), 1 + np.round(holds * fps).astype(np.int64), fps)
+        written.append(filename)
+    return written, None
+
+# Function to render every requested output profile in one pass over the shared frame state
+# (optionally only a range of frames into given filenames, as used by shard workers)
+def render_job(settings, table=None, frames=None, filenames=None):
+    if settings.get('output_format') in VECTOR_FORMATS:
+        return export_vector(settings, table, frames, filenames)
+    if settings.get('chart_style') == 'Ticker Tape':
+        return render_tape(settings)
+
+    # Precompute everything the render loop needs as plain arrays, shared by all outputs
+    if table is None:
+        table = load_frame_table(settings)
+    frames = range(len(table['timestamps'])) if frames is None else frames
+    frame_count = len(frames)
+    profile_frames = settings['profile_frames']
+    holds = timeline_holds(settings, table)
+
+    # One figure and one ffmpeg encoder per output profile, with each frame's repeat count at that profile's fps
+    outputs = []
+    setup = setup_race_chart if settings.get('chart_style') == 'Bar Race' else setup_chart
+    for profile_name in settings['output_profiles']:
+        fig, draw_frame = setup(settings, table, profile_name)
+        fps = OUTPUT_PROFILES[profile_name]['fps']
+        filename = filenames[profile_name] if filenames else output_filename(settings, profile_name)
+        writer = make_writer(settings, profile_name, filename)
+        if isinstance(writer, PaletteGifWriter) and frame_count:
+            writer.palette = build_clip_palette(fig, draw_frame, frames, fig.dpi)
+        outputs.append((fig, draw_frame, writer, filename, 1 + np.round(holds * fps).astype(np.int64)))
+
+    # Per-frame wall time (all outputs together) and peak allocated bytes, filled in when profiling
+    frame_times = np.zeros(frame_count)
+    frame_allocs = np.zeros(frame_count)
+    frame_waits = np.zeros(frame_count)
+    depth = settings.get('encode_queue', 0)
+    if profile_frames:
+        tracemalloc.start()
+
+    # Create a progress bar
+    progress_bar = tqdm(total=frame_count, desc="Generating Animation", unit="frames")
+
+    with contextlib.ExitStack() as stack:
+        # With an encode queue, each output's encoding runs on its own thread, drained before its writer finishes
+        encoders = []
+        for fig, draw_frame, writer, filename, repeats in outputs:
+            stack.enter_context(writer.saving(fig, filename, fig.dpi))
+            if depth:
+                submit, close = start_encoder(writer, depth)
+                stack.callback(close)
+                encoders.append(submit)
+            else:
+                encoders.append(None)
+
+        for i, frame in enumerate(frames):
+            frame_start = time.perf_counter()
+            for (fig, draw_frame, writer, filename, repeats), submit in zip(outputs, encoders):
+                draw_frame(frame)
+                if submit:
+                    frame_waits[i] += submit(fig, repeats[frame])
+                else:
+                    grab_frame_repeated(writer, repeats[frame])
+
+            if profile_frames:
+                frame_times[i] = time.perf_counter() - frame_start
+                frame_allocs[i] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.reset_peak()
+
+            progress_bar.update(1)  # Update the progress bar
+
+    # Close the progress bar and the figures
+    progress_bar.close()
+    for fig, draw_frame, writer, filename, repeats in outputs:
+        plt.close(fig)
+
+    stats = None
+    if profile_frames:
+        tracemalloc.stop()
+        stats = {'ms_per_frame': frame_times.mean() * 1000, 'kib_per_frame': frame_allocs.mean() / 1024, 'peak_rss_mib': peak_rss_mib(),
+                 'encoder_wait_ms': frame_waits.mean() * 1000 if depth else None}
+    return [filename for fig, draw_frame, writer, filename, repeats in outputs], stats
+
+# Render cost estimates: a short micro-benchmark measures this machine's cost per frame (fixed part plus a part per
+# megapixel of output), the extra cost of overlays, candles and the GIF/WebP encoders, the bytes each format
+# takes per megapixel-frame and the base memory use. The result is saved as a per-host calibration profile,
+# and estimate_job() applies it to job settings without fetching any data.
+CALIBRATION_FILE = os.path.join(os.path.expanduser('~'), '.ticker-animation-calibration.json')
+CALIBRATION_VERSION = 2
+CALIBRATION_FRAMES = 40
+TRADING_DAYS_PER_YEAR = 252
+
+# Helper function to get the size of an output file, or of all files in an image sequence folder
+def output_size(path):
+    if os.path.isdir(path):
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+    return os.path.getsize(path)
+
+# Helper function to make a synthetic daily OHLCV series for calibration
+def synthetic_columns(rows=400):
+    rng = np.random.default_rng(0)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    opens = np.concatenate([[closes[0]], closes[:-1]])
+    return {
+        'timestamps': np.datetime64('2020-01-01', 'ns').astype(np.int64) + np.arange(rows, dtype=np.int64) * 86400 * 10**9,
+        'close': closes, 'open': opens,
+        'high': np.maximum(opens, closes) * 1.01, 'low': np.minimum(opens, closes) * 0.99,
+        'volume': rng.uniform(1e6, 5e6, rows),
+    }
+
+# Function to run the calibration micro-benchmark (about 15 seconds) and save the profile unless save is False
+def calibrate(save=True):
+    columns = synthetic_columns()
+    base_settings = dict(DEFAULT_SETTINGS, ticker='CALIBRATION', start_date='2020-01-01', end_date='2021-02-04',
+                         custom_text='Calibration', watermark_text='Calibration')
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        def run(frame_count, **changes):
+            settings = dict(base_settings, **changes)
+            table = frame_table_from_columns(settings, columns)
+            filenames = {name: os.path.join(temp_dir, output_filename(settings, name)) for name in settings['output_profiles']}
+            start = time.perf_counter()
+            render_job(settings, table, frames=range(frame_count), filenames=filenames)
+            seconds = time.perf_counter() - start
+            return seconds, sum(output_size(filename) for filename in filenames.values())
+
+        run(5)  # Warm up fonts, caches and the first figure
+
+        # Fixed cost per job from two lengths of the same clip, then each variant's cost per frame
+        short_seconds, short_bytes = run(CALIBRATION_FRAMES // 2)
+        long_seconds, long_bytes = run(CALIBRATION_FRAMES)
+        line_ms = (long_seconds - short_seconds) * 1000 / (CALIBRATION_FRAMES - CALIBRATION_FRAMES // 2)
+        overhead_s = max(0.0, short_seconds - line_ms * (CALIBRATION_FRAMES // 2) / 1000)
+
+        def frame_ms(**changes):
+            seconds, size = run(CALIBRATION_FRAMES, **changes)
+            return max(0.0, seconds - overhead_s) * 1000 / CALIBRATION_FRAMES, size
+
+        classic_mp = np.prod(chart_figure(base_settings, 'Classic')[:2]) / 1e6
+        large_mp = np.prod(chart_figure(base_settings, 'Square 1:1')[:2]) / 1e6
+        large_ms, large_bytes = frame_ms(output_profiles=['Square 1:1'])
+        overlays_ms, overlays_bytes = frame_ms(overlays=['SMA 20', 'BB 20', 'Volume'])
+        candles_ms, candles_bytes = frame_ms(chart_style='Candlestick')
+        gif_ms, gif_bytes = frame_ms(output_format='GIF')
+        webp_ms, webp_bytes = frame_ms(output_format='WebP')
+        png_ms, png_bytes = frame_ms(output_format='PNG Sequence')
+        tiff_ms, tiff_bytes = frame_ms(output_format='TIFF Sequence')
+
+    per_mp_ms = max(0.0, (large_ms - line_ms) / (large_mp - classic_mp))
+    calibration = {
+        'version': CALIBRATION_VERSION,
+        'host': platform.node(),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'overhead_s': overhead_s,
+        'classic_mp': classic_mp,
+        'base_ms': max(0.0, line_ms - per_mp_ms * classic_mp),
+        'per_mp_ms': per_mp_ms,
+        'overlay_ms': max(0.0, overlays_ms - line_ms) / 3,
+        'format_factors': {'MP4': 1.0, 'GIF': gif_ms / line_ms, 'WebP': webp_ms / line_ms,
+                           'PNG Sequence': png_ms / line_ms, 'TIFF Sequence': tiff_ms / line_ms},
+        'candle_factor': candles_ms / line_ms,
+        'bytes_per_mp_frame': {fmt: size / CALIBRATION_FRAMES / classic_mp
+                               for fmt, size in (('MP4', long_bytes), ('GIF', gif_bytes), ('WebP', webp_bytes),
+                                                 ('PNG Sequence', png_bytes), ('TIFF Sequence', tiff_bytes))},
+        'base_rss_mib': peak_rss_mib(),
+    }
+    if save:
+        with open(CALIBRATION_FILE, 'w') as f:
+            json.dump(calibration, f, indent=2)
+    return calibration
+
+# Helper function to load this host's calibration profile (None when missing or made on another machine)
+def load_calibration():
+    try:
+        with open(CALIBRATION_FILE) as f:
+            calibration = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if calibration.get('version') != CALIBRATION_VERSION or calibration.get('host') != platform.node():
+        return None
+    return calibration
+
+# Function to estimate how many data rows a job covers: exact from a series store header and binary search,
+# otherwise from the calendar (every day for crypto, trading days for stocks). Returns (rows, exact)
+def estimate_rows(settings):
+    store = settings.get('series_store')
+    if store and settings.get('chart_style') in ('Bar Race', 'Ticker Tape') and settings['race_tickers']:
+        store = os.path.join(store, settings['race_tickers'][0])
+    if store:
+        timestamps = open_series_store(store)['timestamps']
+        start = np.searchsorted(timestamps, np.datetime64(settings['start_date'], 'ns').astype(np.int64))
+        end = np.searchsorted(timestamps, np.datetime64(settings['end_date'], 'ns').astype(np.int64))
+        return int(end - start), True
+    days = (np.datetime64(settings['end_date'], 'D') - np.datetime64(settings['start_date'], 'D')).astype(np.int64)
+    return int(max(0, days if settings['ticker_type'] == 'Crypto' else round(days * TRADING_DAYS_PER_YEAR / 365))), False
+
+# Function to estimate frame count, render time, peak memory and output size of a job from its settings
+def estimate_job(settings, calibration):
+    rows, exact = estimate_rows(settings)
+    step = settings['skip_days'] + 1
+    first = step * step if settings['cut_initial_frames'] else 0
+    frames = max(0, -(-(rows - first) // step))
+    if settings.get('chart_style') == 'Bar Race' and frames:
+        frames = (frames - 1) * max(1, settings['race_steps']) + 1
+    hold_seconds = settings['intro_hold'] + settings['outro_hold'] + sum(seconds for date, seconds in settings['pauses'])
+    output_format = settings['output_format']
+    depth = settings.get('encode_queue', 0)
+    logo_path = find_logo_path(settings['ticker_type'], settings['ticker'])
+
+    frame_ms = 0.0
+    output_bytes = 0.0
+    buffer_mib = 0.0
+    video_seconds = 0.0
+    for profile_name in settings['output_profiles']:
+        fps = OUTPUT_PROFILES[profile_name]['fps']
+        width_px, height_px, dpi = chart_figure(settings, profile_name)
+        output_width, output_height = profile_figure(settings, profile_name)[:2]
+        chart_mp, output_mp = width_px * height_px / 1e6, output_width * output_height / 1e6
+        if settings.get('chart_style') == 'Ticker Tape':
+            # Tapes only encode one scroll cycle (about 7 strip heights per ticker) of tape-size frames;
+            # the chart rate per megapixel is an upper bound for slicing and encoding them
+            tape_mp = np.prod(tape_size(profile_name)) / 1e6
+            frames = int(round(settings['tape_seconds'] * fps))
+            cycle = len(settings['race_tickers']) * 7 * fps / max(settings['tape_speed'], 1e-6)
+            frame_ms += calibration['per_mp_ms'] * tape_mp * min(frames, cycle) / max(frames, 1)
+            output_bytes += calibration['bytes_per_mp_frame'].get(output_format, 0) * tape_mp * frames
+            video_seconds = max(video_seconds, settings['tape_seconds'])
+            continue
+        if output_format in VECTOR_FORMATS:
+            # Nothing is drawn or encoded: a few bytes per frame for HTML, a price keyframe per frame for Lottie
+            output_bytes += frames * (12 if output_format == 'HTML' else 160)
+            video_seconds = max(video_seconds, frames / fps + hold_seconds)
+            continue
+
+        cost = calibration['base_ms'] + calibration['per_mp_ms'] * chart_mp
+        cost += calibration['overlay_ms'] * len(settings['overlays']) * chart_mp / calibration['classic_mp']
+        if logo_path:
+            logo_width = 500 * dpi / 100
+            cost += calibration['per_mp_ms'] * logo_width * logo_width / 1e6
+        if settings.get('chart_style') == 'Candlestick':
+            cost *= calibration['candle_factor']
+        cost *= calibration['format_factors'].get(output_format, 1.0)
+        if settings.get('background_video'):
+            cost += calibration['per_mp_ms'] * output_mp  # Decoding, blending and encoding one full frame
+        frame_ms += cost
+
+        # Held frames repeat identical pictures, which encode to a small fraction of a normal frame
+        # (image sequences write every held frame as a full file)
+        hold_frames = hold_seconds * fps * (1.0 if output_format in SEQUENCE_FORMATS else 0.05)
+        output_bytes += calibration['bytes_per_mp_frame'].get(output_format, 0) * output_mp * (frames + hold_frames)
+        buffer_mib += output_mp * 4 * (2 + depth)  # Agg canvas, savefig copy and the encode ring, 4 bytes per pixel
+        video_seconds = max(video_seconds, frames / fps + hold_seconds)
+
+    base_rss = calibration['base_rss_mib'] or 0.0
+    table_mib = frames * (24 + 16 * len(settings['overlays'])) / 2**20
+    return {
+        'frames': frames,
+        'rows_exact': exact,
+        'video_seconds': video_seconds,
+        'render_seconds': calibration['overhead_s'] * len(settings['output_profiles']) + frames * frame_ms / 1000,
+        'peak_rss_mib': base_rss + buffer_mib + table_mib if base_rss else None,
+        'output_mib': output_bytes / 2**20,
+    }
+
+# Helper function to describe an estimate in one line
+def format_estimate(estimate):
+    text = f"{'' if estimate['rows_exact'] else '~'}{estimate['frames']} frames ({estimate['video_seconds']:.0f} s of video), "
+    text += f"about {estimate['render_seconds'] / 60:.1f} min to render, ~{estimate['output_mib']:.1f} MiB output"
+    if estimate['peak_rss_mib'] is not None:
+        text += f", peak ~{estimate['peak_rss_mib']:.0f} MiB"
+    return text
+
+# Helper function to check a job against its time budget (minutes, 0 = none), returns the estimate or raises ValueError
+def check_time_budget(settings, calibration, budget_minutes=None):
+    estimate = estimate_job(settings, calibration)
+    budget = settings['time_budget'] if budget_minutes is None else budget_minutes
+    if budget and estimate['render_seconds'] > budget * 60:
+        raise ValueError(f"Estimated render time of {estimate['render_seconds'] / 60:.1f} min is over the "
+                         f"{budget:g} min time budget ({format_estimate(estimate)})")
+    return estimate
+
+# Helper function to get the calibration profile from the GUI, running the benchmark first if there is none
+def gui_calibration():
+    calibration = load_calibration()
+    if calibration is None:
+        status_label.config(text="Calibrating render speed on this machine (about 15 seconds)...")
+        root.update_idletasks()
+        calibration = calibrate()
+    return calibration
+
+# Function to show the render estimate for the current settings
+def estimate_animation():
+    status_label.config(text=f"Estimate: {format_estimate(estimate_job(read_settings(), gui_calibration()))}")
+
+# Function to generate the animation
+def generate_animation():
+    settings = read_settings()
+    if settings['time_budget']:
+        try:
+            check_time_budget(settings, gui_calibration())
+        except ValueError as exc:
+            if not messagebox.askyesno("Over time budget", f"{exc}\n\nRender anyway?"):
+                status_label.config(text="Render cancelled: over the time budget")
+                return
+
+    filenames, stats = render_job(settings)
+
+    # Update the UI
+    status = f"Animation saved successfully as {', '.join(filenames)}!"
+    if stats:
+        status += f" {stats['ms_per_frame']:.1f} ms/frame, peak {stats['kib_per_frame']:.0f} KiB allocated/frame"
+        if stats['peak_rss_mib'] is not None:
+            status += f", peak RSS {stats['peak_rss_mib']:.0f} MiB"
+        if stats['encoder_wait_ms'] is not None:
+            status += f", {stats['encoder_wait_ms']:.1f} ms/frame waiting for the encoder"
+    status_label.config(text=status)
+
+# Sharded rendering: a job directory holds manifest.json, the frame table and the rendered segments.
+# Hosts only coordinate through that directory (lock files for claiming shards, JSON markers when done).
+MANIFEST_VERSION = 1
+
+# Helper function to get the paths used inside a job directory
+def shard_paths(job_dir, index):
+    base = os.path.join(job_dir, 'segments', f"shard_{index:05d}")
+    return {'lock': base + '.lock', 'done': base + '.json', 'base': base}
+
+# Helper function to hash the frame table contents, so a manifest changes whenever the data does
+def table_digest(table):
+    digest = hashlib.sha256()
+    for key in sorted(table):
+        digest.update(key.encode())
+        digest.update(np.ascontiguousarray(table[key]).tobytes())
+    return digest.hexdigest()
+
+# Function to fetch the data once and write a manifest of frame-range shards into a job directory
+def write_manifest(settings, job_dir, frames_per_shard=300):
+    if settings.get('output_format', 'MP4') != 'MP4':
+        raise ValueError("Sharded rendering only supports MP4 output (segments are joined by stream copy)")
+    if settings.get('chart_style') == 'Ticker Tape':
+        raise ValueError("Ticker tapes are not sharded, they only encode one cycle")
+    table = load_frame_table(settings)
+    frame_count = len(table['timestamps'])
+    shards = [{'index': i, 'start': start, 'end': min(start + frames_per_shard, frame_count)}
+              for i, start in enumerate(range(0, frame_count, frames_per_shard))]
+
+    # The content hash covers the settings, the shard layout and the data, never paths or times
+    content = {'version': MANIFEST_VERSION, 'settings': settings, 'frame_count': frame_count,
+               'shards': shards, 'data': table_digest(table)}
+    job_hash = hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+    os.makedirs(os.path.join(job_dir, 'segments'), exist_ok=True)
+    os.makedirs(os.path.join(job_dir, 'frames'), exist_ok=True)
+    for key, values in table.items():
+        np.save(os.path.join(job_dir, 'frames', f"{key}.npy"), values)
+    manifest = dict(content, hash=job_hash, outputs={name: output_filename(settings, name) for name in settings['output_profiles']})
+    with open(os.path.join(job_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+# Helper function to load a job directory's manifest and memory-mapped frame table, checking the data is the one hashed
+def load_job(job_dir):
+    with open(os.path.join(job_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    frames_dir = os.path.join(job_dir, 'frames')
+    table = {name[:-4]: np.load(os.path.join(frames_dir, name), mmap_mode='r', allow_pickle=False)
+             for name in os.listdir(frames_dir) if name.endswith('.npy')}
+    if table_digest(table) != manifest['data']:
+        raise ValueError(f"{job_dir}: frame table does not match the manifest")
+    return manifest, table
+
+# Shard locks hold the owner's host, pid and start time. A worker touches its lock every LOCK_HEARTBEAT seconds
+# while rendering, so a lock whose worker was killed goes stale and another worker may take the shard over.
+LOCK_TIMEOUT = 600
+LOCK_HEARTBEAT = 60
+
+# Helper function to get this machine's host name, as written into shard locks
+def host_name():
+    return os.uname().nodename if hasattr(os, 'uname') else ''
+
+# Helper function to read a shard's lock (host, pid, started, seconds since the last heartbeat), None if unclaimed
+def read_shard_lock(job_dir, index):
+    path = shard_paths(job_dir, index)['lock']
+    try:
+        age = time.time() - os.path.getmtime(path)
+        with open(path) as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None
+    try:
+        lock = json.loads(text)
+    except ValueError:  # Half-written lock
+        lock = {}
+    return dict(lock, age=age, text=text)
+
+# Helper function to tell whether a lock's worker is gone: no heartbeat for `timeout` seconds, or its process
+# no longer exists on this host
+def lock_is_stale(lock, timeout=LOCK_TIMEOUT):
+    if lock['age'] > timeout:
+        return True
+    if hasattr(os, 'uname') and lock.get('host') == host_name() and lock.get('pid'):
+        try:
+            os.kill(lock['pid'], 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass  # Alive, owned by another user
+    return False
+
+# Helper function to claim a shard by creating its lock file, fails if another worker holds a live lock on it.
+# A stale lock is first renamed aside, which only one of several workers racing for it can do.
+def claim_shard(job_dir, index, timeout=LOCK_TIMEOUT):
+    path = shard_paths(job_dir, index)['lock']
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        lock = read_shard_lock(job_dir, index)
+        if lock is not None:
+            if not lock_is_stale(lock, timeout):
+                return False
+            stale_path = f"{path}.stale-{host_name()}-{os.getpid()}"
+            try:
+                os.rename(path, stale_path)
+            except FileNotFoundError:
+                return False  # Another worker moved it first
+            with open(stale_path) as f:
+                moved = f.read()
+            if moved != lock['text']:
+                # A fresh lock was created between reading and renaming, put it back
+                with contextlib.suppress(FileExistsError):
+                    os.link(stale_path, path)
+                os.remove(stale_path)
+                return False
+            os.remove(stale_path)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'host': host_name(), 'pid': os.getpid(), 'started': time.time()}, f)
+    return True
+
+# Context manager that touches a claimed shard's lock every LOCK_HEARTBEAT seconds while its shard renders
+@contextlib.contextmanager
+def shard_heartbeat(job_dir, index):
+    path = shard_paths(job_dir, index)['lock']
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(LOCK_HEARTBEAT):
+            with contextlib.suppress(OSError):
+                os.utime(path)
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+# Function to render one shard into encoded segments (one per output profile)
+def render_shard(job_dir, manifest, table, index):
+    shard = manifest['shards'][index]
+    paths = shard_paths(job_dir, index)
+    settings = dict(manifest['settings'], profile_frames=False, progressive='Off')  # Segments are only intermediate files
+    partial = {name: f"{paths['base']}{OUTPUT_PROFILES[name]['suffix']}.partial.mp4" for name in settings['output_profiles']}
+    render_job(settings, table, range(shard['start'], shard['end']), partial)
+
+    # Move the finished segments into place, then write the done marker last
+    segments = {}
+    for name, partial_file in partial.items():
+        segments[name] = os.path.basename(partial_file.replace('.partial.mp4', '.mp4'))
+        os.replace(partial_file, os.path.join(job_dir, 'segments', segments[name]))
+    with open(paths['done'] + '.tmp', 'w') as f:
+        json.dump({'hash': manifest['hash'], 'index': index, 'frames': shard['end'] - shard['start'], 'segments': segments}, f)
+    os.replace(paths['done'] + '.tmp', paths['done'])
+
+# Function to render shards of a job: the given one, or keep claiming free shards (and shards whose lock went
+# stale after `timeout` seconds) until none are left
+def run_worker(job_dir, index=None, timeout=LOCK_TIMEOUT):
+    manifest, table = load_job(job_dir)
+    if index is not None:
+        render_shard(job_dir, manifest, table, index)
+        return [index]
+
+    rendered = []
+    for shard in manifest['shards']:
+        if os.path.exists(shard_paths(job_dir, shard['index'])['done']) or not claim_shard(job_dir, shard['index'], timeout):
+            continue
+        with shard_heartbeat(job_dir, shard['index']):
+            render_shard(job_dir, manifest, table, shard['index'])
+        rendered.append(shard['index'])
+    return rendered
+
+# Function to check every shard is done for this manifest, then losslessly concatenate the segments
+def merge_job(job_dir, output_dir='.'):
+    manifest, table = load_job(job_dir)
+    problems = []
+    markers = []
+    for shard in manifest['shards']:
+        done_path = shard_paths(job_dir, shard['index'])['done']
+        if not os.path.exists(done_path):
+            lock = read_shard_lock(job_dir, shard['index'])
+            if lock is None:
+                state = "not claimed"
+            else:
+                state = (f"claimed by {lock.get('host') or '?'}:{lock.get('pid') or '?'}, last heartbeat {lock['age']:.0f} s ago"
+                         f"{', stale: run a worker to take it over' if lock_is_stale(lock) else ''}")
+            problems.append(f"shard {shard['index']} is not rendered ({state})")
+            continue
+        with open(done_path) as f:
+            marker = json.load(f)
+        if marker['hash'] != manifest['hash']:
+            problems.append(f"shard {shard['index']} was rendered for a different manifest")
+        elif marker['frames'] != shard['end'] - shard['start']:
+            problems.append(f"shard {shard['index']} has {marker['frames']} frames, expected {shard['end'] - shard['start']}")
+        for segment in marker['segments'].values():
+            if not os.path.getsize(os.path.join(job_dir, 'segments', segment)):
+                problems.append(f"segment {segment} is empty")
+        markers.append(marker)
+    if problems:
+        raise ValueError(f"{job_dir}: cannot merge, " + "; ".join(problems))
+
+    # Stream-copy the segments with ffmpeg's concat demuxer, no re-encode
+    outputs = []
+    for name, filename in manifest['outputs'].items():
+        list_path = os.path.join(job_dir, f"concat{OUTPUT_PROFILES[name]['suffix']}.txt")
+        with open(list_path, 'w') as f:
+            for marker in markers:
+                f.write(f"file '{os.path.abspath(os.path.join(job_dir, 'segments', marker['segments'][name]))}'\n")
+        output_path = os.path.join(output_dir, filename)
+        subprocess.run([matplotlib.rcParams['animation.ffmpeg_path'], '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                        '-i', list_path, '-c', 'copy', output_path], check=True)
+        outputs.append(output_path)
+    return outputs
+
+# Bulk prefetch: download many tickers concurrently into series stores before any rendering starts.
+# Talks to Yahoo's chart API over one pooled keep-alive session; base_url can point at any server
+# answering with the same JSON (e.g. a local stub server).
+YAHOO_CHART_URL = 'https://query1.finance.yahoo.com/v8/finance/chart'
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Helper function to make a token-bucket rate limiter, acquire() blocks until a request may start
+def make_rate_limiter(rate, burst=1):
+    if not rate:
+        return lambda: None
+    lock = threading.Lock()
+    bucket = {'tokens': float(burst), 'stamp': time.monotonic()}
+
+    def acquire():
+        while True:
+            with lock:
+                now = time.monotonic()
+                bucket['tokens'] = min(burst, bucket['tokens'] + (now - bucket['stamp']) * rate)
+                bucket['stamp'] = now
+                if bucket['tokens'] >= 1:
+                    bucket['tokens'] -= 1
+                    return
+                wait = (1 - bucket['tokens']) / rate
+            time.sleep(wait)
+
+    return acquire
+
+# Helper function to turn a chart API response into store columns (int64 ns timestamps, float64 close/open/high/low/volume)
+def parse_chart(payload):
+    chart = payload.get('chart') or {}
+    if not chart.get('result'):
+        raise ValueError((chart.get('error') or {}).get('description') or "empty chart result")
+    result = chart['result'][0]
+    timestamps = np.asarray(result.get('timestamp') or [], dtype=np.int64) * 1_000_000_000
+    quotes = result.get('indicators', {}).get('quote') or [{}]
+    columns = {'timestamps': timestamps}
+    for column in ('close',) + OPTIONAL_STORE_COLUMNS:
+        if column in quotes[0] or column == 'close':
+            columns[column] = np.asarray(quotes[0].get(column) or [], dtype=np.float64)  # Missing bars come back as null -> nan
+            if len(columns[column]) != len(timestamps):
+                raise ValueError(f"{len(timestamps)} timestamps but {len(columns[column])} {column} values")
+    keep = ~np.isnan(columns['close'])
+    return {column: values[keep] for column, values in columns.items()}
+
+# Function to download one ticker's chart with rate limiting and exponential-backoff retries
+def fetch_chart(session, ticker, start_date, end_date, interval='1d', base_url=YAHOO_CHART_URL,
+                acquire=lambda: None, retries=4, backoff=0.5, timeout=30):
+    params = {
+        'period1': int(datetime.datetime.strptime(start_date, '%Y-%m-%d').replace(tzinfo=datetime.timezone.utc).timestamp()),
+        'period2': int(datetime.datetime.strptime(end_date, '%Y-%m-%d').replace(tzinfo=datetime.timezone.utc).timestamp()),
+        'interval': interval,
+    }
+    url = f"{base_url.rstrip('/')}/{urllib.parse.quote(ticker)}"
+    error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1) * random.uniform(1, 1.5))  # Jitter spreads out retrying workers
+        acquire()
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except requests.RequestException as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            continue
+        if response.status_code == 200:
+            return parse_chart(response.json())
+        error = f"HTTP {response.status_code}"
+        if response.status_code not in RETRY_STATUSES:
+            break
+    raise RuntimeError(f"{ticker}: {error} after {attempt + 1} attempt(s)")
+
+# Function to prefetch many tickers concurrently into <store_dir>/<TICKER> series stores,
+# returns {'ok': {ticker: store path}, 'failed': {ticker: error}} instead of stopping at the first failure
+def prefetch_tickers(tickers, store_dir, start_date, end_date, interval='1d', concurrency=8, rate=5, burst=5,
+                     retries=4, backoff=0.5, base_url=YAHOO_CHART_URL):
+    session = requests.Session()
+    session.headers['User-Agent'] = 'Mozilla/5.0'  # Yahoo rejects the default requests agent
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    acquire = make_rate_limiter(rate, burst)
+
+    def fetch_one(ticker):
+        columns = fetch_chart(session, ticker, start_date, end_date, interval, base_url, acquire, retries, backoff)
+        timestamps, closes = columns.pop('timestamps'), columns.pop('close')
+        path = os.path.join(store_dir, ticker)
+        create_series_store(path, ticker, columns)
+        append_series_store(path, timestamps, closes, **columns)
+        return path
+
+    report = {'ok': {}, 'failed': {}}
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))  # Dedupe, keep order
+    progress_bar = tqdm(total=len(tickers), desc="Prefetching", unit="tickers")
+    with session, concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(fetch_one, ticker): ticker for ticker in tickers}
+        for future in concurrent.futures.as_completed(futures):
+            ticker = futures[future]
+            try:
+                report['ok'][ticker] = future.result()
+            except Exception as exc:
+                report['failed'][ticker] = str(exc)
+            progress_bar.update(1)
+    progress_bar.close()
+    return report
+
+# Helper function to fill in the defaults of a job settings dict and check its choices
+def normalize_settings(raw):
+    settings = dict(DEFAULT_SETTINGS, **raw)
+    settings['ticker'] = settings['ticker'].upper()
+    for profile_name in settings['output_profiles']:
+        if profile_name not in OUTPUT_PROFILES:
+            raise ValueError(f"Unknown output profile {profile_name!r}")
+    if settings['output_format'] not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {settings['output_format']!r}")
+    if settings['progressive'] not in PROGRESSIVE_MODES:
+        raise ValueError(f"Unknown progressive mode {settings['progressive']!r}")
+    settings['intro_hold'] = parse_seconds(settings['intro_hold'], "Intro hold")
+    settings['outro_hold'] = parse_seconds(settings['outro_hold'], "Outro hold")
+    settings['pauses'] = [[date, parse_seconds(seconds, f"Pause on {date}")] for date, seconds in settings['pauses']]
+    return settings
+
+# Helper function to read a job settings JSON file, filling in the defaults
+def load_settings_file(path):
+    with open(path) as f:
+        return normalize_settings(json.load(f))
+
+# Warm render service: a local HTTP/JSON API in front of long-lived worker processes. Each worker is this script
+# started once with the 'serve-worker' command; it pays the start-up costs (imports, font lookup, glyph atlas,
+# logos, first figure draw) before taking any job, then renders job after job read as JSON lines from stdin.
+HEADER_CHARS = string.ascii_letters + string.digits + " :"
+WORKER_RESTART_DELAYS = (1, 2, 4, 8, 16, 32)  # Seconds between failed worker start-ups before a worker slot gives up
+
+# Function to pay the one-off start-up costs before the first job arrives
+def warm_up():
+    regular_font, bold_font = find_font_path(), find_font_path('bold')
+    for profile in OUTPUT_PROFILES.values():
+        dpi = min(profile['size']) / 6
+        warm_glyph_atlas(bold_font, int(round(14 * dpi / 72)))
+        warm_glyph_atlas(regular_font, int(round(12 * dpi / 72)), HEADER_CHARS)
+
+    # Decode every logo and resize it to each profile's width
+    for logo_folder in LOGO_FOLDERS.values():
+        if not os.path.isdir(logo_folder):
+            continue
+        for logo_file in os.listdir(logo_folder):
+            if logo_file.lower().endswith('.png'):
+                for profile in OUTPUT_PROFILES.values():
+                    get_logo(os.path.join(logo_folder, logo_file), int(500 * min(profile['size']) / 6 / 100))
+
+    # Draw a small chart once so matplotlib's backend, font manager and text layout caches are loaded
+    timestamps = np.datetime64('2024-01-01', 'ns').astype(np.int64) + np.arange(3, dtype=np.int64) * 86400 * 10**9
+    table = frame_table_from_arrays(timestamps, np.array([1.0, 2.0, 1.5]))
+    fig, draw_frame = setup_chart(dict(DEFAULT_SETTINGS, ticker='WARM'), table, 'Classic')
+    draw_frame(2)
+    fig.canvas.draw()
+    plt.close(fig)
+
+# Function to run one warm worker: report ready, then render each job line from stdin and answer with a result line
+def run_service_worker():
+    replies = sys.stdout
+    sys.stdout = sys.stderr  # Keep library prints (e.g. download progress) out of the reply stream
+    warm_start = time.perf_counter()
+    warm_up()
+    replies.write(json.dumps({'ready': True, 'warm_seconds': time.perf_counter() - warm_start}) + "\n")
+    replies.flush()
+
+    for line in sys.stdin:
+        job = json.loads(line)
+        render_start = time.perf_counter()
+        try:
+            settings = normalize_settings(job['settings'])
+            os.makedirs(job['output_dir'], exist_ok=True)
+            filenames = {profile_name: os.path.join(job['output_dir'], output_filename(settings, profile_name))
+                         for profile_name in settings['output_profiles']}
+            files, stats = render_job(settings, filenames=filenames)
+            reply = {'status': 'done', 'files': [os.path.basename(filename) for filename in files], 'stats': stats}
+        except Exception as exc:
+            reply = {'status': 'failed', 'error': f"{type(exc).__name__}: {exc}"}
+        reply['render_seconds'] = time.perf_counter() - render_start
+        replies.write(json.dumps(reply) + "\n")
+        replies.flush()
+
+# Function to start the render service: worker threads each drive one warm worker process and take jobs from a queue
+def start_render_service(output_dir, workers=2, max_minutes=0):
+    calibration = load_calibration()
+    if calibration is None and max_minutes:
+        print("Calibrating render speed for the time budget...")
+        calibration = calibrate()
+    jobs = {}
+    jobs_lock = threading.Lock()
+    pending = queue.Queue()
+    ready = []
+    down = {}  # Worker slot -> its last start-up error while the slot has no running worker
+    stopping = threading.Event()
+
+    def update_job(job_id, **changes):
+        with jobs_lock:
+            jobs[job_id].update(changes)
+
+    def start_worker():
+        proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'serve-worker'],
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+        hello = proc.stdout.readline()
+        if not hello:
+            raise RuntimeError(f"Render worker exited during start-up (exit code {proc.wait()})")
+        with jobs_lock:
+            ready.append(proc.pid)
+        return proc
+
+    # Helper function (call with jobs_lock held) to check if every slot has given up on starting its worker
+    def all_workers_down():
+        return len(down) == workers and not any(state['retrying'] for state in down.values())
+
+    # Helper function to start the worker of one slot, waiting longer after each failed start. The failure shows in
+    # the service status; once every slot has given up, queued jobs fail with the error instead of waiting forever.
+    def start_worker_with_retries(slot):
+        delays = list(WORKER_RESTART_DELAYS)
+        while True:
+            try:
+                proc = start_worker()
+            except Exception as exc:
+                error = f"Render worker could not start: {type(exc).__name__}: {exc}"
+                with jobs_lock:
+                    down[slot] = {'slot': slot, 'error': error, 'retrying': bool(delays)}
+                    while all_workers_down() and not pending.empty():
+                        job_id = pending.get_nowait()
+                        if job_id is not None:
+                            jobs[job_id].update(status='failed', finished=time.time(), error=error)
+                if delays and not stopping.wait(delays.pop(0)):
+                    continue
+                return None
+            with jobs_lock:
+                down.pop(slot, None)
+            return proc
+
+    def drive_worker(slot):
+        proc = start_worker_with_retries(slot)
+        while proc is not None:
+            job_id = pending.get()
+            if job_id is None:
+                proc.stdin.close()
+                proc.wait()
+                return
+            with jobs_lock:
+                job = jobs[job_id]
+                job.update(status='running', started=time.time())
+                request = {'settings': job['settings'], 'output_dir': os.path.join(output_dir, job_id)}
+            try:
+                proc.stdin.write(json.dumps(request) + "\n")
+                proc.stdin.flush()
+                reply = proc.stdout.readline()
+            except OSError:
+                reply = ''
+            if reply:
+                update_job(job_id, finished=time.time(), **json.loads(reply))
+                continue
+
+            # The worker died mid-job: fail the job and replace the worker with a fresh warm one
+            update_job(job_id, status='failed', finished=time.time(), error=f"Render worker exited (exit code {proc.wait()})")
+            with jobs_lock:
+                ready.remove(proc.pid)
+            proc = start_worker_with_retries(slot)
+
+    def submit(raw_settings):
+        unknown = sorted(set(raw_settings) - set(DEFAULT_SETTINGS))
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(unknown)}")
+        settings = normalize_settings(raw_settings)
+        if not settings['ticker'] and not settings['series_store'] and not settings['race_tickers']:
+            raise ValueError("A ticker, a series store or race tickers are required")
+        if settings['output_format'] in SEQUENCE_FORMATS:
+            raise ValueError("Image sequences are folders of files, render them with the GUI or the command line")
+
+        # Reject jobs whose estimate is over their own or the service's time budget, before they take a worker
+        estimate = None
+        if calibration:
+            budgets = [budget for budget in (settings['time_budget'], max_minutes) if budget]
+            estimate = check_time_budget(settings, calibration, min(budgets) if budgets else 0)
+        job_id = uuid.uuid4().hex[:12]
+        with jobs_lock:
+            jobs[job_id] = {'id': job_id, 'status': 'queued', 'settings': settings, 'submitted': time.time(), 'estimate': estimate,
+                            'outputs': [output_filename(settings, profile_name) for profile_name in settings['output_profiles']]}
+            if all_workers_down():
+                jobs[job_id].update(status='failed', finished=time.time(), error=down[0]['error'])
+            else:
+                pending.put(job_id)
+        return job_id
+
+    def describe(job_id=None):
+        with jobs_lock:
+            if job_id is not None:
+                return dict(jobs[job_id]) if job_id in jobs else None
+            return {'workers': workers, 'ready_workers': len(ready), 'queued': pending.qsize(),
+                    'down_workers': [dict(state) for slot, state in sorted(down.items())],
+                    'jobs': [{key: job[key] for key in ('id', 'status', 'submitted')} for job in jobs.values()]}
+
+    def stop():
+        stopping.set()
+        for _ in threads:
+            pending.put(None)
+        for thread in threads:
+            thread.join()
+
+    threads = [threading.Thread(target=drive_worker, args=(slot,), daemon=True) for slot in range(workers)]
+    for thread in threads:
+        thread.start()
+    return submit, describe, stop
+
+# HTTP front end of the render service:
+#   POST /jobs                      submit a job (settings JSON, missing keys use the defaults) -> 202 {"id": ...}
+#   GET  /jobs                      service status and every job's status
+#   GET  /jobs/<id>                 one job's status, timings and output file names
+#   GET  /jobs/<id>/files/<name>    download a finished output file
+class RenderServiceHandler(BaseHTTPRequestHandler):
+    submit = describe = output_dir = None  # Set by serve_renders
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/jobs':
+            return self.send_json(404, {'error': "Not found"})
+        try:
+            raw_settings = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+            job_id = self.submit(raw_settings)
+        except (ValueError, TypeError, AttributeError, OSError) as exc:
+            return self.send_json(400, {'error': str(exc)})
+        self.send_json(202, {'id': job_id, 'status': 'queued', 'url': f"/jobs/{job_id}"})
+
+    def do_GET(self):
+        parts = [urllib.parse.unquote(part) for part in self.path.split('?')[0].strip('/').split('/')]
+        if parts == ['jobs']:
+            return self.send_json(200, self.describe())
+        if len(parts) < 2 or parts[0] != 'jobs':
+            return self.send_json(404, {'error': "Not found"})
+        job = self.describe(parts[1])
+        if job is None:
+            return self.send_json(404, {'error': f"No job {parts[1]}"})
+        if len(parts) == 2:
+            return self.send_json(200, job)
+        if len(parts) != 4 or parts[2] != 'files':
+            return self.send_json(404, {'error': "Not found"})
+        # Progressive outputs can be fetched while the job runs: the fragmented MP4 as far as it is written,
+        # or the HLS playlist and whichever of its segments are listed in it
+        progressive = job['settings']['progressive'] != 'Off'
+        if job['status'] != 'done' and not (progressive and job['status'] == 'running'):
+            return self.send_json(409, {'error': f"Job is {job['status']}"})
+        names = job['files'] if job['status'] == 'done' else job['outputs']
+        segments = job['settings']['progressive'] == 'HLS' and any(
+            parts[3].startswith(os.path.splitext(name)[0] + '_') and parts[3].endswith('.ts') for name in names)
+        if parts[3] not in names and not segments:
+            return self.send_json(404, {'error': f"No file {parts[3]}"})
+
+        path = os.path.join(self.output_dir, job['id'], parts[3])
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return self.send_json(404, {'error': f"{parts[3]} is not written yet"})
+        with f:
+            size = os.fstat(f.fileno()).st_size  # A growing file is sent as far as it is written now
+            self.send_response(200)
+            self.send_header('Content-Type', {'.mp4': 'video/mp4', '.gif': 'image/gif', '.webp': 'image/webp',
+                                              '.m3u8': 'application/vnd.apple.mpegurl', '.ts': 'video/mp2t'}.get(
+                os.path.splitext(path)[1], 'application/octet-stream'))
+            self.send_header('Content-Length', str(size))
+            if job['status'] != 'done':
+                self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            remaining = size
+            while remaining:
+                chunk = f.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+# Function to run the render service until interrupted
+def serve_renders(host='127.0.0.1', port=8765, workers=2, output_dir='renders', max_minutes=0):
+    output_dir = os.path.abspath(output_dir)
+    submit, describe, stop = start_render_service(output_dir, workers, max_minutes)
+    handler = type('Handler', (RenderServiceHandler,), {'submit': staticmethod(submit), 'describe': staticmethod(describe),
+                                                       'output_dir': output_dir})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Render service on http://{host}:{server.server_port} with {workers} warm workers, output in {output_dir}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        stop()
+
+# Function to run the command line interface (plan / worker / merge / store / ingest / sample-trades / prefetch / batch / serve / calibrate / estimate)
+def run_command(argv):
+    parser = argparse.ArgumentParser(description="Sharded ticker animation rendering")
+    commands = parser.add_subparsers(dest='command', required=True)
+    plan_parser = commands.add_parser('plan', help="fetch data and write a shard manifest into a job directory")
+    plan_parser.add_argument('job_dir')
+    plan_parser.add_argument('settings', help="JSON file with job settings (missing keys use the defaults)")
+    plan_parser.add_argument('--frames-per-shard', type=int, default=300)
+    worker_parser = commands.add_parser('worker', help="render shards of a job directory")
+    worker_parser.add_argument('job_dir')
+    worker_parser.add_argument('--shard', type=int, help="render this shard even if claimed (default: claim free shards)")
+    worker_parser.add_argument('--lock-timeout', type=float, default=LOCK_TIMEOUT,
+                               help="seconds without a heartbeat after which another worker's shard is taken over")
+    store_parser = commands.add_parser('store', help="download a ticker into a memory-mapped series store")
+    store_parser.add_argument('ticker')
+    store_parser.add_argument('path')
+    store_parser.add_argument('--start', default=DEFAULT_SETTINGS['start_date'])
+    store_parser.add_argument('--end', default=DEFAULT_SETTINGS['end_date'])
+    store_parser.add_argument('--interval', default='1d', help="yfinance bar interval, e.g. 1m, 1h, 1d")
+    ingest_parser = commands.add_parser('ingest', help="aggregate raw trade files (CSV or binary) into OHLCV bars in a series store")
+    ingest_parser.add_argument('store')
+    ingest_parser.add_argument('trades', nargs='+', help="trade files in time order (.csv, .csv.gz, .zip or .bin records)")
+    ingest_parser.add_argument('--interval', default='1m', help="bar interval, e.g. 1s, 5m, 1h, 1d")
+    ingest_parser.add_argument('--ticker', default='')
+    ingest_parser.add_argument('--format', choices=['auto', 'csv', 'binary'], default='auto')
+    ingest_parser.add_argument('--columns', default=','.join(TRADE_COLUMNS),
+                               help="CSV time, price and size columns, by name or 0-based position (no header row)")
+    ingest_parser.add_argument('--time-unit', choices=[*TIME_UNITS, 'iso'], default='ms')
+    ingest_parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+    sample_parser = commands.add_parser('sample-trades', help="write a synthetic trade file to try out ingest")
+    sample_parser.add_argument('path', help="output file, .bin for binary records, otherwise CSV")
+    sample_parser.add_argument('--rows', type=int, default=1_000_000)
+    sample_parser.add_argument('--start', default='2024-01-01')
+    prefetch_parsers = []
+    prefetch_parser = commands.add_parser('prefetch', help="download many tickers concurrently into series stores")
+    prefetch_parser.add_argument('store_dir')
+    prefetch_parser.add_argument('tickers', nargs='+')
+    prefetch_parser.add_argument('--start', default=DEFAULT_SETTINGS['start_date'])
+    prefetch_parser.add_argument('--end', default=DEFAULT_SETTINGS['end_date'])
+    prefetch_parser.add_argument('--interval', default='1d')
+    prefetch_parsers.append(prefetch_parser)
+    batch_parser = commands.add_parser('batch', help="prefetch every ticker, then render each one with the same settings")
+    batch_parser.add_argument('settings', help="JSON file with job settings (ticker is replaced per render)")
+    batch_parser.add_argument('store_dir')
+    batch_parser.add_argument('tickers', nargs='+')
+    prefetch_parsers.append(batch_parser)
+    for sub_parser in prefetch_parsers:
+        sub_parser.add_argument('--concurrency', type=int, default=8)
+        sub_parser.add_argument('--rate', type=float, default=5, help="requests per second (0 = unlimited)")
+        sub_parser.add_argument('--retries', type=int, default=4)
+        sub_parser.add_argument('--base-url', default=YAHOO_CHART_URL)
+    merge_parser = commands.add_parser('merge', help="validate and concatenate rendered shards")
+    merge_parser.add_argument('job_dir')
+    merge_parser.add_argument('--output-dir', default='.')
+    serve_parser = commands.add_parser('serve', help="run a local HTTP render service backed by warm worker processes")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    serve_parser.add_argument('--output-dir', default='renders')
+    serve_parser.add_argument('--max-minutes', type=float, default=0, help="reject jobs estimated to take longer (0 = no limit)")
+    commands.add_parser('calibrate', help="measure this machine's render speed for estimates")
+    estimate_parser = commands.add_parser('estimate', help="estimate frames, render time, memory and output size of a job")
+    estimate_parser.add_argument('settings', help="JSON file with job settings (missing keys use the defaults)")
+    commands.add_parser('serve-worker', help="internal: one warm render worker of the service (JSON lines on stdin/stdout)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'plan':
+        settings = load_settings_file(args.settings)
+        manifest = write_manifest(settings, args.job_dir, args.frames_per_shard)
+        print(f"{manifest['hash']}: {manifest['frame_count']} frames in {len(manifest['shards'])} shards")
+    elif args.command == 'worker':
+        rendered = run_worker(args.job_dir, args.shard, args.lock_timeout)
+        print(f"Rendered shards: {', '.join(map(str, rendered)) or 'none'}")
+    elif args.command == 'store':
+        data = yf.download(args.ticker.upper(), start=args.start, end=args.end, interval=args.interval)
+        header = save_series_store(data, args.path, args.ticker.upper())
+        print(f"Saved {header['rows']} rows to {args.path}")
+    elif args.command == 'ingest':
+        report = ingest_trades(args.trades, args.store, args.interval, args.ticker.upper(), args.format,
+                               args.columns.split(','), args.time_unit, args.chunk_rows)
+        print(f"Aggregated {report['rows']} trades into {report['bars']} {args.interval} bars in {args.store} "
+              f"({report['rows_per_second'] / 1e6:.1f}M rows/s)")
+    elif args.command == 'sample-trades':
+        write_sample_trades(args.path, args.rows, args.start)
+        print(f"Wrote {args.rows} sample trades to {args.path}")
+    elif args.command in ('prefetch', 'batch'):
+        settings = load_settings_file(args.settings) if args.command == 'batch' else None
+        start_date = settings['start_date'] if settings else args.start
+        end_date = settings['end_date'] if settings else args.end
+        interval = '1d' if settings else args.interval
+        report = prefetch_tickers(args.tickers, args.store_dir, start_date, end_date, interval,
+                                  args.concurrency, args.rate, max(1, int(args.rate)), args.retries, base_url=args.base_url)
+        for ticker, error in sorted(report['failed'].items()):
+            print(f"Failed {ticker}: {error}")
+        print(f"Prefetched {len(report['ok'])} of {len(report['ok']) + len(report['failed'])} tickers into {args.store_dir}")
+        if settings:
+            for ticker, path in report['ok'].items():
+                filenames, stats = render_job(dict(settings, ticker=ticker, series_store=path))
+                print(f"Animation saved successfully as {', '.join(filenames)}!")
+        if report['failed']:
+            sys.exit(1)
+    elif args.command == 'merge':
+        for output in merge_job(args.job_dir, args.output_dir):
+            print(f"Animation saved successfully as {output}!")
+    elif args.command == 'serve':
+        serve_renders(args.host, args.port, args.workers, args.output_dir, args.max_minutes)
+    elif args.command == 'calibrate':
+        calibration = calibrate()
+        print(f"Saved calibration to {CALIBRATION_FILE}: {calibration['base_ms']:.1f} ms + {calibration['per_mp_ms']:.1f} ms/MP per frame")
+    elif args.command == 'estimate':
+        settings = load_settings_file(args.settings)
+        calibration = load_calibration() or calibrate()
+        try:
+            print(format_estimate(check_time_budget(settings, calibration)))
+        except ValueError as exc:
+            print(exc)
+            sys.exit(1)
+    elif args.command == 'serve-worker':
+        run_service_worker()
+
+# Run a command instead of the GUI when arguments are given
+if len(sys.argv) > 1:
+    run_command(sys.argv[1:])
+    sys.exit(0)
+
+# Set up the tkinter GUI
+root = tk.Tk()
+root.title("Ticker Animation Generator")
+
+# Calculate default dates
+default_end_date = (datetime.datetime.now() - datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+default_start_date = (datetime.datetime.now() - datetime.timedelta(days=365)).strftime('%Y-%m-%d')
+
+# Ticker type radio buttons
+ticker_type_var = tk.StringVar(value="Stock")
+stock_radio = ttk.Radiobutton(root, text="Stock Ticker", variable=ticker_type_var, value="Stock")
+crypto_radio = ttk.Radiobutton(root, text="Crypto Ticker", variable=ticker_type_var, value="Crypto")
+stock_radio.grid(row=0, column=0, padx=10, pady=10)
+crypto_radio.grid(row=0, column=1, padx=10, pady=10)
+
+# Ticker entry
+ticker_label = ttk.Label(root, text="Ticker Symbol:")
+ticker_label.grid(row=1, column=0, padx=10, pady=10)
+ticker_entry = ttk.Entry(root)
+ticker_entry.grid(row=1, column=1, padx=10, pady=10)
+
+# Start date entry with default value
+start_label = ttk.Label(root, text="Start Date (YYYY-MM-DD):")
+start_label.grid(row=2, column=0, padx=10, pady=10)
+start_entry = ttk.Entry(root)
+start_entry.insert(0, default_start_date)  # Set default start date
+start_entry.grid(row=2, column=1, padx=10, pady=10)
+
+# End date entry with default value
+end_label = ttk.Label(root, text="End Date (YYYY-MM-DD):")
+end_label.grid(row=3, column=0, padx=10, pady=10)
+end_entry = ttk.Entry(root)
+end_entry.insert(0, default_end_date)  # Set default end date
+end_entry.grid(row=3, column=1, padx=10, pady=10)
+
+# Skip Days entry
+skip_days_label = ttk.Label(root, text="Skip Days:")
+skip_days_label.grid(row=4, column=0, padx=10, pady=10)
+skip_days_entry = ttk.Entry(root)
+skip_days_entry.grid(row=4, column=1, padx=10, pady=10)
+
+# Checkboxes for including start and end dates
+include_start_var = tk.BooleanVar(value=True)
+include_start_check = ttk.Checkbutton(root, text="Include Start Date", variable=include_start_var)
+include_start_check.grid(row=5, column=0, padx=10, pady=10)
+
+include_end_var = tk.BooleanVar(value=True)
+include_end_check = ttk.Checkbutton(root, text="Include End Date", variable=include_end_var)
+include_end_check.grid(row=5, column=1, padx=10, pady=10)
+
+# Custom text entry
+custom_text_label = ttk.Label(root, text="Custom Text:")
+custom_text_label.grid(row=6, column=0, padx=10, pady=10)
+custom_text_box = Text(root, height=4, width=40)
+custom_text_box.grid(row=6, column=1, padx=10, pady=10)
+
+# X Ticks Interval entry
+x_ticks_label = ttk.Label(root, text="X Ticks Interval:")
+x_ticks_label.grid(row=7, column=0, padx=10, pady=10)
+x_ticks_entry = ttk.Entry(root)
+x_ticks_entry.grid(row=7, column=1, padx=10, pady=10)
+
+# Y Ticks Interval entry
+y_ticks_label = ttk.Label(root, text="Y Ticks Interval:")
+y_ticks_label.grid(row=8, column=0, padx=10, pady=10)
+y_ticks_entry = ttk.Entry(root)
+y_ticks_entry.grid(row=8, column=1, padx=10, pady=10)
+
+# Chart Height entry
+chart_height_label = ttk.Label(root, text="Chart Height (%):")
+chart_height_label.grid(row=9, column=0, padx=10, pady=10)
+chart_height_entry = ttk.Entry(root)
+chart_height_entry.grid(row=9, column=1, padx=10, pady=10)
+
+# Watermark text entry
+watermark_label = ttk.Label(root, text="Watermark Text:")
+watermark_label.grid(row=10, column=0, padx=10, pady=10)
+watermark_entry = ttk.Entry(root)
+watermark_entry.grid(row=10, column=1, padx=10, pady=10)
+
+# Watermark color entry
+watermark_color_label = ttk.Label(root, text="Watermark Color:")
+watermark_color_label.grid(row=11, column=0, padx=10, pady=10)
+watermark_color_entry = ttk.Entry(root)
+watermark_color_entry.grid(row=11, column=1, padx=10, pady=10)
+
+# Checkbox for cutting initial frames
+cut_initial_frames_var = tk.BooleanVar(value=False)
+cut_initial_frames_check = ttk.Checkbutton(root, text="Cut Initial Frames", variable=cut_initial_frames_var)
+cut_initial_frames_check.grid(row=12, column=0, padx=10, pady=10)
+
+# Checkbox for per-frame timing and allocation stats
+profile_frames_var = tk.BooleanVar(value=False)
+profile_frames_check = ttk.Checkbutton(root, text="Profile Frames", variable=profile_frames_var)
+profile_frames_check.grid(row=12, column=1, padx=10, pady=10)
+
+# Output profile checkboxes, every checked profile is rendered in the same pass
+output_profiles_label = ttk.Label(root, text="Output Formats:")
+output_profiles_label.grid(row=13, column=0, padx=10, pady=10)
+output_profiles_frame = ttk.Frame(root)
+output_profiles_frame.grid(row=13, column=1, padx=10, pady=10)
+output_profile_vars = {}
+for profile_name in OUTPUT_PROFILES:
+    output_profile_vars[profile_name] = tk.BooleanVar(value=(profile_name == 'Classic'))
+    ttk.Checkbutton(output_profiles_frame, text=profile_name, variable=output_profile_vars[profile_name]).pack(anchor='w')
+
+# Series store entry, renders from a memory-mapped store instead of downloading
+series_store_label = ttk.Label(root, text="Series Store (optional):")
+series_store_label.grid(row=14, column=0, padx=10, pady=10)
+series_store_entry = ttk.Entry(root)
+series_store_entry.grid(row=14, column=1, padx=10, pady=10)
+
+# Overlays entry
+overlays_label = ttk.Label(root, text="Overlays (SMA 50, BB 20, Volume):")
+overlays_label.grid(row=15, column=0, padx=10, pady=10)
+overlays_entry = ttk.Entry(root)
+overlays_entry.grid(row=15, column=1, padx=10, pady=10)
+
+# Chart style selection
+chart_style_label = ttk.Label(root, text="Chart Style:")
+chart_style_label.grid(row=16, column=0, padx=10, pady=10)
+chart_style_var = tk.StringVar(value="Line")
+chart_style_combo = ttk.Combobox(root, textvariable=chart_style_var, values=["Line", "Candlestick", "Bar Race", "Ticker Tape"], state="readonly")
+chart_style_combo.grid(row=16, column=1, padx=10, pady=10)
+
+# Hold entries (seconds on the first / last frame)
+intro_hold_label = ttk.Label(root, text="Intro Hold (s):")
+intro_hold_label.grid(row=17, column=0, padx=10, pady=10)
+intro_hold_entry = ttk.Entry(root)
+intro_hold_entry.grid(row=17, column=1, padx=10, pady=10)
+
+outro_hold_label = ttk.Label(root, text="Outro Hold (s):")
+outro_hold_label.grid(row=18, column=0, padx=10, pady=10)
+outro_hold_entry = ttk.Entry(root)
+outro_hold_entry.grid(row=18, column=1, padx=10, pady=10)
+
+# Pauses entry
+pauses_label = ttk.Label(root, text="Pauses (YYYY-MM-DD secs, ...):")
+pauses_label.grid(row=19, column=0, padx=10, pady=10)
+pauses_entry = ttk.Entry(root)
+pauses_entry.grid(row=19, column=1, padx=10, pady=10)
+
+# Output file format selection
+output_format_label = ttk.Label(root, text="File Format:")
+output_format_label.grid(row=20, column=0, padx=10, pady=10)
+output_format_var = tk.StringVar(value="MP4")
+output_format_combo = ttk.Combobox(root, textvariable=output_format_var, values=list(OUTPUT_FORMATS), state="readonly")
+output_format_combo.grid(row=20, column=1, padx=10, pady=10)
+
+# Bar chart race settings (used when Chart Style is Bar Race)
+race_tickers_label = ttk.Label(root, text="Race / Tape Tickers:")
+race_tickers_label.grid(row=21, column=0, padx=10, pady=10)
+race_tickers_entry = ttk.Entry(root)
+race_tickers_entry.grid(row=21, column=1, padx=10, pady=10)
+
+race_bars_label = ttk.Label(root, text="Race Bars:")
+race_bars_label.grid(row=22, column=0, padx=10, pady=10)
+race_bars_entry = ttk.Entry(root)
+race_bars_entry.grid(row=22, column=1, padx=10, pady=10)
+
+race_metric_label = ttk.Label(root, text="Race Metric:")
+race_metric_label.grid(row=23, column=0, padx=10, pady=10)
+race_metric_var = tk.StringVar(value="Change %")
+race_metric_combo = ttk.Combobox(root, textvariable=race_metric_var, values=["Change %", "Price"], state="readonly")
+race_metric_combo.grid(row=23, column=1, padx=10, pady=10)
+
+race_steps_label = ttk.Label(root, text="Race Frames per Row:")
+race_steps_label.grid(row=24, column=0, padx=10, pady=10)
+race_steps_entry = ttk.Entry(root)
+race_steps_entry.grid(row=24, column=1, padx=10, pady=10)
+
+# Encode queue depth (frames buffered for the encoder threads, 0 encodes on the render thread)
+encode_queue_label = ttk.Label(root, text="Encode Queue Depth:")
+encode_queue_label.grid(row=25, column=0, padx=10, pady=10)
+encode_queue_entry = ttk.Entry(root)
+encode_queue_entry.insert(0, "4")
+encode_queue_entry.grid(row=25, column=1, padx=10, pady=10)
+
+# Ticker tape settings (used when Chart Style is Ticker Tape)
+tape_seconds_label = ttk.Label(root, text="Tape Length (s):")
+tape_seconds_label.grid(row=26, column=0, padx=10, pady=10)
+tape_seconds_entry = ttk.Entry(root)
+tape_seconds_entry.grid(row=26, column=1, padx=10, pady=10)
+
+tape_speed_label = ttk.Label(root, text="Tape Speed (heights/s):")
+tape_speed_label.grid(row=27, column=0, padx=10, pady=10)
+tape_speed_entry = ttk.Entry(root)
+tape_speed_entry.grid(row=27, column=1, padx=10, pady=10)
+
+# Background footage to composite the chart over (optional)
+background_video_label = ttk.Label(root, text="Background Video (optional):")
+background_video_label.grid(row=28, column=0, padx=10, pady=10)
+background_video_entry = ttk.Entry(root)
+background_video_entry.grid(row=28, column=1, padx=10, pady=10)
+
+overlay_position_label = ttk.Label(root, text="Overlay Position:")
+overlay_position_label.grid(row=29, column=0, padx=10, pady=10)
+overlay_position_var = tk.StringVar(value="Center")
+overlay_position_combo = ttk.Combobox(root, textvariable=overlay_position_var, values=OVERLAY_POSITIONS, state="readonly")
+overlay_position_combo.grid(row=29, column=1, padx=10, pady=10)
+
+overlay_scale_label = ttk.Label(root, text="Overlay Size (%):")
+overlay_scale_label.grid(row=30, column=0, padx=10, pady=10)
+overlay_scale_entry = ttk.Entry(root)
+overlay_scale_entry.grid(row=30, column=1, padx=10, pady=10)
+
+overlay_backdrop_label = ttk.Label(root, text="Overlay Backdrop Opacity (%):")
+overlay_backdrop_label.grid(row=31, column=0, padx=10, pady=10)
+overlay_backdrop_entry = ttk.Entry(root)
+overlay_backdrop_entry.grid(row=31, column=1, padx=10, pady=10)
+
+# Time budget entry (minutes, asks before rendering jobs estimated to take longer)
+time_budget_label = ttk.Label(root, text="Time Budget (min, optional):")
+time_budget_label.grid(row=32, column=0, padx=10, pady=10)
+time_budget_entry = ttk.Entry(root)
+time_budget_entry.grid(row=32, column=1, padx=10, pady=10)
+
+# Image sequence compression level entry (0-9, PNG only)
+sequence_level_label = ttk.Label(root, text="Sequence Compression (0-9):")
+sequence_level_label.grid(row=33, column=0, padx=10, pady=10)
+sequence_level_entry = ttk.Entry(root)
+sequence_level_entry.insert(0, "6")
+sequence_level_entry.grid(row=33, column=1, padx=10, pady=10)
+
+# Image sequence compression threads entry (0 = one per core)
+sequence_workers_label = ttk.Label(root, text="Sequence Threads (0 = all cores):")
+sequence_workers_label.grid(row=34, column=0, padx=10, pady=10)
+sequence_workers_entry = ttk.Entry(root)
+sequence_workers_entry.grid(row=34, column=1, padx=10, pady=10)
+
+# Image sequence first frame number entry
+sequence_start_label = ttk.Label(root, text="First Frame Number:")
+sequence_start_label.grid(row=35, column=0, padx=10, pady=10)
+sequence_start_entry = ttk.Entry(root)
+sequence_start_entry.grid(row=35, column=1, padx=10, pady=10)
+
+# Progressive output combobox (MP4 that can be watched while it renders)
+progressive_label = ttk.Label(root, text="Progressive Output:")
+progressive_label.grid(row=36, column=0, padx=10, pady=10)
+progressive_var = tk.StringVar(value="Off")
+progressive_combo = ttk.Combobox(root, textvariable=progressive_var, values=PROGRESSIVE_MODES, state="readonly")
+progressive_combo.grid(row=36, column=1, padx=10, pady=10)
+
+# Fragment length entry (seconds between keyframes, fragments and HLS segments)
+fragment_seconds_label = ttk.Label(root, text="Fragment Seconds:")
+fragment_seconds_label.grid(row=37, column=0, padx=10, pady=10)
+fragment_seconds_entry = ttk.Entry(root)
+fragment_seconds_entry.grid(row=37, column=1, padx=10, pady=10)
+
+# Estimate and Generate buttons
+estimate_button = ttk.Button(root, text="Estimate", command=estimate_animation)
+estimate_button.grid(row=38, column=0, pady=20)
+generate_button = ttk.Button(root, text="Generate Animation", command=generate_animation)
+generate_button.grid(row=38, column=1, pady=20)
+
+# Status label
+status_label = ttk.Label(root, text="")
+status_label.grid(row=39, column=0, columnspan=2, pady=10)
+
+# Run the Tkinter main loop
+root.mainloop()
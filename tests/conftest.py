@@ -0,0 +1,82 @@
+import glob
+import http.server
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import types
+import urllib.parse
+
+import pytest
+
+GENERATORS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'generators')
+LATEST_VERSION = os.path.splitext(os.path.basename(sorted(glob.glob(os.path.join(GENERATORS_DIR, 'v*.py')))[-1]))[0]
+
+# Fixture to run a generator version's command line interface and return the finished process
+@pytest.fixture
+def run_generator(tmp_path):
+    def run(version, *args, timeout=120):
+        return subprocess.run([sys.executable, os.path.join(GENERATORS_DIR, f"{version}.py"), *map(str, args)],
+                              cwd=tmp_path, capture_output=True, text=True, timeout=timeout)
+    return run
+
+# Helper function to load a generator version's functions as a module, without running its command line or GUI
+def load_generator(version):
+    path = os.path.join(GENERATORS_DIR, f"{version}.py")
+    with open(path) as f:
+        source = f.read().split("\n# Run a command instead of the GUI when arguments are given\n")[0]
+    module = types.ModuleType(version)
+    module.__file__ = path
+    exec(compile(source, path, 'exec'), module.__dict__)
+    return module
+
+DAY = 86400
+FIRST_DAY = 1672531200  # 2023-01-01
+
+# Stub chart server: OK tickers answer at once, FLAKY answers 503 then 429 before succeeding, MISSING is a 404
+class ChartHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        ticker = urllib.parse.unquote(url.path.rsplit('/', 1)[-1])
+        with self.server.lock:
+            self.server.requests.append((time.monotonic(), ticker))
+            attempt = sum(1 for _, seen in self.server.requests if seen == ticker)
+        if ticker == 'MISSING':
+            self.reply(404, {'chart': {'result': None, 'error': {'code': 'Not Found', 'description': 'No data found, symbol may be delisted'}}})
+        elif ticker == 'FLAKY' and attempt <= 2:
+            self.reply((503, 429)[attempt - 1], {'error': 'try again'})
+        else:
+            self.reply(200, chart_payload(len(ticker)))
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+# Helper function to build a Yahoo chart response with a null bar that must be dropped
+def chart_payload(seed, rows=10):
+    closes = [100.0 + seed + i for i in range(rows)]
+    closes[3] = None
+    return {'chart': {'result': [{
+        'timestamp': [FIRST_DAY + i * DAY for i in range(rows)],
+        'indicators': {'quote': [{'open': closes, 'high': closes, 'low': closes, 'close': closes, 'volume': [1000] * rows}]},
+    }], 'error': None}}
+
+@pytest.fixture
+def chart_server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ChartHandler)
+    server.requests = []
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,121 @@
+import json
+import os
+import re
+import subprocess
+
+import numpy as np
+import pytest
+
+from conftest import LATEST_VERSION, load_generator
+
+VERSIONS = sorted({'v032', LATEST_VERSION})
+
+@pytest.fixture(scope='module', params=VERSIONS)
+def generator(request):
+    return load_generator(request.param)
+
+# Stand-ins for pyarrow's Array and ChunkedArray, with just the attributes column_array duck-types on
+class FakeArrowArray:
+    def __init__(self, values, null_count=0):
+        self.values = values
+        self.null_count = null_count
+
+    def to_numpy(self, zero_copy_only=True):
+        return self.values
+
+class FakeChunkedArray:
+    def __init__(self, *chunks):
+        self.chunks = chunks
+        self.num_chunks = len(chunks)
+
+    def chunk(self, index):
+        return self.chunks[index]
+
+    def combine_chunks(self):
+        return FakeArrowArray(np.concatenate([chunk.values for chunk in self.chunks]))
+
+def test_column_array_views_matching_inputs(generator):
+    timestamps = np.arange(5, dtype=np.int64) * 86400 * 10**9
+    closes = np.linspace(1, 2, 5)
+    assert np.shares_memory(generator.column_array(timestamps, np.int64, 'timestamps'), timestamps)
+    assert np.shares_memory(generator.column_array(closes, np.float64, 'close'), closes)
+    nanoseconds = timestamps.view('datetime64[ns]')
+    assert np.shares_memory(generator.column_array(nanoseconds, np.int64, 'timestamps'), nanoseconds)
+
+    # Raw bytes are read as the column's dtype, still without a copy
+    buffer = bytearray(closes.tobytes())
+    viewed = generator.column_array(buffer, np.float64, 'close')
+    assert viewed.tolist() == closes.tolist()
+    buffer[:8] = np.float64(7.5).tobytes()
+    assert viewed[0] == 7.5
+
+    chunked = FakeChunkedArray(FakeArrowArray(closes))
+    assert np.shares_memory(generator.column_array(chunked, np.float64, 'close'), closes)
+    combined = generator.column_array(FakeChunkedArray(FakeArrowArray(closes[:2]), FakeArrowArray(closes[2:])), np.float64, 'close')
+    assert combined.tolist() == closes.tolist()
+
+@pytest.mark.parametrize('unit', ['D', 's', 'ms', 'us', 'ns'])
+def test_column_array_converts_datetime64_units_to_nanoseconds(generator, unit):
+    dates = np.array(['2023-01-01', '2023-03-15'], dtype='datetime64[D]').astype(f"datetime64[{unit}]")
+    converted = generator.column_array(dates, np.int64, 'timestamps')
+    assert converted.dtype == np.int64
+    assert converted.tolist() == dates.astype('datetime64[ns]').astype(np.int64).tolist()
+
+def test_column_array_rejects_bad_inputs(generator):
+    with pytest.raises(ValueError, match="one-dimensional"):
+        generator.column_array(np.zeros((2, 2)), np.float64, 'close')
+    with pytest.raises(ValueError, match="datetime64 or integer nanoseconds"):
+        generator.column_array(np.zeros(3), np.int64, 'timestamps')
+    with pytest.raises(ValueError, match="close must be numeric"):
+        generator.column_array(np.array(['a', 'b']), np.float64, 'close')
+    with pytest.raises(ValueError, match="close has 1 missing values"):
+        generator.column_array(FakeArrowArray(np.zeros(3), null_count=1), np.float64, 'close')
+
+def test_columns_from_arrays_checks_rows(generator):
+    timestamps = np.array(['2023-01-01', '2023-01-02', '2023-01-03'], dtype='datetime64[ns]')
+    closes = np.array([1.0, 2.0, 3.0])
+    columns = generator.columns_from_arrays(timestamps, closes, volume=[10, 20, 30], open=None)
+    assert set(columns) == {'timestamps', 'close', 'volume'}
+    assert columns['volume'].dtype == np.float64
+
+    with pytest.raises(ValueError, match=r"timestamps must be sorted \(row 2 goes back in time\)"):
+        generator.columns_from_arrays(timestamps[[0, 2, 1]], closes)
+    with pytest.raises(ValueError, match="timestamps contain NaT"):
+        generator.columns_from_arrays(np.array(['NaT', '2023-01-02', '2023-01-03'], dtype='datetime64[ns]'), closes)
+    with pytest.raises(ValueError, match=r"close has 1 missing or infinite values \(first at row 1\)"):
+        generator.columns_from_arrays(timestamps, [1.0, np.nan, 3.0])
+    with pytest.raises(ValueError, match=r"high has 1 missing or infinite values \(first at row 2\)"):
+        generator.columns_from_arrays(timestamps, closes, high=[1.0, 2.0, np.inf])
+    with pytest.raises(ValueError, match="3 timestamps but 2 close values"):
+        generator.columns_from_arrays(timestamps, closes[:2])
+    with pytest.raises(ValueError, match="unknown columns: vwap"):
+        generator.columns_from_arrays(timestamps, closes, vwap=closes)
+
+def test_column_array_reads_pyarrow_columns(generator):
+    pa = pytest.importorskip('pyarrow')
+    closes = pa.array([1.0, 2.0, 3.0])
+    assert generator.column_array(closes, np.float64, 'close').tolist() == [1.0, 2.0, 3.0]
+    chunked = pa.chunked_array([[1.0], [2.0, 3.0]])
+    assert generator.column_array(chunked, np.float64, 'close').tolist() == [1.0, 2.0, 3.0]
+    timestamps = pa.array(np.array(['2023-01-01', '2023-01-02'], dtype='datetime64[ms]'))
+    assert generator.column_array(timestamps, np.int64, 'timestamps').tolist() == [1672531200 * 10**9, 1672617600 * 10**9]
+    with pytest.raises(ValueError, match="close has 1 missing values"):
+        generator.column_array(pa.array([1.0, None]), np.float64, 'close')
+
+@pytest.mark.parametrize('version', VERSIONS)
+def test_render_arrays_dates_come_from_the_arrays(version, run_generator, tmp_path):
+    timestamps = np.arange('2023-01-01', '2023-03-02', dtype='datetime64[D]').astype('datetime64[ns]')
+    np.save(tmp_path / 'timestamps.npy', timestamps)
+    np.save(tmp_path / 'close.npy', 100 + np.sin(np.arange(len(timestamps))))
+    for name, settings in (('all', {'ticker': 'arr'}), ('window', {'ticker': 'arr', 'start_date': '2023-02-01', 'end_date': '2023-02-11'})):
+        with open(tmp_path / f"{name}.json", 'w') as f:
+            json.dump(dict(settings, output_profiles=['Classic'], profile_frames=False), f)
+        result = run_generator(version, 'render-arrays', tmp_path / f"{name}.json", tmp_path / 'timestamps.npy', tmp_path / 'close.npy',
+                               timeout=600)
+        assert result.returncode == 0, result.stderr
+
+    # Without dates the whole series is rendered and named after its first and last day, given dates select a window
+    for filename, frames in (('mattyjacks-stock-ARR_2023-01-01_2023-03-01.mp4', 60), ('mattyjacks-stock-ARR_2023-02-01_2023-02-11.mp4', 10)):
+        assert os.path.exists(tmp_path / filename)
+        log = subprocess.run(['ffmpeg', '-i', str(tmp_path / filename), '-f', 'null', '-'], capture_output=True, text=True).stderr
+        assert int(re.findall(r"frame=\s*(\d+)", log)[-1]) == frames
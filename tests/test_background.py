@@ -0,0 +1,42 @@
+import glob
+import json
+import os
+import re
+import subprocess
+
+import pytest
+from PIL import Image
+
+from conftest import LATEST_VERSION
+
+BACKGROUND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'inspiration-video-not-ours.mov')
+
+# Helper function to list the streams ffmpeg finds in a media file, e.g. ['Video: h264 ...', 'Audio: aac ...']
+def media_streams(path):
+    log = subprocess.run(['ffmpeg', '-i', str(path)], capture_output=True, text=True).stderr
+    return re.findall(r"Stream #\S+: (.*)", log)
+
+@pytest.mark.skipif(not os.path.exists(BACKGROUND), reason="background footage not checked out")
+@pytest.mark.parametrize('version', sorted({'v023', LATEST_VERSION}))
+@pytest.mark.parametrize('output_format', ['MP4', 'WebP'])
+def test_render_over_background_with_audio(version, output_format, chart_server, run_generator, tmp_path):
+    assert any(stream.startswith('Audio:') for stream in media_streams(BACKGROUND))
+    settings = {'ticker_type': 'Stock', 'start_date': '2023-01-01', 'end_date': '2023-01-11', 'output_profiles': ['Square 1:1'],
+                'output_format': output_format, 'background_video': BACKGROUND, 'overlay_position': 'Bottom Right',
+                'profile_frames': False}
+    with open(tmp_path / 'settings.json', 'w') as f:
+        json.dump(settings, f)
+    result = run_generator(version, 'batch', tmp_path / 'settings.json', tmp_path / 'stores', 'AAA',
+                           '--base-url', f"http://127.0.0.1:{chart_server.server_address[1]}/v8/finance/chart", timeout=600)
+    assert result.returncode == 0, result.stderr
+
+    [output] = glob.glob(str(tmp_path / f"*.{output_format.lower()}"))
+    if output_format == 'WebP':
+        # WebP has no audio stream, the background's audio must be left out rather than fail the encoder
+        with Image.open(output) as image:
+            assert image.size == (1080, 1080)
+            assert image.n_frames == 9
+    else:
+        streams = media_streams(output)
+        assert any(stream.startswith('Video:') and '1080x1080' in stream for stream in streams)
+        assert any(stream.startswith('Audio:') for stream in streams)
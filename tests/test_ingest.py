@@ -0,0 +1,122 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import LATEST_VERSION
+
+TRADE_RECORD_DTYPE = np.dtype([('timestamp', '<i8'), ('price', '<f8'), ('size', '<f8')])
+
+# Helper function to read a series store's columns
+def read_store(path):
+    with open(path / 'header.json') as f:
+        header = json.load(f)
+    return {column: np.fromfile(path / f"{column}.bin", dtype=dtype) for column, dtype in header['columns'].items()}
+
+# Helper function to read sample trades back as a pandas frame indexed by trade time
+def read_trades(path):
+    if path.suffix == '.bin':
+        records = np.fromfile(path, dtype=TRADE_RECORD_DTYPE)
+        trades = pd.DataFrame({'price': records['price'], 'size': records['size']}, index=pd.to_datetime(records['timestamp']))
+    else:
+        trades = pd.read_csv(path)
+        trades.index = pd.to_datetime(trades.pop('timestamp'), unit='ms')
+    return trades
+
+@pytest.mark.parametrize('version', sorted({'v028', LATEST_VERSION}))
+@pytest.mark.parametrize('filename', ['trades.csv', 'trades.bin'])
+def test_ingest_matches_pandas_resample(version, filename, run_generator, tmp_path):
+    trades_path = tmp_path / filename
+    result = run_generator(version, 'sample-trades', trades_path, '--rows', 50_000)
+    assert result.returncode == 0, result.stderr
+    # Small chunks, so bars are split across chunks and merged again
+    result = run_generator(version, 'ingest', tmp_path / 'store', trades_path, '--interval', '1m', '--chunk-rows', 7_777)
+    assert result.returncode == 0, result.stderr
+
+    trades = read_trades(trades_path)
+    expected = trades['price'].resample('1min').ohlc()
+    expected['volume'] = trades['size'].resample('1min').sum()
+    expected = expected.dropna(subset=['open'])  # resample keeps empty minutes, the store has no row for them
+
+    bars = read_store(tmp_path / 'store')
+    assert len(bars['timestamps']) == len(expected) > 30
+    np.testing.assert_array_equal(bars['timestamps'], expected.index.to_numpy().astype('datetime64[ns]').astype(np.int64))
+    for column in ('open', 'high', 'low', 'close'):
+        np.testing.assert_array_equal(bars[column], expected[column].to_numpy())
+    np.testing.assert_allclose(bars['volume'], expected['volume'].to_numpy(), rtol=1e-9)
+
+@pytest.mark.parametrize('version', sorted({'v028', LATEST_VERSION}))
+def test_ingest_drops_rows_with_non_finite_time_or_price(version, run_generator, tmp_path):
+    trades_path = tmp_path / 'trades.csv'
+    trades_path.write_text("timestamp,price,size\n"
+                           "60000,10,1\n"
+                           ",99,1\n"         # Missing time
+                           "60500,nan,1\n"   # Missing price
+                           "61000,12,2\n"
+                           "inf,99,1\n"      # Non-finite time
+                           "90000,inf,1\n"   # Non-finite price
+                           "120000,14,1\n")
+    result = run_generator(version, 'ingest', tmp_path / 'store', trades_path, '--interval', '1m')
+    assert result.returncode == 0, result.stderr
+
+    bars = read_store(tmp_path / 'store')
+    assert bars['timestamps'].tolist() == [60 * 10**9, 120 * 10**9]
+    assert bars['open'].tolist() == [10, 14]
+    assert bars['high'].tolist() == [12, 14]
+    assert bars['low'].tolist() == [10, 14]
+    assert bars['close'].tolist() == [12, 14]
+    assert bars['volume'].tolist() == [3, 1]
+
+@pytest.mark.parametrize('version', sorted({'v028', LATEST_VERSION}))
+def test_ingest_drops_rows_with_missing_iso_time(version, run_generator, tmp_path):
+    trades_path = tmp_path / 'trades.csv'
+    trades_path.write_text("timestamp,price,size\n"
+                           "2024-01-01T00:00:10Z,10,1\n"
+                           ",99,1\n"
+                           "2024-01-01T01:00:20+01:00,12,2\n")
+    result = run_generator(version, 'ingest', tmp_path / 'store', trades_path, '--interval', '1m', '--time-unit', 'iso')
+    assert result.returncode == 0, result.stderr
+
+    bars = read_store(tmp_path / 'store')
+    assert bars['timestamps'].tolist() == [1704067200 * 10**9]
+    assert bars['close'].tolist() == [12]
+    assert bars['volume'].tolist() == [3]
+
+@pytest.mark.parametrize('version', sorted({'v028', LATEST_VERSION}))
+def test_ingest_runs_continue_the_open_bar(version, run_generator, tmp_path):
+    (tmp_path / 'a.csv').write_text("timestamp,price,size\n60000,10,1\n61000,11,1\n")
+    (tmp_path / 'b.csv').write_text("timestamp,price,size\n62000,12,1\n130000,13,1\n")
+    for name in ('a.csv', 'b.csv'):
+        result = run_generator(version, 'ingest', tmp_path / 'store', tmp_path / name, '--interval', '1m')
+        assert result.returncode == 0, result.stderr
+
+    # The 1m bar left open by the first run is rewritten by the second, not stored twice
+    bars = read_store(tmp_path / 'store')
+    assert bars['timestamps'].tolist() == [60 * 10**9, 120 * 10**9]
+    assert bars['open'].tolist() == [10, 13]
+    assert bars['high'].tolist() == [12, 13]
+    assert bars['low'].tolist() == [10, 13]
+    assert bars['close'].tolist() == [12, 13]
+    assert bars['volume'].tolist() == [3, 1]
+
+    # Another interval can't continue those bars
+    result = run_generator(version, 'ingest', tmp_path / 'store', tmp_path / 'b.csv', '--interval', '7s')
+    assert result.returncode != 0
+    assert "holds bars of a different interval than 7s" in result.stderr
+
+@pytest.mark.parametrize('version', sorted({'v028', LATEST_VERSION}))
+def test_ingest_of_split_dumps_matches_one_ingest(version, run_generator, tmp_path):
+    result = run_generator(version, 'sample-trades', tmp_path / 'trades.csv', '--rows', 20_000)
+    assert result.returncode == 0, result.stderr
+    trades = pd.read_csv(tmp_path / 'trades.csv')
+    for part, rows in enumerate((trades[:7_000], trades[7_000:7_001], trades[7_001:])):
+        rows.to_csv(tmp_path / f"part{part}.csv", index=False)
+        result = run_generator(version, 'ingest', tmp_path / 'split', tmp_path / f"part{part}.csv", '--interval', '1m')
+        assert result.returncode == 0, result.stderr
+    result = run_generator(version, 'ingest', tmp_path / 'whole', tmp_path / 'trades.csv', '--interval', '1m')
+    assert result.returncode == 0, result.stderr
+
+    split, whole = read_store(tmp_path / 'split'), read_store(tmp_path / 'whole')
+    for column in whole:
+        np.testing.assert_allclose(split[column], whole[column], rtol=1e-12)
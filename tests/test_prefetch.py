@@ -0,0 +1,47 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from conftest import FIRST_DAY, LATEST_VERSION
+
+@pytest.mark.parametrize('version', sorted({'v014', LATEST_VERSION}))
+def test_prefetch_retries_and_reports_partial_failure(version, chart_server, run_generator, tmp_path):
+    ok_tickers = ['AAA', 'BB', 'CCCC', 'DDDDD']
+    rate = 4
+    result = run_generator(version, 'prefetch', tmp_path / 'stores', *ok_tickers, 'flaky', 'MISSING',
+                           '--start', '2023-01-01', '--end', '2023-01-11', '--rate', rate, '--retries', 3,
+                           '--base-url', f"http://127.0.0.1:{chart_server.server_address[1]}/v8/finance/chart")
+
+    # The 404 fails only its own ticker, without retries, and the command reports it with a non-zero exit
+    assert result.returncode == 1, result.stderr
+    assert "Failed MISSING: MISSING: HTTP 404 after 1 attempt(s)" in result.stdout
+    assert "Prefetched 5 of 6 tickers" in result.stdout
+    assert not os.path.exists(tmp_path / 'stores' / 'MISSING' / 'header.json')
+
+    # Every other ticker, including the retried one, lands in a complete store without the null bar
+    for ticker in ok_tickers + ['FLAKY']:
+        path = tmp_path / 'stores' / ticker
+        with open(path / 'header.json') as f:
+            assert json.load(f)['rows'] == 9
+        timestamps = np.fromfile(path / 'timestamps.bin', dtype='<i8')
+        closes = np.fromfile(path / 'close.bin', dtype='<f8')
+        expected = [100.0 + len(ticker) + i for i in range(10) if i != 3]
+        assert closes.tolist() == expected
+        assert timestamps[0] == FIRST_DAY * 1_000_000_000
+        assert np.all(np.diff(timestamps) > 0)
+
+    # FLAKY was retried past 503 and 429, MISSING was not retried
+    tickers = [ticker for _, ticker in chart_server.requests]
+    assert tickers.count('FLAKY') == 3
+    assert tickers.count('MISSING') == 1
+    assert len(tickers) == len(ok_tickers) + 4
+
+    # Retries go through the same token bucket (burst = rate): request k can't start before (k - burst) / rate seconds
+    times = sorted(moment for moment, _ in chart_server.requests)
+    for k, moment in enumerate(times):
+        assert moment - times[0] >= (k + 1 - rate) / rate - 0.05
+    flaky_times = [moment for moment, ticker in chart_server.requests if ticker == 'FLAKY']
+    assert flaky_times[1] - flaky_times[0] >= 0.5  # First backoff is at least 0.5 s
+    assert flaky_times[2] - flaky_times[1] >= 1.0
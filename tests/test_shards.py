@@ -0,0 +1,93 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from conftest import GENERATORS_DIR, LATEST_VERSION
+
+VERSIONS = sorted({'v013', LATEST_VERSION})  # v013 is the first version that renders offline from a series store
+ROWS = 90
+FRAMES_PER_SHARD = 15
+
+# Helper function to write a close-only series store of daily rows from 2023-01-01
+def write_store(path, rows=ROWS):
+    os.makedirs(path)
+    timestamps = np.datetime64('2023-01-01', 'ns').astype(np.int64) + np.arange(rows, dtype=np.int64) * 86400 * 10**9
+    closes = 100 + np.cumsum(np.random.default_rng(0).normal(0, 2, rows))
+    timestamps.astype('<i8').tofile(os.path.join(path, 'timestamps.bin'))
+    closes.astype('<f8').tofile(os.path.join(path, 'close.bin'))
+    header = {'format': 'ticker-series', 'version': 1, 'ticker': 'TEST', 'rows': rows,
+              'columns': {'timestamps': '<i8', 'close': '<f8'}}
+    with open(os.path.join(path, 'header.json'), 'w') as f:
+        json.dump(header, f)
+
+# Helper function to plan a sharded job over a fresh series store, returns the job directory
+def plan_job(version, run_generator, tmp_path):
+    write_store(tmp_path / 'store')
+    settings = {'ticker': 'TEST', 'series_store': str(tmp_path / 'store'), 'start_date': '2023-01-01',
+                'end_date': '2024-01-01', 'output_profiles': ['Classic'], 'profile_frames': False}
+    with open(tmp_path / 'settings.json', 'w') as f:
+        json.dump(settings, f)
+    result = run_generator(version, 'plan', tmp_path / 'job', tmp_path / 'settings.json', '--frames-per-shard', FRAMES_PER_SHARD)
+    assert result.returncode == 0, result.stderr
+    assert f"{ROWS} frames in {ROWS // FRAMES_PER_SHARD} shards" in result.stdout
+    return tmp_path / 'job'
+
+# Helper function to get the shard indexes a worker printed as rendered
+def rendered_shards(stdout):
+    shards = re.search(r"Rendered shards: (.*)", stdout).group(1)
+    return [] if shards == 'none' else [int(index) for index in shards.split(', ')]
+
+# Helper function to count the frames of a video by decoding it
+def count_frames(path):
+    log = subprocess.run(['ffmpeg', '-i', str(path), '-f', 'null', '-'], capture_output=True, text=True).stderr
+    return int(re.findall(r"frame=\s*(\d+)", log)[-1])
+
+# Helper function to write a shard lock as a worker on this host would
+def write_lock(job_dir, index, pid):
+    with open(job_dir / 'segments' / f"shard_{index:05d}.lock", 'w') as f:
+        json.dump({'host': os.uname().nodename, 'pid': pid, 'started': time.time()}, f)
+
+@pytest.mark.parametrize('version', VERSIONS)
+def test_concurrent_workers_claim_each_shard_once(version, run_generator, tmp_path):
+    job_dir = plan_job(version, run_generator, tmp_path)
+
+    # Two local processes stand in for two hosts sharing the job directory
+    workers = [subprocess.Popen([sys.executable, os.path.join(GENERATORS_DIR, f"{version}.py"), 'worker', str(job_dir)],
+                                cwd=tmp_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True) for _ in range(2)]
+    claimed = []
+    for worker in workers:
+        stdout, stderr = worker.communicate(timeout=600)
+        assert worker.returncode == 0, stderr
+        claimed.append(rendered_shards(stdout))
+    assert sorted(claimed[0] + claimed[1]) == list(range(ROWS // FRAMES_PER_SHARD))
+
+    os.makedirs(tmp_path / 'out')
+    result = run_generator(version, 'merge', job_dir, '--output-dir', tmp_path / 'out')
+    assert result.returncode == 0, result.stderr
+    outputs = os.listdir(tmp_path / 'out')
+    assert len(outputs) == 1
+    assert count_frames(tmp_path / 'out' / outputs[0]) == ROWS
+
+@pytest.mark.skipif(not hasattr(os, 'uname'), reason="dead-pid detection needs the host name")
+@pytest.mark.parametrize('version', VERSIONS)
+def test_worker_takes_over_lock_of_dead_process(version, run_generator, tmp_path):
+    job_dir = plan_job(version, run_generator, tmp_path)
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    write_lock(job_dir, 0, dead.pid)
+    write_lock(job_dir, 1, os.getpid())  # Alive: must be left alone
+
+    result = run_generator(version, 'worker', job_dir)
+    assert result.returncode == 0, result.stderr
+    assert rendered_shards(result.stdout) == [0] + list(range(2, ROWS // FRAMES_PER_SHARD))
+
+    # The live lock keeps shard 1 out of the merge, and the error says who holds it
+    result = run_generator(version, 'merge', job_dir, '--output-dir', tmp_path / 'out')
+    assert result.returncode != 0
+    assert f"shard 1 is not rendered (claimed by {os.uname().nodename}:{os.getpid()}" in result.stderr